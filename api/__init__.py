@@ -2,4 +2,6 @@
 # Schnapsen API
 
 from ._deck import Deck
-from ._state import State
\ No newline at end of file
+from ._state import State
+from ._sampler import Sampler
+from ._belief import Belief
\ No newline at end of file
@@ -0,0 +1,110 @@
+from api import util
+from ._sampler import Sampler
+
+
+class Belief:
+	"""
+	Keeps track of what the opponent's play tells about their hand, beyond what the perspective
+	already records. A marriage reveals the partner card and a trump jack exchange shows who held
+	the jack, and both end up in the perspective through add_to_perspective. But a player who leads
+	one half of a marriage without melding it shows that they did not hold the other half at that
+	moment, which the perspective does not record. (This assumes an opponent who melds every
+	marriage they can.)
+
+	A bot keeps one Belief per game, passes it every state it is given with update(), and draws
+	its worlds from sampler(). What it learns is kept per opponent, so a bot may play both seats.
+	"""
+
+	def __init__(self,
+				 weighted=True	# type: bool
+				 ):
+		"""
+		:param weighted: Whether cards the opponent lacked before their latest draws get a lower likelihood of
+			being in their hand now. If False, only the constraints that still hold for certain are used.
+		"""
+		self.__weighted = weighted
+
+		# For each opponent, and each card they lacked: the number of cards they had drawn at that moment.
+		# Keyed by the opponent, so a bot that plays both seats does not mix up what it learned.
+		self.__lacking = {1: {}, 2: {}}
+
+		self.__trump_suit = None
+		self.__draws = None
+
+	def update(self,
+			   state	# type: State
+			   ):
+		"""
+		Records what the given state tells about the opponent's hand. Call this with every state the
+		bot is given. A state from a new game makes the belief start over.
+
+		:param state: The state the bot has to move in
+		"""
+		if state.get_phase() != 1:
+			return
+
+		draws = Belief.__draws_made(state)
+
+		if self.__draws is not None and (draws < self.__draws or state.get_trump_suit() != self.__trump_suit):
+			self.__lacking = {1: {}, 2: {}}
+
+		self.__trump_suit = state.get_trump_suit()
+		self.__draws = draws
+
+		opponent = util.other(state.whose_turn())
+
+		if state.leader() != opponent:
+			return
+
+		# Pending points are paid out when a trick is won, so a leading opponent without
+		# pending points did not meld a marriage with the card they led
+		card = state.get_opponents_played_card()
+		if card % 5 not in (2, 3) or state.get_pending_points(opponent) > 0:
+			return
+
+		partner = card + 1 if card % 5 == 2 else card - 1
+		if state.get_perspective()[partner] == "U":
+			self.__lacking[opponent].setdefault(partner, draws)
+
+	def weights(self,
+				state	# type: State
+				):
+		"""
+		:param state: The state the bot has to move in
+		:return: A dictionary with, for the unknown cards we know something about, the likelihood of the card
+			being in the opponent's hand, relative to the other unknown cards (see Sampler)
+		"""
+		opponent = util.other(state.whose_turn())
+		perspective = state.get_perspective()
+		hidden = 5 - perspective.count("P{}H".format(opponent))
+		draws = Belief.__draws_made(state)
+
+		weights = {}
+
+		for card, draws_then in self.__lacking[opponent].items():
+			if perspective[card] != "U" or hidden == 0:
+				continue
+
+			# The card can only have reached the opponent's hand through one of the draws since.
+			# Each of the hidden cards is one of those draws at most, hence this rough likelihood.
+			drawn = draws - draws_then
+			if drawn == 0:
+				weights[card] = 0.0
+			elif self.__weighted:
+				weights[card] = min(drawn, hidden) / float(hidden)
+
+		return weights
+
+	def sampler(self,
+				state	# type: State
+				):
+		"""
+		:param state: The (imperfect information) state the bot has to move in
+		:return: A Sampler for the given state that only draws worlds that agree with this belief
+		"""
+		return Sampler(state, self.weights(state))
+
+	# The number of cards each player has drawn from the stock so far, the same for both players
+	@staticmethod
+	def __draws_made(state):
+		return (10 - state.get_stock_size()) // 2
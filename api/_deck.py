@@ -1,5 +1,10 @@
 import random
 
+# Lookup tables mapping the low and high ten bits of a card bitmask to the
+# indices of the cards they contain, used to turn masks back into card lists.
+_LOW_CARDS = [tuple(i for i in range(10) if mask >> i & 1) for mask in range(1024)]
+_HIGH_CARDS = [tuple(i + 10 for i in range(10) if mask >> i & 1) for mask in range(1024)]
+
 class Deck:
 	"""
 	Represents the deck at any given turn.
@@ -8,13 +13,23 @@ class Deck:
 	__RANKS = ["A", "10", "K", "Q", "J"]
 	__SUITS = ["C", "D", "H", "S"]
 
-	# A list of length 20 representing all cards and their states
-	__card_state = None # type: list[str]
+	# The card states, in the order in which their bitmasks are stored. A card that is
+	# in none of the masks of a perspective is unknown ("U") to that player.
+	# Note that the hand of player p is at position p and the won pile at position p + 2.
+	__STATES = ["S", "P1H", "P2H", "P1W", "P2W"]
+	__STATE_INDEX = {"S": 0, "P1H": 1, "P2H": 2, "P1W": 3, "P2W": 4}
+
+	# Bitmask with all 20 cards set
+	__ALL_CARDS = (1 << 20) - 1
+
+	# A list of five 20-bit integers, one per card state (in the order of __STATES).
+	# Bit i of a mask is set if card i is currently in that state.
+	__card_masks = None # type: list[int]
 
-	# A list of length 20 representing all KNOWN cards and
-	# their states from the perspective of each player
-	__p1_perspective = None
-	__p2_perspective = None
+	# The same five masks, but only holding the cards KNOWN
+	# to each player, i.e. the perspective of each player
+	__p1_masks = None # type: list[int]
+	__p2_masks = None # type: list[int]
 
 	#We use the following index representations for cards:
 
@@ -29,12 +44,12 @@ class Deck:
 	# List that holds cards which are played at any one time.
 	# Can contain two Nones, one None and an int, or two ints.
 	# The ints represent the index of the played cards according to the scheme above.
-	__trick = [None, None] # type: list[int], list[None]
+	__trick = None # type: list[int], list[None]
 
 	# Variable that stores the previous trick that was evaluated.
 	# Starts out as [None, None], then [int, int] after
 	# the first trick has been evaluated.
-	__previous_trick = [None, None];
+	__previous_trick = None
 
 	# A variable length list of card indexes representing the
 	# cards currently in stock, and more importantly, their order.
@@ -56,23 +71,83 @@ class Deck:
 				):
 		"""
 		:param card_state: list of current card states
-		:param card_state: list of current card states
-		:param card_state: list of current card states
+		:param p1_perspective: list of card states as known by player 1
+		:param p2_perspective: list of card states as known by player 2
 
 		:param stock: list of indexes of cards in stock
 		:param trump_suit: {C,D,H,S}
 		"""
 
-		self.__card_state	= card_state
+		self.__card_masks	= Deck.__to_masks(card_state)
 
-		self.__p1_perspective = p1_perspective
-		self.__p2_perspective = p2_perspective
+		self.__p1_masks = Deck.__to_masks(p1_perspective)
+		self.__p2_masks = Deck.__to_masks(p2_perspective)
 
 		self.__stock		= stock
 
+		self.__trick = [None, None]
+		self.__previous_trick = [None, None]
+
 		self.__trump_suit	=  trump_suit if trump_suit is not None else self.get_suit(self.__stock[0])
 
+	# Builds a deck directly from bitmasks, skipping the conversion from card state lists.
+	# The given lists are used as they are, so callers should pass copies where needed.
+	@staticmethod
+	def __from_masks(card_masks, p1_masks, p2_masks, stock, trump_suit, trick, previous_trick, signature):
+		deck = Deck.__new__(Deck)
+
+		deck.__card_masks = card_masks
+		deck.__p1_masks = p1_masks
+		deck.__p2_masks = p2_masks
+		deck.__stock = stock
+		deck.__trump_suit = trump_suit
+		deck.__trick = trick
+		deck.__previous_trick = previous_trick
+		deck.__signature = signature
+
+		return deck
+
+	# Converts a list of 20 card states into a list of bitmasks, one per card state.
+	@staticmethod
+	def __to_masks(card_states):
+		masks = [0, 0, 0, 0, 0]
+
+		if card_states is None:
+			return masks
+
+		for index, card_state in enumerate(card_states):
+			if card_state in Deck.__STATE_INDEX:
+				masks[Deck.__STATE_INDEX[card_state]] |= 1 << index
+
+		return masks
+
+	# Converts a list of bitmasks back into a list of 20 card states.
+	@staticmethod
+	def __to_list(masks):
+		card_states = ["U"] * 20
+
+		for card_state, mask in zip(Deck.__STATES, masks):
+			for index in Deck.get_cards(mask):
+				card_states[index] = card_state
+
+		return card_states
+
+	# Clears the card at the specified index from all of the given masks, and
+	# sets it in the mask of the specified state (unless the state is "U").
+	@staticmethod
+	def __set_in_masks(masks, index, card_state):
+		bit = 1 << index
+		for i in range(5):
+			masks[i] &= ~bit
+
+		if card_state in Deck.__STATE_INDEX:
+			masks[Deck.__STATE_INDEX[card_state]] |= bit
 
+	# Returns the list of masks that the owner of this deck is allowed to look at.
+	def __view(self):
+		if self.__signature is None:
+			return self.__card_masks
+		return self.__p1_masks if self.__signature == 1 else self.__p2_masks
 
 	# Computes the rank of a given card index, following the ordering given above.
 	@staticmethod
@@ -83,15 +158,29 @@ class Deck:
 	# Computes the suit of a given card index, following the ordering given above.
 	@staticmethod
 	def get_suit(index):
-		return Deck.__SUITS[int(index/5)]
+		return Deck.__SUITS[index // 5]
+
+	# Returns a bitmask holding the five cards of the given suit.
+	@staticmethod
+	def get_suit_mask(suit):
+		return 31 << (5 * Deck.__SUITS.index(suit))
+
+	# Returns a list of the indices of the cards set in the given bitmask, in ascending order.
+	@staticmethod
+	def get_cards(mask):
+		return list(_LOW_CARDS[mask & 1023] + _HIGH_CARDS[mask >> 10])
 
 	# Returns a list of all the cards' states
 	def get_card_states(self):
-		return list(self.__card_state)
+		return Deck.__to_list(self.__card_masks)
 
 	# Returns the state of the card at the specified index
 	def get_card_state(self, index):
-		return self.__card_state[index]
+		bit = 1 << index
+		for card_state, mask in zip(Deck.__STATES, self.__card_masks):
+			if mask & bit:
+				return card_state
+		return "U"
 
 	# Returns a list of all cards currently in the stock
 	def get_stock(self):
@@ -107,7 +196,7 @@ class Deck:
 
 	# Sets the card at the specified index to the specified state
 	def set_card(self, index, state):
-		self.__card_state[index] = state
+		Deck.__set_in_masks(self.__card_masks, index, state)
 
 	# Returns a tuple containing the card indices of the cards currently part of the trick. The index of a card will be
 	# set to None if no card is put down on that side of the trick. TODO: strange wording
@@ -127,16 +216,18 @@ class Deck:
 
 		# Depending on whether this state is signed or not, we look either through
 		# the perspective of the full card deck, or the perspective of a single player
-		perspective = self.get_perspective()
+		hand = self.__view()[player]
 
 		# If game is in phase 1 and player has trump jack
-		return (self.get_stock_size() > 0) and (perspective[self.get_trump_jack_index()] == "P" + str(player) + "H")
+		return (self.get_stock_size() > 0) and (hand >> self.get_trump_jack_index()) & 1 == 1
 
 	# Returns a list of the cards in the hand of the player that is specified.
 	def get_player_hand(self, player):
-		search_term = "P1H" if player == 1 else "P2H"
-		search_array = self.get_perspective()
-		return [i for i, x in enumerate(search_array) if x == search_term]
+		return Deck.get_cards(self.__view()[player])
+
+	# Returns the bitmask of the cards in the hand of the player that is specified.
+	def get_player_hand_mask(self, player):
+		return self.__view()[player]
 
 	# Returns the suit of the trump card.
 	def get_trump_suit(self):
@@ -145,8 +236,13 @@ class Deck:
 	# Swaps places of the trump card with the trump Jack.
 	def exchange_trump(self, trump_jack_index):
 		trump_card_index = self.__stock[0]
-		self.__card_state[trump_card_index] = self.__p1_perspective[trump_card_index] = self.__p2_perspective[trump_card_index] = self.__card_state[trump_jack_index]
-		self.__card_state[trump_jack_index] = self.__p1_perspective[trump_jack_index] = self.__p2_perspective[trump_jack_index] = "S"
+		holder = self.get_card_state(trump_jack_index)
+
+		# The exchange is public, so every perspective learns the new location of both cards
+		for masks in (self.__card_masks, self.__p1_masks, self.__p2_masks):
+			Deck.__set_in_masks(masks, trump_card_index, holder)
+			Deck.__set_in_masks(masks, trump_jack_index, "S")
+
 		self.__stock[0] = trump_jack_index
 
 		# This is done to help the visual part differentiate between
@@ -172,20 +268,14 @@ class Deck:
 	# Returns a list of possible marriages for the specified player.
 	def get_possible_mariages(self, player):
 		possible_mariages = []
-		player_hand = self.get_player_hand(player)
-		#TODO: quite bulky, maybe change into a more elegant solution or at the very least comment
-		if 2 in player_hand and 3 in player_hand:
-			possible_mariages.append((2, 3))
-			possible_mariages.append((3, 2))
-		if 7 in player_hand and 8 in player_hand:
-			possible_mariages.append((7, 8))
-			possible_mariages.append((8, 7))
-		if 12 in player_hand and 13 in player_hand:
-			possible_mariages.append((12, 13))
-			possible_mariages.append((13, 12))
-		if 17 in player_hand and 18 in player_hand:
-			possible_mariages.append((17, 18))
-			possible_mariages.append((18, 17))
+		hand = self.__view()[player]
+
+		# A marriage is a King and Queen of the same suit, which sit at
+		# consecutive indices (2 and 3 for clubs, 7 and 8 for diamonds, etc.)
+		for king in (2, 7, 12, 17):
+			if (hand >> king) & 3 == 3:
+				possible_mariages.append((king, king + 1))
+				possible_mariages.append((king + 1, king))
 
 		return possible_mariages
 
@@ -194,15 +284,25 @@ class Deck:
 		if self.get_stock_size() == 0:
 			raise RuntimeError('Stack is empty.')
 		card = self.__stock.pop()
-		if player == 1:
-			self.__card_state[card] = self.__p1_perspective[card] = "P1H"
-		else:
-			self.__card_state[card] = self.__p2_perspective[card] = "P2H"
+		bit = 1 << card
+
+		self.__card_masks[0] &= ~bit
+		self.__card_masks[player] |= bit
+
+		perspective = self.__p1_masks if player == 1 else self.__p2_masks
+		perspective[0] &= ~bit
+		perspective[player] |= bit
 
 	# Puts the cards in the trick in the specified winner's pile of won cards. After this operation the trick is emptied.
 	# Player perspectives are also updated
 	def put_trick_away(self, winner):
-		self.__card_state[self.__trick[0]] = self.__card_state[self.__trick[1]] = self.__p1_perspective[self.__trick[0]] = self.__p1_perspective[self.__trick[1]] = self.__p2_perspective[self.__trick[0]] = self.__p2_perspective[self.__trick[1]] = "P1W" if winner == 1 else "P2W"
+		bits = (1 << self.__trick[0]) | (1 << self.__trick[1])
+
+		for masks in (self.__card_masks, self.__p1_masks, self.__p2_masks):
+			masks[0] &= ~bits
+			masks[1] &= ~bits
+			masks[2] &= ~bits
+			masks[winner + 2] |= bits
 
 		# Don't need to make a deep copy in this instance, tested.
 		self.__previous_trick = self.__trick;
@@ -217,10 +317,7 @@ class Deck:
 		:param card_state: A string signifying the state of the card
 		"""
 
-		if player == 1:
-			self.__p1_perspective[index] = card_state
-		else:
-			self.__p2_perspective[index] = card_state
+		Deck.__set_in_masks(self.__p1_masks if player == 1 else self.__p2_masks, index, card_state)
 
 	#Look into overloading this function as well
 	# Generates a new deck based on a seed. If no seed is given, a random seed in generated.
@@ -271,56 +368,109 @@ class Deck:
 
 		rng = random.Random(seed)
 
-		perspective = self.get_perspective()
+		masks = list(self.__view())
 
-		trump_index = perspective.index("S")
+		# The lowest card marked as in stock is the face up trump card
+		trump_index = (masks[0] & -masks[0]).bit_length() - 1
 
-		unknowns = [index for index, card in enumerate(perspective) if card == "U"]
+		unknowns = Deck.get_cards(Deck.__ALL_CARDS & ~(masks[0] | masks[1] | masks[2] | masks[3] | masks[4]))
 
 		rng.shuffle(unknowns)
 
-		other_player_term = "P2H" if self.__signature == 1 else "P1H"
+		other_player = 2 if self.__signature == 1 else 1
 
-		other_player_unknowns = 5 - perspective.count(other_player_term)
+		other_player_unknowns = 5 - bin(masks[other_player]).count("1")
 
 		for i in range(other_player_unknowns):
-			perspective[unknowns.pop()] = other_player_term
+			masks[other_player] |= 1 << unknowns.pop()
 
 		stock = [trump_index] + unknowns
 
-		for i in range(len(unknowns)):
-			perspective[unknowns.pop()] = "S"
+		for card in unknowns:
+			masks[0] |= 1 << card
 
-		deck = Deck(perspective, stock, list(self.__p1_perspective), list(self.__p2_perspective))
+		previous_trick = list(self.__previous_trick) if self.__previous_trick is not None else None
 
-		deck.__trick = list(self.__trick)
-		deck.__previous_trick = list(self.__previous_trick) if self.__previous_trick is not None else None
+		return Deck.__from_masks(masks, list(self.__p1_masks), list(self.__p2_masks), stock, self.__trump_suit, list(self.__trick), previous_trick, None)
 
-		deck.__signature = None
+	def clone(self, signature):
+		previous_trick = list(self.__previous_trick) if self.__previous_trick is not None else None
+		signature = signature if self.__signature is None else self.__signature
+
+		return Deck.__from_masks(list(self.__card_masks), list(self.__p1_masks), list(self.__p2_masks), list(self.__stock), self.__trump_suit, list(self.__trick), previous_trick, signature)
+
+	# The records of what a move changes in this deck, for State.apply and State.undo. Each holds only
+	# what its kind of move changes, and revert() takes it back:
+	# - a card led by player p: the perspective of the follower, who learns the card (and a marriage partner)
+	# - a card played to follow by player p: the masks the trick and the draws change, the trick before
+	#   the last one and the top two cards of the stock (none in phase 2), which are drawn
+	# - a trump jack exchange: the masks, the face up trump card and the trick before the last one
+	__LEAD, __FOLLOW, __EXCHANGE = 0, 1, 2
+
+	def record_lead(self, player):
+		return (Deck.__LEAD, player, tuple(self.__p2_masks if player == 1 else self.__p1_masks))
+
+	def record_follow(self, player):
+		return (Deck.__FOLLOW, player, tuple(self.__card_masks), tuple(self.__p1_masks), tuple(self.__p2_masks), self.__previous_trick, self.__stock[-2:])
+
+	def record_exchange(self):
+		return (Deck.__EXCHANGE, self.__stock[0], tuple(self.__card_masks), tuple(self.__p1_masks), tuple(self.__p2_masks), self.__previous_trick)
+
+	# Puts the deck back as it was when the record was made, before the move was played
+	def revert(self, record):
+		kind = record[0]
+
+		if kind == Deck.__LEAD:
+			player = record[1]
+			(self.__p2_masks if player == 1 else self.__p1_masks)[:] = record[2]
+			self.__trick[player - 1] = None
+			return
+
+		self.__card_masks[:] = record[2]
+		self.__p1_masks[:] = record[3]
+		self.__p2_masks[:] = record[4]
+
+		if kind == Deck.__FOLLOW:
+			# put_trick_away moved the trick list itself to the previous trick
+			trick = self.__previous_trick
+			trick[record[1] - 1] = None
+			self.__trick = trick
+			self.__previous_trick = record[5]
+			self.__stock += record[6]
+		else:
+			self.__stock[0] = record[1]
+			self.__previous_trick = record[5]
 
-		return deck
+	# Returns an immutable record of everything a move can change in this deck. Handing it
+	# back to restore() puts the deck back in that position. Used by State.apply and State.undo.
+	def snapshot(self):
+		return (tuple(self.__card_masks), tuple(self.__p1_masks), tuple(self.__p2_masks), tuple(self.__stock), tuple(self.__trick), self.__previous_trick)
 
-	def clone(self, signature):
-		deck = Deck(list(self.__card_state), list(self.__stock), list(self.__p1_perspective), list(self.__p2_perspective), self.__trump_suit)
+	# Puts the deck back in the position recorded by snapshot().
+	def restore(self, snapshot):
+		card_masks, p1_masks, p2_masks, stock, trick, previous_trick = snapshot
 
-		deck.__signature = signature if self.__signature is None else self.__signature
-		deck.__trick = list(self.__trick)
-		deck.__previous_trick = list(self.__previous_trick) if self.__previous_trick is not None else None
+		self.__card_masks = list(card_masks)
+		self.__p1_masks = list(p1_masks)
+		self.__p2_masks = list(p2_masks)
+		self.__stock = list(stock)
+		self.__trick = list(trick)
 
-		return deck
+		# The previous trick list is never changed in place, only replaced, so it can be shared
+		self.__previous_trick = previous_trick
 
 	def get_perspective(self, player=None):
 		if self.__signature is None:
 			if player is None:
-				return self.__card_state
-			return list(self.__p1_perspective) if player == 1 else list(self.__p2_perspective)
-		return list(self.__p1_perspective) if self.__signature == 1 else list(self.__p2_perspective)
+				return Deck.__to_list(self.__card_masks)
+			return Deck.__to_list(self.__p1_masks) if player == 1 else Deck.__to_list(self.__p2_masks)
+		return Deck.__to_list(self.__p1_masks) if self.__signature == 1 else Deck.__to_list(self.__p2_masks)
 
 	def get_signature(self):
 		return self.__signature
 
 	def convert_to_json(self):
-		return {"card_state":self.__card_state, "p1_perspective":self.__p1_perspective, "p2_perspective":self.__p2_perspective, "trick":self.__trick, "previous_trick":self.__previous_trick, "stock":self.__stock, "trump_suit":self.__trump_suit, "signature":self.__signature}
+		return {"card_state":self.get_card_states(), "p1_perspective":Deck.__to_list(self.__p1_masks), "p2_perspective":Deck.__to_list(self.__p2_masks), "trick":self.__trick, "previous_trick":self.__previous_trick, "stock":self.__stock, "trump_suit":self.__trump_suit, "signature":self.__signature}
 
 	@staticmethod
 	def load_from_json(dict):
@@ -332,7 +482,7 @@ class Deck:
 		return deck
 
 	def __eq__(self, o):
-		return self.__card_state == o.__card_state and self.__p1_perspective == o.__p1_perspective and self.__p2_perspective == o.__p2_perspective and self.__trick == o.__trick and self.__stock == o.__stock and self.__trump_suit == o.__trump_suit and self.__signature == o.__signature
+		return self.__card_masks == o.__card_masks and self.__p1_masks == o.__p1_masks and self.__p2_masks == o.__p2_masks and self.__trick == o.__trick and self.__stock == o.__stock and self.__trump_suit == o.__trump_suit and self.__signature == o.__signature
 
 	def __ne__(self, o):
-		return not (self.__card_state == o.__card_state and self.__p1_perspective == o.__p1_perspective and self.__p2_perspective == o.__p2_perspective and self.__trick == o.__trick and self.__stock == o.__stock and self.__trump_suit == o.__trump_suit and self.__signature == o.__signature)
+		return not self.__eq__(o)
@@ -0,0 +1,111 @@
+from api import Deck
+import random
+
+
+class Sampler:
+	"""
+	Draws perfect information states that are consistent with what one player knows, as
+	State.make_assumption does. Everything that is the same for every draw (the unknown cards,
+	the number of hidden cards in the opponent's hand, the known part of the deck) is worked
+	out once when the sampler is made, so a bot makes one sampler per decision and draws as
+	many worlds from it as it needs.
+	"""
+
+	def __init__(self,
+				 state,			# type: State
+				 weights=None	# type: dict[int, float]
+				 ):
+		"""
+		:param state: An imperfect information state, signed by the player whose knowledge is used
+		:param weights: Optional likelihoods of unknown cards being in the opponent's hand, relative to
+			the other unknown cards, which have weight 1. A card with weight 0 is never put in the
+			opponent's hand. See Belief.
+		"""
+		signature = state.get_deck().get_signature()
+
+		if signature is None:
+			raise RuntimeError("\n\nCannot make a sampler, already have perfect knowledge. Try this in phase 1 or with an un-assumed state")
+
+		opponent = 2 if signature == 1 else 1
+
+		card_masks, p1_masks, p2_masks, stock, trick, previous_trick = state.get_deck().snapshot()
+		view = p1_masks if signature == 1 else p2_masks
+
+		self.__opponent = opponent
+		self.__known = list(view)
+
+		self.__unknowns = Deck.get_cards(((1 << 20) - 1) & ~(view[0] | view[1] | view[2] | view[3] | view[4]))
+		self.__hidden = 5 - bin(view[opponent]).count("1")
+
+		# Weights are only used if they leave enough cards to fill the opponent's hand
+		self.__weights = None
+		if weights:
+			self.__weights = {card: weights.get(card, 1.0) for card in self.__unknowns}
+			if sum(1 for weight in self.__weights.values() if weight > 0) < self.__hidden:
+				self.__weights = None
+
+		# The lowest card marked as in stock is the face up trump card
+		self.__trump = (view[0] & -view[0]).bit_length() - 1
+
+		# Every draw is written into the same state object, only the deck differs between draws
+		self.__world = state.make_assumption()
+		self.__position = self.__world.snapshot()[1:]
+		self.__perspectives = (p1_masks, p2_masks, trick, previous_trick)
+
+	def sample(self,
+			   rng=None		# type: random.Random
+			   ):
+		"""
+		Draws a world. The returned state is reused: the next call to sample() overwrites it, so
+		clone it to keep it. Until then, it can be changed freely (with apply() for instance).
+
+		:param rng: The random number generator to draw with, the global one if None
+		:return: A perfect information state
+		"""
+		if rng is None:
+			rng = random
+
+		unknowns = self.__unknowns
+		hidden = self.__hidden
+
+		rng.shuffle(unknowns)
+
+		if self.__weights is not None:
+			self.__weigh(unknowns, rng)
+
+		masks = list(self.__known)
+
+		for i in range(hidden):
+			masks[self.__opponent] |= 1 << unknowns[i]
+
+		for i in range(hidden, len(unknowns)):
+			masks[0] |= 1 << unknowns[i]
+
+		p1_masks, p2_masks, trick, previous_trick = self.__perspectives
+		stock = [self.__trump] + unknowns[hidden:]
+
+		self.__world.restore(((masks, p1_masks, p2_masks, stock, trick, previous_trick),) + self.__position)
+
+		return self.__world
+
+	# Moves the cards for the opponent's hand to the front of the shuffled unknowns, drawn with probabilities
+	# proportional to their weights (Efraimidis-Spirakis sampling). The stock keeps the shuffled order.
+	def __weigh(self, unknowns, rng):
+		weights = self.__weights
+		keys = {card: rng.random() ** (1.0 / weights[card]) if weights[card] > 0 else -1.0 for card in unknowns}
+
+		hand = sorted(unknowns, key=keys.get, reverse=True)[:self.__hidden]
+		unknowns[:] = hand + [card for card in unknowns if card not in hand]
+
+	def samples(self,
+				n,			# type: int
+				rng=None	# type: random.Random
+				):
+		"""
+		Draws n worlds at once, for instance to play them out in a batch.Batch.
+
+		:param n: The number of worlds to draw
+		:param rng: The random number generator to draw with, the global one if None
+		:return: A list of n perfect information states
+		"""
+		return [self.sample(rng).clone() for i in range(n)]
@@ -1,4 +1,4 @@
-from api import util, Deck
+from api import util, Deck, tables
 from json import dumps
 import random
 
@@ -22,6 +22,15 @@ class State:
 
 	__revoked = None  # type: int, None
 
+	# Stack of the values needed to take back the moves made through apply()
+	__undo_log = None  # type: list[tuple]
+
+	# The legal moves in the current position, as a tuple of moves, a tuple of their codes (see tables.MOVES) and a
+	# bitmask with the bits of those codes set. They are computed when first needed, and forgotten whenever the position changes.
+	__moves = None  # type: tuple
+	__codes = None  # type: tuple
+	__legal = None  # type: int
+
 	def __init__(self,
 				 deck,
 				 player1s_turn,
@@ -49,6 +58,8 @@ class State:
 		self.__p1_pending_points = p1_pending_points
 		self.__p2_pending_points = p2_pending_points
 
+		self.__undo_log = []
+
 	def next(self,
 			 move  # type: tuple(int, int)
 			 ):
@@ -60,90 +71,219 @@ class State:
 		:return: Newly computed state based on current state and given move
 		"""
 
+		# Start with a copy of the current state
+		state = self.clone()  # type: State
+
+		state.__play(move)
+
+		# Returns state
+		return state
+
+	def apply(self,
+			  move  # type: tuple(int, int)
+			  ):
+		"""
+		Plays the given move on this state itself, instead of on a copy. The changes are
+		recorded so that they can be taken back with undo(), which lets search algorithms
+		walk down and back up the game tree with a single state object.
+
+		The undo log only holds what the move changes: the scalar fields of the state, and a record
+		of the deck with the masks of the perspectives that change (see Deck.record_lead), the trick
+		and the cards drawn. The masks are saved whole rather than card by card: a few small
+		tuples per move, copied in C, cost less in Python than working out which bits changed.
+
+		:param move: Tuple of length 2 of which each element can either be an int or None
+		"""
+		if move[0] is None:
+			record = self.__deck.record_exchange()
+		elif self.__leads_turn:
+			record = self.__deck.record_lead(self.whose_turn())
+		else:
+			record = self.__deck.record_follow(self.whose_turn())
+
+		entry = (record, self.__phase, self.__leads_turn, self.__player1s_turn, self.__p1_points, self.__p2_points, self.__p1_pending_points, self.__p2_pending_points, self.__revoked)
+
+		self.__play(move)
+
+		# An invalid move only revokes the game, and leaves the deck as it was
+		if self.__revoked is not None and entry[8] is None:
+			entry = (None,) + entry[1:]
+
+		self.__undo_log.append(entry)
+
+	def undo(self):
+		"""
+		Takes back the last move that was played with apply().
+		"""
+
+		if len(self.__undo_log) == 0:
+			raise RuntimeError('No applied moves left to undo.')
+
+		record, self.__phase, self.__leads_turn, self.__player1s_turn, self.__p1_points, self.__p2_points, self.__p1_pending_points, self.__p2_pending_points, self.__revoked = self.__undo_log.pop()
+
+		if record is not None:
+			self.__deck.revert(record)
+
+		self.__moves = None
+		self.__codes = None
+		self.__legal = None
+
+	def snapshot(self):
+		"""
+		:return: A tuple that records the current position of this state, which restore() can put it back in
+		"""
+		return (self.__deck.snapshot(), self.__phase, self.__leads_turn, self.__player1s_turn, self.__p1_points, self.__p2_points, self.__p1_pending_points, self.__p2_pending_points, self.__revoked, len(self.__undo_log))
+
+	def restore(self, snapshot):
+		"""
+		Puts this state back in the position recorded by snapshot(). Moves applied after the
+		snapshot was taken can no longer be undone.
+
+		:param snapshot: A tuple returned by snapshot()
+		"""
+		deck, self.__phase, self.__leads_turn, self.__player1s_turn, self.__p1_points, self.__p2_points, self.__p1_pending_points, self.__p2_pending_points, self.__revoked, undo_length = snapshot
+
+		self.__deck.restore(deck)
+
+		del self.__undo_log[undo_length:]
+
+		self.__moves = None
+		self.__codes = None
+		self.__legal = None
+
+	def __play(self,
+			   move  # type: tuple(int, int)
+			   ):
+		"""
+		Plays the given move on this state, in place. Shared by next() and apply().
+
+		:param move: Tuple of length 2 of which each element can either be an int or None
+		"""
+
 		if self.__signature is not None and self.__signature != self.whose_turn():
 			raise RuntimeError('\n\nGame is in phase 1. Cannot view next state with imperfect information. Try making an assumption first.\n')
 
 		if self.finished():
 			raise RuntimeError('Gamestate is finished. No next states exist.')
 
-		# Start with a copy of the current state
-		state = self.clone()  # type: State
-
 		# If we find an invalid move, we set the __revoked class variable
 		# To the pid of the player who made the incorrect move, and return the state as is.
-		if not state.__is_valid(move):
-			state.__revoked = state.whose_turn()
-			return state
+		if not self.__is_valid(move):
+			self.__revoked = self.whose_turn()
+			return
+
+		# Whatever the move, the legal moves change
+		self.__moves = None
+		self.__codes = None
+		self.__legal = None
 
 		# If move is a trump exchange
 		if move[0] is None:
 
 			# Store the indices we need in variables
 			trump_jack_index = move[1]
-			trump_card_index = state.__deck.get_trump_card_index()
+			trump_card_index = self.__deck.get_trump_card_index()
 
 			# Perform trump jack exchange, perspective updated in function
-			state.__exchange_trump(trump_jack_index)
+			self.__exchange_trump(trump_jack_index)
 
-			return state
+			return
 
 		# Change turns
-		state.__leads_turn = not state.__leads_turn
+		self.__leads_turn = not self.__leads_turn
 
 		#Add the given move to the trick, store the whole trick in a variable
-		trick = state.__deck.set_trick(state.whose_turn(), move[0])
+		trick = self.__deck.set_trick(self.whose_turn(), move[0])
 
 		# At this point, we know that the move is not a trump jack exchange.
 		# Check if this move is a marriage
 		if move[1] is not None:
 
 			# A marriage cannot be melded by the non-leading player
-			if state.__leads_turn:
+			if self.__leads_turn:
 				raise RuntimeError("Marriage was attempted to be melded by non-leading player")
 
 			# Update perspective since an additional card is revealed by the player who performs a marriage.
-			state.__deck.add_to_perspective(util.other(state.whose_turn()), move[1], "P" + str(state.whose_turn()) + "H")
+			self.__deck.add_to_perspective(util.other(self.whose_turn()), move[1], "P" + str(self.whose_turn()) + "H")
 
 			# Trump suit marriage yields 40 points, regular yields 20, to be awarded at next trick win.
-			if Deck.get_suit(move[1]) == state.__deck.get_trump_suit():
-				state.__reserve_pending_points(state.whose_turn(), 40)
+			if tables.SUITS[tables.SUIT[move[1]]] == self.__deck.get_trump_suit():
+				self.__reserve_pending_points(self.whose_turn(), 40)
 			else:
-				state.__reserve_pending_points(state.whose_turn(), 20)
+				self.__reserve_pending_points(self.whose_turn(), 20)
 
 		# If it is not the lead's turn, i.e. currently the trick is
 		# incomplete and we already know it's not a trump jack exchange
-		if not state.__leads_turn:
-			other = state.whose_turn()
-			state.__player1s_turn = not state.__player1s_turn
-			state.__deck.add_to_perspective(state.whose_turn(), trick[other-1], "P" + str(other) + "H")
-			return state
+		if not self.__leads_turn:
+			other = self.whose_turn()
+			self.__player1s_turn = not self.__player1s_turn
+			self.__deck.add_to_perspective(self.whose_turn(), trick[other-1], "P" + str(other) + "H")
+			return
 
 		# At this point we know that it is the lead's turn and that a complete
 		# trick from the previous hand can be evaluated.
 
 		# Evaluate the trick and store the winner in the leader variable
-		leader = state.__evaluate_trick(trick)
+		leader = self.__evaluate_trick(trick)
 
-		state.__allocate_trick_points(leader, trick)
+		self.__allocate_trick_points(leader, trick)
 
-		state.__deck.put_trick_away(leader)
+		self.__deck.put_trick_away(leader)
 
-		if state.__phase == 2 and len(state.hand()) == 0 and not state.finished():
+		if self.__phase == 2 and len(self.hand()) == 0 and not self.finished():
 			# If all cards are exhausted, the winner of the last trick wins the game
-			state.__set_points(leader, 66)
+			self.__set_points(leader, 66)
 
 		#Draw cards from stock
-		if state.__phase == 1:
-			state.__deck.draw_card(leader)
-			state.__deck.draw_card(util.other(leader))
-			if state.__deck.get_stock_size() == 0:
-				state.__phase = 2
+		if self.__phase == 1:
+			self.__deck.draw_card(leader)
+			self.__deck.draw_card(util.other(leader))
+			if self.__deck.get_stock_size() == 0:
+				self.__phase = 2
 
 
 		# Set player1s_turn according to the leader variable
-		state.__player1s_turn = True if leader == 1 else False
+		self.__player1s_turn = True if leader == 1 else False
+
+	def rollout(self,
+				rng=None,		# type: random.Random
+				policy=None,	# type: callable
+				max_depth=None,	# type: int
+				stop=None		# type: callable
+				):
+		"""
+		Plays the game out from this state, by default with uniformly random moves. All moves
+		are played in place on a single copy of this state, so no state objects are created
+		along the way.
+
+		:param rng: The random number generator used to pick moves, e.g. a seeded random.Random
+			instance for reproducible rollouts. Defaults to the global random module.
+		:param policy: Optional function policy(state, moves, rng) that returns the move to play
+			out of the given list of legal moves. Defaults to rng.choice(moves).
+		:param max_depth: Optional maximum number of moves to play. If the game is not finished
+			after that many moves, the unfinished state is returned.
+		:param stop: Optional function stop(state) that is asked before every move, the rollout
+			ends in the first state for which it returns True (see endgame.playout).
+		:return: The state in which the rollout ended. Its winner() and get_points() give the outcome.
+		"""
+
+		if self.__signature is not None:
+			raise RuntimeError('\n\nCannot roll out a state with imperfect information. Try making an assumption first.\n')
+
+		if rng is None:
+			rng = random
+
+		state = self.clone()  # type: State
+		depth = 0
+
+		while not state.finished() and (max_depth is None or depth < max_depth):
+			if stop is not None and stop(state):
+				break
+
+			moves = state.moves()
+			state.__play(rng.choice(moves) if policy is None else policy(state, moves, rng))
+			depth += 1
 
-		# Returns state
 		return state
 
 	def finished(self):
@@ -203,61 +343,63 @@ class State:
 				- (int, int) : first element as above, second element completes a marriage
 				- (None, int): First element being None indicates a trump jack exchange,
 					second element is the index of that trump jack
+			The moves are generated once per position, later calls return a copy.
 		"""
+		if self.__moves is None:
+			self.__generate_moves()
 
-		hand = self.hand()
-
-		if self.__signature is not None and len(hand) == 0:
-			raise RuntimeError("\n\nGame is in phase 1. Insufficient information to derive any of the opponent's possible moves. Try to make an assumption\n")
-
-		possible_moves = []
+		return list(self.__moves)
 
-		# In this case, no constraints are put on the move
-		if self.__phase == 1 or self.whose_turn() == self.leader():
-
-			for card in hand:
-				possible_moves.append((card, None))
-
-		# If the game is in phase 2 and it's not the leader's turn, then some constraints apply
-		else:
-			opponent_card = self.get_opponents_played_card()
-			same_suit_hand = [card for card in hand if Deck.get_suit(card) == Deck.get_suit(opponent_card)]
-			playable_cards = None
+	def move_codes(self):
+		"""
+		:return: A list of the codes of all the legal moves (see tables.MOVES), in the same order as moves()
+		"""
+		if self.__codes is None:
+			self.__generate_moves()
 
-			if len(same_suit_hand) > 0:
-				same_suit_hand_higher = [card for card in same_suit_hand if card < opponent_card]
+		return list(self.__codes)
 
-				if len(same_suit_hand_higher) > 0:
-					playable_cards = same_suit_hand_higher
+	def __generate_moves(self):
+		"""
+		Generates the legal moves and their codes, see moves()
+		"""
+		self.__codes = tuple(self.__generate_codes())
+		self.__moves = tuple([tables.MOVES[code] for code in self.__codes])
 
-				else:
-					playable_cards = same_suit_hand
+	def __generate_codes(self):
+		"""
+		:return: A list of the codes of all the legal moves, see move_codes()
+		"""
 
-			elif Deck.get_suit(opponent_card) != self.__deck.get_trump_suit():
-				trump_hand = [card for card in hand if Deck.get_suit(card) == self.__deck.get_trump_suit()]
-				if len(trump_hand) > 0:
+		# The hand is handled as a bitmask, in which bit i is set if card i is in the hand
+		hand = self.__deck.get_player_hand_mask(self.whose_turn())
 
-					playable_cards = trump_hand
+		if self.__signature is not None and hand == 0:
+			raise RuntimeError("\n\nGame is in phase 1. Insufficient information to derive any of the opponent's possible moves. Try to make an assumption\n")
 
-				else:
-					playable_cards = hand
+		# In this case, no constraints are put on the move
+		if self.__phase == 1 or self.whose_turn() == self.leader():
+			playable_cards = hand
 
-			else:
-				playable_cards = hand
+		# If the game is in phase 2 and it's not the leader's turn, then some constraints apply
+		else:
+			trump = tables.SUIT_INDEX[self.__deck.get_trump_suit()]
+			playable_cards = tables.legal_follow(hand, self.get_opponents_played_card(), trump)
 
-			possible_moves = [(card, None) for card in playable_cards]
+		# The code of playing a card is the index of the card
+		codes = Deck.get_cards(playable_cards)
 
-		#Add possible trump jack exchanges and mariages to moves
+		#Add possible trump jack exchanges and mariages
 		#Marriages and exchanges can only be made by the leading player
 		if self.whose_turn() == self.leader():
 
 			if self.__deck.can_exchange(self.whose_turn()):
-				possible_moves.append((None, self.__deck.get_trump_jack_index()))
+				codes.append(tables.CODES[(None, self.__deck.get_trump_jack_index())])
 
-			possible_mariages = self.__deck.get_possible_mariages(self.whose_turn())
-			possible_moves += possible_mariages
+			for mariage in self.__deck.get_possible_mariages(self.whose_turn()):
+				codes.append(tables.CODES[mariage])
 
-		return possible_moves
+		return codes
 
 	# Implementation will be changed in W2
 	def hand(self):
@@ -271,10 +413,26 @@ class State:
 		"""
 		:return: Returns a deep copy of the current state
 		"""
-		state = State(self.__deck.clone(signature), self.__player1s_turn, self.__p1_points, self.__p2_points, self.__p1_pending_points, self.__p2_pending_points)
+		# Bypass the constructor, every field is copied over below
+		state = State.__new__(State)
+		state.__deck = self.__deck.clone(signature)
+		state.__player1s_turn = self.__player1s_turn
+		state.__p1_points = self.__p1_points
+		state.__p2_points = self.__p2_points
+		state.__p1_pending_points = self.__p1_pending_points
+		state.__p2_pending_points = self.__p2_pending_points
 		state.__phase = self.__phase
 		state.__leads_turn = self.__leads_turn
 		state.__revoked = self.__revoked
+		state.__undo_log = []
+
+		# A copy with less information could otherwise reveal moves it cannot know about. And the moves
+		# of a signed state only hold the cards its player can see, which a copy that makes an
+		# assumption about the other cards must not keep.
+		if signature is None and self.__signature is None:
+			state.__moves = self.__moves
+			state.__codes = self.__codes
+			state.__legal = self.__legal
 
 		state.__signature = signature if self.__signature is None else self.__signature
 
@@ -299,7 +457,7 @@ class State:
 				if state.finished():
 					return State.generate(id if id is None else id+1, phase) # Father forgive me
 
-				state = state.next(rng.choice(state.moves()))
+				state.__play(rng.choice(state.moves()))
 
 			total_score = state.__p1_points + state.__p2_points
 			state.__set_points(1, int(total_score/2))
@@ -409,6 +567,13 @@ class State:
 		"""
 		return self.__phase
 
+	def get_deck(self):
+		"""
+		:return: The Deck object of this state. Note that this is not a copy, so changing
+			the deck changes the state as well.
+		"""
+		return self.__deck
+
 	def make_assumption(self):
 		"""
 		Takes the current imperfect information state and makes a 
@@ -431,8 +596,19 @@ class State:
 		:return: A boolean indicating whether the given move is valid considering the current state
 		"""
 		if (self.__phase == 1 or self.__leads_turn) and move[0] is not None and move[1] is None:
+			# A card outside the deck has no bit in the masks, so it is no move at all
+			if not 0 <= move[0] < 20:
+				return False
 			return (self.__deck.get_card_state(move[0]) == ("P" + str(self.whose_turn()) + "H"))
-		return move in self.moves()
+
+		if self.__legal is None:
+			self.__legal = 0
+			for code in self.move_codes():
+				self.__legal |= 1 << code
+
+		# Tuples that are not a move at all have no code
+		code = tables.CODES.get(move)
+		return code is not None and (self.__legal >> code) & 1 == 1
 
 	def __exchange_trump(self, trump_jack_index):
 		"""
@@ -499,16 +675,7 @@ class State:
 		:param trick: A tuple signifying the trick which is used to determine how many points the winner is allocated
 		"""
 
-		# A list containing points of the cards of by rank
-		score = [11, 10, 4, 3, 2]
-
-		rank_first_card_trick = trick[0] % 5
-		rank_second_card_trick = trick[1] % 5
-
-		total_score = score[rank_first_card_trick]
-		total_score += score[rank_second_card_trick]
-
-		self.__add_points(winner, total_score)
+		self.__add_points(winner, tables.TRICK_POINTS[trick[0]][trick[1]])
 		self.__add_pending_points(winner)
 
 	def __evaluate_trick(self, trick):
@@ -523,26 +690,19 @@ class State:
 			raise RuntimeError("Incorrect trick format. List of length 2 needed.")
 		if trick[0] is None or trick[1] is None:
 			raise RuntimeError("An incomplete trick was attempted to be evaluated.")
-		
-		# If the two cards of the trick have the same suit
-		if Deck.get_suit(trick[0]) == Deck.get_suit(trick[1]):
 
-			# We only compare indices since the convention we defined in Deck 
-			# puts higher rank cards at lower indices, when considering the same color.
-			return 1 if trick[0] < trick[1] else 2
+		# Since the new leader is determined by the output of this function, at this
+		# point the state object still considers it to be the non-leading player's turn.
+		# Thus, the player who led the trick is the other player. Thanks: Daan Raven
+		follower = self.whose_turn()
+		leader = util.other(follower)
 
-		if Deck.get_suit(trick[0]) ==  self.__deck.get_trump_suit():
-			return 1
+		trump = tables.SUIT_INDEX[self.__deck.get_trump_suit()]
 
-		if Deck.get_suit(trick[1]) ==  self.__deck.get_trump_suit():
-			return 2
+		if tables.LEAD_WINS[trump][trick[leader - 1]][trick[follower - 1]]:
+			return leader
 
-		# If the control flow has reached this point, the trick consists of two
-		# different non-trump cards. Since the new leader is determined by the
-		# output of this function, at this point the state object still considers
-		# it to be the non-leading player's turn. Thus, we determine that the winner
-		# is the other player, i.e. the leading player. Thanks: Daan Raven
-		return util.other(self.whose_turn())
+		return follower
 
 	def set_to_revoked(self):
 		"""
@@ -559,7 +719,7 @@ class State:
 
 		if self.__signature is not None:
 			raise RuntimeError("Cannot convert partial information state to JSON")
-		return dumps({"deck":self.__deck.convert_to_json(), "moves":self.moves(), "finished":self.finished(), "phase":self.__phase, "leads_turn":self.__leads_turn, "player1s_turn":self.__player1s_turn, "p1_points":self.__p1_points, "p2_points":self.__p2_points, "p1_pending_points":self.__p1_pending_points, "p2_pending_points":self.__p2_pending_points, "signature":self.__signature, "revoked":self.__revoked})
+		return dumps({"deck":self.__deck.convert_to_json(), "moves":self.moves(), "move_codes":self.move_codes(), "finished":self.finished(), "phase":self.__phase, "leads_turn":self.__leads_turn, "player1s_turn":self.__player1s_turn, "p1_points":self.__p1_points, "p2_points":self.__p2_points, "p1_pending_points":self.__p1_pending_points, "p2_pending_points":self.__p2_pending_points, "signature":self.__signature, "revoked":self.__revoked})
 
 	@staticmethod
 	def load_from_json(dict):
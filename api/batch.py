@@ -0,0 +1,347 @@
+"""
+Vectorized playouts. A Batch advances many independent games at once: every game is a row
+in a set of NumPy arrays, and each step plays one move in all unfinished games.
+
+Moves are represented by a move code between 0 and 31:
+	0-19:	play the card with that index
+	20-27:	marriage of suit s (in the suit order of Deck), 20 + 2s plays the King and
+			melds the Queen, 21 + 2s plays the Queen and melds the King
+	28-31:	trump jack exchange in suit s, 28 + s
+These are the codes of api.tables, to_move and to_code convert them.
+"""
+
+import numpy as np
+from api.tables import to_move, to_code
+
+# Points per card index
+_SCORE = np.array([11, 10, 4, 3, 2] * 4, dtype=np.int16)
+
+# Suit of every card index, as an index into the suit order C, D, H, S
+_SUIT = np.arange(20) // 5
+
+_CARDS = np.arange(20)
+
+_KINGS = [2, 7, 12, 17]
+_QUEENS = [3, 8, 13, 18]
+
+_SUITS = ["C", "D", "H", "S"]
+
+# Card location codes. The hand of player p is p, the pile of won cards p + 2.
+_LOCATIONS = {"S": 0, "P1H": 1, "P2H": 2, "P1W": 3, "P2W": 4}
+
+
+class Batch:
+	"""
+	A batch of perfect information games that are played out simultaneously.
+	"""
+
+	# (N, 20) array with the location of every card: 0 for the stock, 1/2 for the
+	# hand of player 1/2 and 3/4 for the won cards of player 1/2. Cards in the
+	# trick stay in the hand of the player that played them until the trick is evaluated.
+	__locations = None
+
+	# (N, 10) array with the order of the cards in the stock, as in Deck. Only the first
+	# __stock_size entries of a row are used, the trump card is in the first column.
+	__stock = None
+	__stock_size = None
+
+	# (N, 2) array with the card played by each player in the current trick, -1 for none.
+	__trick = None
+
+	# (N,) array with the trump suit, as an index into the suit order C, D, H, S
+	__trump = None
+
+	# (N, 2) arrays with the points and pending points of each player
+	__points = None
+	__pending_points = None
+
+	# (N,) arrays with the phase, whether the leader is to move, and whether player 1 is to move
+	__phase = None
+	__leads_turn = None
+	__player1s_turn = None
+
+	def __init__(self, states):
+		"""
+		:param states: A list of perfect information State objects to start the games from,
+			for instance the results of State.make_assumption()
+		"""
+		n = len(states)
+
+		self.__locations = np.zeros((n, 20), dtype=np.int8)
+		self.__stock = np.zeros((n, 10), dtype=np.int8)
+		self.__stock_size = np.zeros(n, dtype=np.int8)
+		self.__trick = np.full((n, 2), -1, dtype=np.int8)
+		self.__trump = np.zeros(n, dtype=np.int8)
+		self.__points = np.zeros((n, 2), dtype=np.int16)
+		self.__pending_points = np.zeros((n, 2), dtype=np.int16)
+		self.__phase = np.zeros(n, dtype=np.int8)
+		self.__leads_turn = np.zeros(n, dtype=bool)
+		self.__player1s_turn = np.zeros(n, dtype=bool)
+
+		for i, state in enumerate(states):
+			deck = state.get_deck()
+
+			if deck.get_signature() is not None:
+				raise RuntimeError("\n\nCannot play out a state with imperfect information. Try making an assumption first.\n")
+
+			self.__locations[i] = [_LOCATIONS[card] for card in deck.get_card_states()]
+
+			stock = deck.get_stock()
+			self.__stock[i, :len(stock)] = stock
+			self.__stock_size[i] = len(stock)
+
+			self.__trick[i] = [-1 if card is None else card for card in deck.get_trick()]
+			self.__trump[i] = _SUITS.index(state.get_trump_suit())
+
+			self.__points[i] = [state.get_points(1), state.get_points(2)]
+			self.__pending_points[i] = [state.get_pending_points(1), state.get_pending_points(2)]
+
+			self.__phase[i] = state.get_phase()
+			self.__leads_turn[i] = state.leader() == state.whose_turn()
+			self.__player1s_turn[i] = state.whose_turn() == 1
+
+	def __len__(self):
+		return len(self.__phase)
+
+	def finished(self):
+		"""
+		:return: A boolean array indicating for every game whether it is finished
+		"""
+		return (self.__points >= 66).any(axis=1)
+
+	def winner(self):
+		"""
+		:return: Two integer arrays: the id of the player who won every game (0 if the game is not
+			finished yet), and the number of game points (1-3) they won, as in State.winner().
+		"""
+		winner = np.where(self.__points[:, 0] >= 66, 1, np.where(self.__points[:, 1] >= 66, 2, 0))
+		other_player_points = np.where(winner == 1, self.__points[:, 1], self.__points[:, 0])
+
+		points = np.where(other_player_points == 0, 3, np.where(other_player_points < 33, 2, 1))
+		points[winner == 0] = 0
+
+		return winner, points
+
+	def get_points(self, player):
+		"""
+		:param player: The player id of the player whose points we want
+		:return: An array with the points of the requested player in every game
+		"""
+		return self.__points[:, player - 1].copy()
+
+	def whose_turn(self):
+		"""
+		:return: An array with the id of the player to move in every game
+		"""
+		return np.where(self.__player1s_turn, 1, 2)
+
+	def moves(self, games=None):
+		"""
+		Computes the legal moves in the given games, following the same rules as State.moves().
+
+		:param games: Optional array of the indices of the games to consider. Defaults to all games.
+		:return: A (len(games), 32) boolean array, in which entry [i, code] is True if
+			the move with that move code is legal in game games[i]
+		"""
+		if games is None:
+			games = np.arange(len(self))
+
+		n = len(games)
+		turn = np.where(self.__player1s_turn[games], 1, 2)
+		leads = self.__leads_turn[games]
+		trump = self.__trump[games]
+
+		hand = self.__locations[games] == turn[:, None]
+		playable = hand.copy()
+
+		# In phase 2, the player who is not leading has to follow suit, and
+		# play a trump card if they can not. Higher cards must be played if possible.
+		follows = np.flatnonzero((self.__phase[games] == 2) & ~leads)
+
+		if len(follows) > 0:
+			h = hand[follows]
+			lead_card = self.__trick[games[follows], 2 - turn[follows]]
+			lead_suit = _SUIT[lead_card]
+
+			same_suit = h & (_SUIT[None, :] == lead_suit[:, None])
+			# Within a suit, higher rank cards have lower indices
+			same_suit_higher = same_suit & (_CARDS[None, :] < lead_card[:, None])
+			trumps = h & (_SUIT[None, :] == trump[follows][:, None])
+
+			must_trump = (lead_suit != trump[follows]) & trumps.any(axis=1)
+
+			playable[follows] = np.where(same_suit_higher.any(axis=1)[:, None], same_suit_higher,
+								np.where(same_suit.any(axis=1)[:, None], same_suit,
+								np.where(must_trump[:, None], trumps, h)))
+
+		legal = np.zeros((n, 32), dtype=bool)
+		legal[:, :20] = playable
+
+		# Marriages and exchanges can only be made by the leading player
+		marriages = hand[:, _KINGS] & hand[:, _QUEENS] & leads[:, None]
+		legal[:, 20:28:2] = marriages
+		legal[:, 21:28:2] = marriages
+
+		exchange = leads & (self.__stock_size[games] > 0) & hand[np.arange(n), trump * 5 + 4]
+		legal[np.arange(n), 28 + trump] = exchange
+
+		return legal
+
+	def apply(self, games, codes):
+		"""
+		Plays one move in each of the given games. The moves are assumed to be legal.
+
+		:param games: Array of the indices of the games to play a move in
+		:param codes: Array of the move codes to play, one per game
+		"""
+		games = np.asarray(games)
+		codes = np.asarray(codes)
+
+		turn = np.where(self.__player1s_turn[games], 1, 2)
+
+		# Trump jack exchanges
+		exchange = codes >= 28
+		if exchange.any():
+			g = games[exchange]
+			jack = self.__trump[g] * 5 + 4
+			self.__locations[g, self.__stock[g, 0]] = turn[exchange]
+			self.__locations[g, jack] = 0
+			self.__stock[g, 0] = jack
+
+		play = ~exchange
+		g = games[play]
+		codes = codes[play]
+		turn = turn[play]
+
+		# Marriages reserve 40 points in the trump suit and 20 otherwise, awarded at the next trick win
+		marriage = codes >= 20
+		suit = (codes - 20) // 2
+		cards = np.where(marriage, suit * 5 + 2 + (codes - 20) % 2, codes)
+
+		if marriage.any():
+			gm = g[marriage]
+			points = np.where(suit[marriage] == self.__trump[gm], 40, 20)
+			np.add.at(self.__pending_points, (gm, turn[marriage] - 1), points)
+
+		self.__trick[g, turn - 1] = cards
+
+		# If the leader played, it is now the other player's turn
+		leads = self.__leads_turn[g]
+		gl = g[leads]
+		self.__leads_turn[gl] = False
+		self.__player1s_turn[gl] = ~self.__player1s_turn[gl]
+
+		# Otherwise the trick is complete and can be evaluated
+		gf = g[~leads]
+		if len(gf) > 0:
+			self.__evaluate_tricks(gf, turn[~leads])
+
+	def __evaluate_tricks(self, games, turn):
+		"""
+		Evaluates the complete tricks in the given games, awards the points, and draws cards.
+
+		:param games: Array of the indices of the games with a complete trick
+		:param turn: Array with the id of the player who completed each trick
+		"""
+		first = self.__trick[games, 0]
+		second = self.__trick[games, 1]
+		trump = self.__trump[games]
+
+		first_suit = _SUIT[first]
+		second_suit = _SUIT[second]
+
+		# Same rules as State.__evaluate_trick, including the leader winning a trick of two different non-trump suits
+		winner = np.where(first_suit == second_suit, np.where(first < second, 1, 2),
+				 np.where(first_suit == trump, 1,
+				 np.where(second_suit == trump, 2, 3 - turn)))
+
+		self.__points[games, winner - 1] += _SCORE[first] + _SCORE[second] + self.__pending_points[games, winner - 1]
+		self.__pending_points[games, winner - 1] = 0
+
+		self.__locations[games, first] = winner + 2
+		self.__locations[games, second] = winner + 2
+		self.__trick[games] = -1
+
+		# If all cards are exhausted, the winner of the last trick wins the game
+		phase2 = self.__phase[games] == 2
+		empty = ~(self.__locations[games] == turn[:, None]).any(axis=1)
+		last = phase2 & empty & ~(self.__points[games] >= 66).any(axis=1)
+		self.__points[games[last], winner[last] - 1] = 66
+
+		# Draw cards from stock, the winner of the trick first
+		draw = ~phase2
+		if draw.any():
+			gd = games[draw]
+			size = self.__stock_size[gd].astype(np.intp)
+
+			self.__locations[gd, self.__stock[gd, size - 1]] = winner[draw]
+			self.__locations[gd, self.__stock[gd, size - 2]] = 3 - winner[draw]
+
+			self.__stock_size[gd] -= 2
+			self.__phase[gd[self.__stock_size[gd] == 0]] = 2
+
+		self.__player1s_turn[games] = winner == 1
+		self.__leads_turn[games] = True
+
+	def step(self, rng, period=None):
+		"""
+		Plays one uniformly random legal move in every unfinished game.
+
+		:param rng: A numpy.random.Generator
+		:param period: Optional number of games after which the random numbers repeat: game i and
+			game i + period are played with the same random number, so games that start from
+			the same position play the same moves (common random numbers)
+		:return: The number of games in which a move was played
+		"""
+		games = np.flatnonzero(~self.finished())
+
+		if len(games) == 0:
+			return 0
+
+		legal = self.moves(games)
+
+		if period is None:
+			uniforms = rng.random(len(games))
+		else:
+			uniforms = rng.random(period)[games % period]
+
+		# Pick the k-th legal move, with k drawn uniformly from the number of legal moves
+		k = (uniforms * legal.sum(axis=1)).astype(np.intp)
+		codes = (legal.cumsum(axis=1) <= k[:, None]).sum(axis=1)
+
+		self.apply(games, codes)
+
+		return len(games)
+
+	def run(self, rng=None, max_depth=None, period=None):
+		"""
+		Plays all games out with uniformly random moves.
+
+		:param rng: Optional numpy.random.Generator, or a seed for one
+		:param max_depth: Optional maximum number of moves to play in every game
+		:param period: Optional period of the random numbers over the games, see step()
+		:return: The outcomes of the games, as returned by winner()
+		"""
+		rng = np.random.default_rng(rng)
+		depth = 0
+
+		while (max_depth is None or depth < max_depth) and self.step(rng, period) > 0:
+			depth += 1
+
+		return self.winner()
+
+
+def rollout(states, rng=None, max_depth=None, period=None):
+	"""
+	Plays out all given states at once with uniformly random moves.
+
+	:param states: A list of perfect information State objects
+	:param rng: Optional numpy.random.Generator, or a seed for one
+	:param max_depth: Optional maximum number of moves to play in every game
+	:param period: Optional period of the random numbers over the games, see Batch.step()
+	:return: The final Batch, whose winner() and get_points() give the outcome of every game
+	"""
+	batch = Batch(states)
+	batch.run(rng, max_depth, period)
+
+	return batch
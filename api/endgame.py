@@ -0,0 +1,182 @@
+"""
+Exact solver for phase 2. Once the stock is empty both players know where every card is, and at
+most ten cards are left, so the game can be searched to the end. The solver runs an alpha-beta
+search with move ordering on the State itself (with apply and undo), and remembers the positions
+it has searched in a transposition table, which it keeps between calls.
+
+Values are the game points of State.winner, positive if player 1 wins and negative if player 2
+wins, so they lie between -3 and 3.
+"""
+
+from api import tables, transposition
+
+class Solver:
+	"""
+	Solves phase 2 positions exactly. Keep one solver for as long as possible: positions that
+	were solved before, for instance in an earlier rollout of the same search, are looked up
+	instead of searched again.
+	"""
+
+	def __init__(self,
+				 table_size=262144	# type: int
+				 ):
+		"""
+		:param table_size: The number of positions the transposition table can hold
+		"""
+		self.__table = transposition.TranspositionTable(table_size)
+
+		# The number of positions searched so far
+		self.nodes = 0
+
+	def solve(self,
+			  state		# type: State
+			  ):
+		"""
+		:param state: A perfect information state in phase 2
+		:return: A tuple (value, move): the game points player 1 wins with perfect play by both players
+			(negative if player 2 wins), and a best move for the player to move (None if the game is finished)
+		"""
+		if state.get_phase() != 2 or state.get_deck().get_signature() is not None:
+			raise RuntimeError("Only perfect information states in phase 2 can be solved.")
+
+		# The search plays moves on the state in place, so we work on a copy of it
+		return self.__search(state.clone(), -3, 3)
+
+	def value(self,
+			  state		# type: State
+			  ):
+		"""
+		:param state: A perfect information state in phase 2
+		:return: The game points player 1 wins with perfect play, negative if player 2 wins
+		"""
+		return self.solve(state)[0]
+
+	def __search(self, state, alpha, beta):
+		self.nodes += 1
+
+		if state.finished():
+			winner, points = state.winner()
+			return (points if winner == 1 else -points), None
+
+		key = transposition.key(state)
+		entry = self.__table.lookup(key)
+		table_move = None
+
+		# The search is exact, so the depth of an entry does not matter
+		if entry is not None:
+			entry_value, bound, depth, table_move = entry
+
+			if bound == transposition.EXACT:
+				return entry_value, table_move
+			if bound == transposition.LOWER:
+				alpha = max(alpha, entry_value)
+			if bound == transposition.UPPER:
+				beta = min(beta, entry_value)
+			if alpha >= beta:
+				return entry_value, table_move
+
+		original_alpha, original_beta = alpha, beta
+
+		maximizing = state.whose_turn() == 1
+		best_value = -4 if maximizing else 4
+		best_move = None
+
+		for move in ordered_moves(state, table_move):
+			state.apply(move)
+			value, _ = self.__search(state, alpha, beta)
+			state.undo()
+
+			if maximizing:
+				if value > best_value:
+					best_value, best_move = value, move
+					alpha = max(alpha, value)
+			else:
+				if value < best_value:
+					best_value, best_move = value, move
+					beta = min(beta, value)
+
+			if alpha >= beta:
+				break
+
+		# Positions with more cards left took more work to solve, so they are kept over those with fewer
+		self.__table.store(key, best_value, transposition.bound(best_value, original_alpha, original_beta), cards_left(state), best_move)
+
+		return best_value, best_move
+
+def ordered_moves(state, first=None):
+	"""
+	Orders the legal moves so that the best ones are likely to come first, which makes alpha-beta
+	cut off sooner. The leader tries marriages first, then the cards worth the most. The follower
+	tries the cheapest card that wins the trick first, then the cheapest cards that lose it.
+
+	:param state: A perfect information state
+	:param first: A move to put in front, if it is legal (such as the best move found before)
+	:return: The list of legal moves
+	"""
+	moves = state.moves()
+	trump = tables.SUIT_INDEX[state.get_trump_suit()]
+	led = state.get_opponents_played_card()
+
+	if led is None:
+		def order(move):
+			if move[0] is None:
+				return 0
+			if move[1] is not None:
+				return -40 if tables.SUIT[move[1]] == trump else -20
+			return -tables.POINTS[move[0]]
+	else:
+		lead_wins = tables.LEAD_WINS[trump][led]
+
+		def order(move):
+			cost = tables.POINTS[move[0]] + (10 if tables.SUIT[move[0]] == trump else 0)
+			return cost + 100 if lead_wins[move[0]] else cost
+
+	moves.sort(key=order)
+
+	if first in moves:
+		moves.remove(first)
+		moves.insert(0, first)
+
+	return moves
+
+def cards_left(state):
+	"""
+	:param state: A state
+	:return: The number of cards in the hands of both players
+	"""
+	deck = state.get_deck()
+	return bin(deck.get_player_hand_mask(1) | deck.get_player_hand_mask(2)).count("1")
+
+# The solver of shared_solver, one per process
+_shared = None
+
+def shared_solver():
+	"""
+	:return: The solver of this process, made on first use. Searches that cannot hand a solver to
+		their worker processes use this one, so that it is kept between the tasks of a worker.
+	"""
+	global _shared
+	if _shared is None:
+		_shared = Solver()
+	return _shared
+
+def playout(state, solver, rng=None, policy=None, cards=10):
+	"""
+	Plays the game out from a state, as State.rollout does, but stops as soon as the outcome can
+	be told: once the stock is empty and at most the given number of cards are left in the hands,
+	the solver gives the outcome of perfect play by both players. Before that the outcome is
+	never decided, as whoever takes the last trick of phase 2 wins.
+
+	:param state: A perfect information state
+	:param solver: The Solver to solve the endgame with
+	:param rng: The random number generator of the rollout, see State.rollout
+	:param policy: The rollout policy, see State.rollout
+	:param cards: The number of cards left from which on the endgame is solved, 10 solves all of phase 2
+	:return: A (winner, points) tuple, as State.winner
+	"""
+	end = state.rollout(rng, policy, stop=lambda state: state.get_phase() == 2 and cards_left(state) <= cards)
+	if end.finished():
+		return end.winner()
+
+	value = solver.value(end)
+	return (1, value) if value > 0 else (2, -value)
@@ -1,9 +1,9 @@
 """
 This file contains functions to regulate game play.
 """
-from api import State, Deck, util
-from multiprocessing import Process, Manager
-import random
+from api import State, Deck, util, tables
+from multiprocessing import Process, Manager, Pipe
+import random, traceback, time, inspect
 
 def play(
             player1,            # type: Bot
@@ -11,14 +11,44 @@ def play(
             state,              # type: State
             max_time=5000,      # type: int
             verbose=True,       # type: bool
-            fast=False          # type: bool
+            fast=False,         # type: bool
+            persistent=False    # type: bool
         ):
     """
     Play a game between two given players, from the given starting state.
+
+    Unless fast is set, every move is computed in a separate process that is killed if it
+    exceeds max_time. By default a new process is started for every move. With persistent
+    set, each player instead gets one worker process that lives for the whole game, and
+    is only restarted when it has to be killed. In both cases, bots whose get_move accepts a
+    time_budget argument are told how many seconds they have left for the move.
+
+    Bots that run in this process (fast) or in a worker process (persistent) are started with
+    start_player before their first move. The worker processes close their copies of the bots
+    when the game ends; bots in this process are left running, for the caller to close with
+    close_player once it is done with them.
     """
     pr('player1: {}'.format(player1), verbose)
     pr('player2: {}'.format(player2), verbose)
 
+    workers = {}
+    if persistent and not fast:
+        workers = {1: PlayerProcess(player1), 2: PlayerProcess(player2)}
+    elif fast:
+        start_player(player1)
+        start_player(player2)
+
+    try:
+        return game_loop(player1, player2, state, max_time, verbose, fast, workers)
+    finally:
+        for worker in workers.values():
+            worker.close()
+
+def game_loop(player1, player2, state, max_time, verbose, fast, workers):
+    """
+    The game loop of play(). Moves of a player with an entry in workers are computed by that worker process.
+    """
+
     # The game loop
     while not state.finished():
 
@@ -27,10 +57,18 @@ def play(
         # We introduce a state signature which essentially obscures the deck's perfect knowledge from the player
         given_state = state.clone(signature=state.whose_turn()) if state.get_phase() == 1 else state.clone()
 
-        move = player.get_move(given_state) if fast else get_move(given_state, player, max_time, verbose)
+        if fast:
+            move = player.get_move(given_state)
+        elif state.whose_turn() in workers:
+            move = workers[state.whose_turn()].get_move(given_state, max_time, verbose)
+        else:
+            move = get_move(given_state, player, max_time, verbose)
 
         if is_valid(move, player): # check for common mistakes
 
+            # Bots may give the code of their move instead of the move tuple
+            if type(move) is int:
+                move = tables.to_move(move)
 
             if move[0] is None:
                 pr('*   Player {} performs a trump jack exchange'.format(state.whose_turn()), verbose)
@@ -72,7 +110,8 @@ def get_move(state, player, max_time, verbose):
     # We also give it the state of the global PRNG to ensure execution is deterministic whenever no timeouts happen
     #we make a call to random to ensure that next invocations of get_move will give start with a different state of the rng
     random.random()
-    process = Process(target=call_player, args=(player, state, random.getstate(),  result))
+    deadline = time.time() + max_time / 1000
+    process = Process(target=call_player, args=(player, state, random.getstate(),  result, deadline))
 
     # Start the process
     process.start()
@@ -96,15 +135,147 @@ def get_move(state, player, max_time, verbose):
 
     return move
 
-def call_player(player, state, randomState, result):
+def call_player(player, state, randomState, result, deadline=None):
     random.setstate(randomState)
     # Call the player to make the move
-    move = player.get_move(state)
+    move = ask_player(player, state, deadline)
     # Put the move in the shared variable, so it can be read by the
     # engine process
     result['move'] = move
 
 
+class PlayerProcess:
+    """
+    Keeps a player bot in a long-lived worker process, which computes its moves for as long as
+    the game lasts. States and moves are passed over a pipe. This enforces the same time limit as
+    get_move, without paying the cost of starting a new process for every move.
+    """
+
+    def __init__(self, player):
+        self.__player = player
+        self.__start()
+
+    def __start(self):
+        self.__connection, child_connection = Pipe()
+        self.__process = Process(target=serve_player, args=(self.__player, child_connection))
+
+        # Not a daemon, as daemons can not start processes of their own, which bots with a parallel
+        # search need to do. play() always closes the worker, so it does not keep the engine from exiting.
+        self.__process.start()
+
+        # The worker reports when the bot has started, before the time of its first move runs
+        try:
+            self.__connection.recv()
+        except EOFError:
+            pass
+
+    def get_move(self, state, max_time, verbose):
+        """
+        Asks the player in the worker process for a move. If it does not answer within
+        max_time milliseconds, the worker is killed and replaced by a fresh one, and "Late"
+        is returned.
+        """
+
+        # As in get_move, the worker gets the state of the global PRNG so that execution is deterministic
+        random.random()
+        deadline = time.time() + max_time / 1000
+        self.__connection.send((state, random.getstate(), deadline))
+
+        if self.__connection.poll(max_time / 1000):
+            try:
+                return self.__connection.recv()
+            except EOFError:
+                # The worker died while computing the move
+                self.__restart()
+                return None
+
+        pr('!   Player {} took too long, game revoked.'.format(state.whose_turn()), verbose)
+
+        self.__restart()
+        return "Late"
+
+    def __restart(self):
+        self.__process.terminate()
+        self.__process.join()
+        self.__connection.close()
+        self.__start()
+
+    def close(self):
+        """
+        Stops the worker process.
+        """
+        try:
+            self.__connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+
+        self.__process.join(1)
+        if self.__process.is_alive():
+            self.__process.terminate()
+            self.__process.join()
+
+        self.__connection.close()
+
+def serve_player(player, connection):
+    """
+    Worker loop of PlayerProcess: starts the player, then answers every (state, random state,
+    deadline) request with the player's move, until it receives None. Then it closes the player.
+    """
+    try:
+        start_player(player)
+    except Exception:
+        traceback.print_exc()
+    connection.send("Ready")
+
+    for request in iter(connection.recv, None):
+        state, randomState, deadline = request
+        random.setstate(randomState)
+
+        try:
+            move = ask_player(player, state, deadline)
+        except Exception:
+            # An invalid move makes the engine revoke the game, as when the bot crashes in get_move
+            traceback.print_exc()
+            move = None
+
+        connection.send(move)
+
+    close_player(player)
+
+def ask_player(player, state, deadline=None):
+    """
+    Asks a player bot for a move. Bots whose get_move accepts a time_budget argument are
+    told how many seconds are left until the deadline, so they can use the time they have.
+
+    :param deadline: The time (as given by time.time()) at which the move is due, or None if there is no time limit
+    """
+    if deadline is not None and accepts_time_budget(player):
+        return player.get_move(state, time_budget=max(0.0, deadline - time.time()))
+
+    return player.get_move(state)
+
+def start_player(player):
+    """
+    Lets a player bot prepare for its moves, outside the time it has for them: calls its start
+    method, if it has one. Bots with a parallel search start their worker processes there.
+    """
+    if hasattr(player, 'start'):
+        player.start()
+
+def close_player(player):
+    """
+    Calls the close method of a player bot, if it has one, so that it can stop the processes it
+    started. Whoever made the bot calls this when it is done with it.
+    """
+    if hasattr(player, 'close'):
+        player.close()
+
+def accepts_time_budget(player):
+    """
+    :return: Whether the get_move method of the given player takes a time_budget argument
+    """
+    return 'time_budget' in inspect.signature(player.get_move).parameters
+
 def pr(string, verbose):
     """
     Print the given message if verbose is true, otherwise ignore.
@@ -121,6 +292,7 @@ def is_valid(
         player):
     """
     Check a move for common mistakes, and throw a (hopefully) helpful error message if incorrect.
+    A move is either a tuple or a move code (see api.tables).
 
     :param move:
     :param player:
@@ -129,6 +301,12 @@ def is_valid(
     if move == "Late":
         return False
 
+    if type(move) is int:
+        if not 0 <= move < len(tables.MOVES):
+            print('Bot {} returned a move code {} that was not between 0 and {}.'.format(player, move, len(tables.MOVES) - 1))
+            return False
+        return True
+
     if not type(move) is tuple:
         print('Bot {} returned a move {} that was not a pair (i.e. (2,3))'.format(player, move))
         return False
@@ -0,0 +1,135 @@
+"""
+Functions to play many games in parallel, spread over a pool of worker processes.
+"""
+
+from api import State, util, engine
+from multiprocessing import Process, Queue
+from queue import Empty
+import random, traceback
+
+def play_games(
+            botnames,           # type: list[str]
+            games,              # type: list[tuple]
+            workers=1,          # type: int
+            max_time=5000,      # type: int
+            verbose=False,      # type: bool
+            fast=False,         # type: bool
+            persistent=False    # type: bool
+        ):
+    """
+    Play the given games, spread over a pool of worker processes. Every worker loads the bots
+    once, and then plays the games it takes from a shared queue, sending back each result as
+    soon as the game is finished.
+
+    Each game seeds the global PRNG itself before it starts, so the outcome of a game does not
+    depend on which worker plays it, or on the games played before it. This makes the results
+    identical to those of a serial run (workers=1) of the same games.
+
+    :param botnames: List of bot names, as accepted by util.load_player
+    :param games: List of games to play. A game is a tuple (players, state_id, seed, phase), where
+        players holds the indices in botnames of player 1 and player 2, state_id is the seed
+        given to State.generate, seed is the seed of the global PRNG during the game, and phase
+        is the phase the game starts at.
+    :param workers: The number of worker processes. If 1, the games are played in this process.
+    :param persistent: Whether the engine keeps every bot in one worker process per game, see engine.play
+    :return: A generator yielding a (winner, score) tuple for each game, in the order of the
+        given games. The winner is an index into botnames, or None if nobody won.
+    """
+
+    if workers <= 1:
+        bots = [util.load_player(botname) for botname in botnames]
+
+        try:
+            for game in games:
+                yield play_game(bots, game, max_time, verbose, fast, persistent)
+        finally:
+            close_bots(bots)
+
+        return
+
+    tasks = Queue()
+    results = Queue()
+
+    for index, game in enumerate(games):
+        tasks.put((index, game))
+
+    # One stop signal for every worker
+    for w in range(workers):
+        tasks.put(None)
+
+    processes = [Process(target=worker, args=(botnames, tasks, results, max_time, verbose, fast, persistent)) for w in range(workers)]
+
+    for process in processes:
+        process.start()
+
+    # Results arrive in the order in which games finish, we hold on
+    # to them until all games before them have been yielded
+    finished = {}
+    next_index = 0
+
+    try:
+        while next_index < len(games):
+            try:
+                index, result, error = results.get(timeout=1)
+            except Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError('All tournament workers stopped before the games were finished.')
+                continue
+
+            if error is not None:
+                raise RuntimeError('Game {} failed in a tournament worker:\n{}'.format(index, error))
+
+            finished[index] = result
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+def worker(botnames, tasks, results, max_time, verbose, fast, persistent):
+    """
+    Worker process loop: loads the bots, then plays games from the task queue until it
+    receives None, putting an (index, result, error) tuple on the result queue for each game.
+    """
+    bots = [util.load_player(botname) for botname in botnames]
+
+    try:
+        for index, game in iter(tasks.get, None):
+            try:
+                results.put((index, play_game(bots, game, max_time, verbose, fast, persistent), None))
+            except Exception:
+                results.put((index, None, traceback.format_exc()))
+    finally:
+        close_bots(bots)
+
+def close_bots(bots):
+    """
+    Closes the bots of a tournament once all games are played, see engine.close_player
+    """
+    for bot in bots:
+        engine.close_player(bot)
+
+def play_game(bots, game, max_time=5000, verbose=False, fast=False, persistent=False):
+    """
+    Play a single game, as described in play_games.
+
+    :param bots: List of bot instances
+    :param game: A tuple (players, state_id, seed, phase)
+    :return: A tuple (winner, score), with the winner given as an index into bots, or None
+    """
+    players, state_id, seed, phase = game
+
+    random.seed(seed)
+    state = State.generate(id=state_id, phase=phase)
+
+    winner, score = engine.play(bots[players[0]], bots[players[1]], state, max_time, verbose=verbose, fast=fast, persistent=persistent)
+
+    if winner is not None:
+        winner = players[winner - 1]
+
+    return winner, score
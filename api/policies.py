@@ -0,0 +1,98 @@
+"""
+Rollout policies for State.rollout. A policy is a function policy(state, moves, rng) that returns
+the move to play out of the given list of legal moves, drawing any randomness it needs from rng.
+Uniform playouts are noisy, the heuristic ones below play closer to how a game would go, at a
+small cost per move: they only look at the card led and the trump suit, through the tables.
+
+POLICIES maps the names the bots accept to the policies. All of them can be pickled, so they can
+be handed to worker processes.
+"""
+
+from api import tables
+
+def uniform(state, moves, rng):
+	"""
+	Plays a random move, as State.rollout does without a policy
+	"""
+	return rng.choice(moves)
+
+def bully(state, moves, rng):
+	"""
+	The rules of the bully bot: play a trump if we have one, else follow the suit that was led,
+	else play the card of the highest rank. Ties are broken at random.
+	"""
+	trump = tables.SUIT_INDEX[state.get_trump_suit()]
+	suit = tables.SUIT
+
+	trumps = [move for move in moves if move[0] is not None and suit[move[0]] == trump]
+	if len(trumps) > 0:
+		return rng.choice(trumps)
+
+	led = state.get_opponents_played_card()
+	if led is not None:
+		same_suit = [move for move in moves if suit[move[0]] == suit[led]]
+		if len(same_suit) > 0:
+			return rng.choice(same_suit)
+
+	# Within a suit, higher ranks have lower indices
+	return min((move for move in moves if move[0] is not None), key=lambda move: move[0] % 5)
+
+def _follow_cost(trump, led, card):
+	cost = tables.POINTS[card] + (10 if tables.SUIT[card] == trump else 0)
+	return cost + 100 if tables.LEAD_WINS[trump][led][card] else cost
+
+# _FOLLOW_COST[trump][led][card] orders the cards to follow with: the cheapest card that wins the
+# trick first, spending a trump only when it has to, then the cheapest cards that lose it
+_FOLLOW_COST = [[[_follow_cost(trump, led, card) for card in range(20)] for led in range(20)] for trump in range(4)]
+
+def cheap_win(state, moves, rng):
+	"""
+	Follows with the cheapest card that wins the trick, or the cheapest card if none does. Leads at random.
+	"""
+	led = state.get_opponents_played_card()
+	if led is None:
+		return rng.choice(moves)
+
+	cost = _FOLLOW_COST[tables.SUIT_INDEX[state.get_trump_suit()]][led]
+	return min(moves, key=lambda move: cost[move[0]])
+
+def meld(state, moves, rng):
+	"""
+	Melds a marriage whenever we can, else plays at random
+	"""
+	marriages = [move for move in moves if move[1] is not None and move[0] is not None]
+	return rng.choice(marriages if len(marriages) > 0 else moves)
+
+def greedy(state, moves, rng):
+	"""
+	Melds a marriage whenever we can, and follows with the cheapest card that wins the trick
+	"""
+	if state.get_opponents_played_card() is not None:
+		return cheap_win(state, moves, rng)
+	return meld(state, moves, rng)
+
+class EpsilonGreedy:
+	"""
+	Plays a random move with probability epsilon, and the move of another policy otherwise
+	"""
+
+	def __init__(self, policy, epsilon=0.2):
+		"""
+		:param callable policy: the policy to follow
+		:param float epsilon: the probability of a random move
+		"""
+		self.policy = policy
+		self.epsilon = epsilon
+
+	def __call__(self, state, moves, rng):
+		if rng.random() < self.epsilon:
+			return rng.choice(moves)
+		return self.policy(state, moves, rng)
+
+POLICIES = {
+	"random": uniform,
+	"bully": bully,
+	"cheap-win": cheap_win,
+	"meld": meld,
+	"epsilon-greedy": EpsilonGreedy(greedy)
+}
@@ -0,0 +1,89 @@
+"""
+Lookup tables for the rules of the game, computed once when the module is loaded: the suit and
+points of every card, who wins a trick, how many points a trick is worth, and which cards the
+follower may play in phase 2. The State and the bots read these in their inner loops instead of
+working the rules out every time.
+
+Cards are the indices of the Deck. Suits are numbered in the order of SUITS, the trump suit of
+a state is SUIT_INDEX[state.get_trump_suit()].
+"""
+
+SUITS = ["C", "D", "H", "S"]
+SUIT_INDEX = {suit: index for index, suit in enumerate(SUITS)}
+
+# Points per card rank, in index order (A, 10, K, Q, J)
+_RANK_POINTS = [11, 10, 4, 3, 2]
+
+# For every card: its suit and its points
+SUIT = [card // 5 for card in range(20)]
+POINTS = [_RANK_POINTS[card % 5] for card in range(20)]
+
+# For every suit: the bitmask of its five cards
+SUIT_MASK = [31 << (5 * suit) for suit in range(4)]
+
+# TRICK_POINTS[lead][follow] holds the points the winner of a trick with these cards gets
+TRICK_POINTS = [[POINTS[lead] + POINTS[follow] for follow in range(20)] for lead in range(20)]
+
+def _lead_wins(lead, follow, trump):
+	if SUIT[lead] == SUIT[follow]:
+		# Within a suit, higher rank cards have lower indices
+		return lead < follow
+
+	return SUIT[follow] != trump
+
+# LEAD_WINS[trump][lead][follow] holds whether the card that was led wins the trick
+LEAD_WINS = [[[_lead_wins(lead, follow, trump) for follow in range(20)] for lead in range(20)] for trump in range(4)]
+
+def _follow_suit(lead, cards):
+	higher = cards & ((1 << (lead % 5)) - 1)
+	return (higher if higher != 0 else cards) << (5 * SUIT[lead])
+
+# For every card that is led, and every set of cards of its suit (the 5 bits of the suit in a hand
+# mask): the cards among them that may be played to follow, the higher ones if there are any
+_FOLLOW_SUIT = [[_follow_suit(lead, cards) for cards in range(32)] for lead in range(20)]
+
+def legal_follow(hand, lead, trump):
+	"""
+	The legal follow mask for a hand. A table indexed by whole hand masks would have a million rows
+	per card led, so the suit of the lead is looked up in a table of its 5 bits, and the trumps
+	only matter when the hand holds none of it.
+
+	:param hand: The bitmask of the follower's hand
+	:param lead: The card that was led
+	:param trump: The index of the trump suit
+	:return: The bitmask of the cards in hand the follower may play in phase 2
+	"""
+	playable = _FOLLOW_SUIT[lead][hand >> (5 * SUIT[lead]) & 31]
+	if playable != 0:
+		return playable
+
+	# Without cards of the suit led the follower must trump, if they can. When trump was led, the hand has none.
+	trumps = hand & SUIT_MASK[trump]
+	return trumps if trumps != 0 else hand
+
+# Every move as a code between 0 and 31: 0-19 play the card with that index, 20 + 2s plays the
+# King of suit s and melds the Queen, 21 + 2s plays the Queen and melds the King, 28 + s exchanges
+# the trump jack of suit s. MOVES maps the codes to move tuples, CODES the move tuples to codes.
+MOVES = ([(card, None) for card in range(20)]
+		 + [move for king in range(2, 20, 5) for move in ((king, king + 1), (king + 1, king))]
+		 + [(None, jack) for jack in range(4, 20, 5)])
+
+CODES = {move: code for code, move in enumerate(MOVES)}
+
+def to_move(code):
+	"""
+	Converts a move code to the move tuple that State expects.
+
+	:param code: An integer move code between 0 and 31
+	:return: A move tuple, e.g. (12, None), (12, 13) or (None, 14)
+	"""
+	return MOVES[code]
+
+def to_code(move):
+	"""
+	Converts a move tuple to its move code.
+
+	:param move: A move tuple, e.g. (12, None), (12, 13) or (None, 14)
+	:return: An integer move code between 0 and 31, or None if the tuple is not a move
+	"""
+	return CODES.get(move)
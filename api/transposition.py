@@ -0,0 +1,150 @@
+"""
+Zobrist hashing of game states, and a transposition table in which the search bots keep the
+results of the positions they have searched.
+
+Different orders of play often lead to the same position, with the same card layout and the same
+scores. A position's Zobrist key is the XOR of a random 64 bit number for every feature of the
+position: the location of every card, the order of the stock, the cards in the trick, the points
+and pending points of both players and the player to move. Equal positions have equal keys, and
+different positions have equal keys with negligible probability.
+"""
+
+import random
+
+# Bound types of the values in the table
+EXACT = 0
+LOWER = 1 # The value is at least the stored value
+UPPER = 2 # The value is at most the stored value
+
+# The keys are drawn once, from a fixed seed, so that they are the same in every process
+_rng = random.Random(0x5eed)
+
+def _draw_keys(n):
+	return [_rng.getrandbits(64) for i in range(n)]
+
+def _mask_keys(card_keys):
+	# For every possible 10 bit half of a card mask, the XOR of the keys of the cards in it
+	table = [0] * 1024
+	for mask in range(1, 1024):
+		lowest = (mask & -mask).bit_length() - 1
+		table[mask] = table[mask & (mask - 1)] ^ card_keys[lowest]
+	return table
+
+# For every card location (stock, hands, piles of won cards): lookup tables for both halves of its mask
+_LOCATION_KEYS = []
+for location in range(5):
+	card_keys = _draw_keys(20)
+	_LOCATION_KEYS.append((_mask_keys(card_keys[:10]), _mask_keys(card_keys[10:])))
+
+_STOCK_KEYS = [_draw_keys(20) for position in range(10)]
+_TRICK_KEYS = [_draw_keys(20) for player in range(2)]
+
+# Points are capped at 255, which no game reaches
+_POINTS_KEYS = [_draw_keys(256) for player in range(2)]
+_PENDING_KEYS = [_draw_keys(256) for player in range(2)]
+
+_PLAYER1S_TURN_KEY = _draw_keys(1)[0]
+_LEADS_TURN_KEY = _draw_keys(1)[0]
+
+def key(state):
+	"""
+	:param state: A perfect information state
+	:return: The Zobrist key of the state, an int of 64 bits
+	"""
+	card_masks, p1_masks, p2_masks, stock, trick, previous_trick = state.get_deck().snapshot()
+
+	h = 0
+
+	for location in range(5):
+		low, high = _LOCATION_KEYS[location]
+		h ^= low[card_masks[location] & 1023] ^ high[card_masks[location] >> 10]
+
+	# The order of the stock decides who draws which card
+	for position, card in enumerate(stock):
+		h ^= _STOCK_KEYS[position][card]
+
+	for player in range(2):
+		if trick[player] is not None:
+			h ^= _TRICK_KEYS[player][trick[player]]
+
+		h ^= _POINTS_KEYS[player][min(state.get_points(player + 1), 255)]
+		h ^= _PENDING_KEYS[player][min(state.get_pending_points(player + 1), 255)]
+
+	if state.whose_turn() == 1:
+		h ^= _PLAYER1S_TURN_KEY
+
+	if state.leader() == state.whose_turn():
+		h ^= _LEADS_TURN_KEY
+
+	return h
+
+def bound(value, alpha, beta):
+	"""
+	:param value: The value an alpha-beta search found for a position
+	:param alpha: The alpha the position was searched with
+	:param beta: The beta the position was searched with
+	:return: The bound type of the value
+	"""
+	if value <= alpha:
+		return UPPER
+	if value >= beta:
+		return LOWER
+	return EXACT
+
+class TranspositionTable:
+	"""
+	A table of fixed size that holds, for searched positions, the value found, its bound type, the
+	depth it was searched to and the best move. Each key maps to one slot. When two positions
+	compete for a slot, the one searched deeper is kept, but results from before the last call
+	to new_search() are always replaced. The table is meant to be kept for as long as the bot,
+	so that later searches (and later iterations of a search) profit from the earlier ones.
+	"""
+
+	def __init__(self,
+				 size=65536		# type: int
+				 ):
+		"""
+		:param size: The number of slots
+		"""
+		self.__size = size
+		self.__keys = [None] * size
+		self.__entries = [None] * size
+		self.__generation = 0
+
+	def new_search(self):
+		"""
+		Marks the results stored so far as old, so that they make way for the results of a new search.
+		"""
+		self.__generation += 1
+
+	def lookup(self, key):
+		"""
+		:param key: The Zobrist key of the position
+		:return: A tuple (value, bound, depth, move) for the position, or None if the table does not hold it
+		"""
+		slot = key % self.__size
+
+		if self.__keys[slot] != key:
+			return None
+
+		return self.__entries[slot][:4]
+
+	def store(self, key, value, bound, depth, move):
+		"""
+		Stores the result of a search of a position, unless its slot holds a deeper result of the current search.
+
+		:param key: The Zobrist key of the position
+		:param value: The value found
+		:param bound: EXACT, LOWER or UPPER
+		:param depth: The depth the position was searched to
+		:param move: The best move found, None if there is none
+		"""
+		slot = key % self.__size
+		entry = self.__entries[slot]
+
+		if entry is None or self.__keys[slot] == key or entry[4] != self.__generation or depth >= entry[2]:
+			self.__keys[slot] = key
+			self.__entries[slot] = (value, bound, depth, move, self.__generation)
+
+	def __len__(self):
+		return self.__size - self.__keys.count(None)
@@ -0,0 +1,57 @@
+"""
+The pool of worker processes of a bot with a parallel search. A multiprocessing pool only works in
+the process that started it, while the engine may run a bot in another process than the one that
+made it (see engine.play). A WorkerPool starts its pool in the process that uses it, and leaves it
+out when the bot is sent to another process.
+
+The engine calls the start() and close() methods of a bot, if it has them, outside the time it
+gives the bot for its moves (see engine.start_player and engine.close_player). A bot with a
+WorkerPool passes them on, so that starting the worker processes does not count against the
+budget of its first move, and the processes do not outlive the games.
+"""
+
+from multiprocessing import Pool
+import os
+
+class WorkerPool:
+
+	def __init__(self,
+				 workers	# type: int
+				 ):
+		"""
+		:param workers: The number of worker processes
+		"""
+		self.__workers = workers
+		self.__pool = None
+		self.__owner = None
+
+	def start(self):
+		"""
+		Starts the worker processes, unless they run for this process already
+		"""
+		if self.__pool is None or self.__owner != os.getpid():
+			self.__pool = Pool(self.__workers)
+			self.__owner = os.getpid()
+
+	def get(self):
+		"""
+		:return: The multiprocessing.Pool of this process, started now if it was not yet
+		"""
+		self.start()
+		return self.__pool
+
+	def close(self):
+		"""
+		Stops the worker processes, after the tasks given to them are done. A pool that was
+		started in another process is left to that process.
+		"""
+		if self.__pool is not None and self.__owner == os.getpid():
+			self.__pool.close()
+			self.__pool.join()
+
+		self.__pool = None
+		self.__owner = None
+
+	def __getstate__(self):
+		# Pools can not be sent to other processes
+		return {"_WorkerPool__workers": self.__workers, "_WorkerPool__pool": None, "_WorkerPool__owner": None}
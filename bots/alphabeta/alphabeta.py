@@ -1,43 +1,151 @@
 #!/usr/bin/env python
 """
-
-
+Alpha-beta search. By default the bot deepens its search iteratively, one trick at a time, until
+it reaches its depth or, when get_move is given a time budget, until the time is up. The moves
+are searched in order of how likely they are to cause a cutoff: the principal variation of the
+previous iteration first, then the best move in the transposition table, the moves that score
+well by themselves (see static_score), the killer moves and the rest by the history heuristic.
 """
 
-from api import State, util
-import random
+from api import State, util, tables, transposition
+import random, time
+
+# Static scores from this one up are given to marriages, trump exchanges and
+# tricks won, which are tried before the killer moves
+_TACTICAL = 20
 
 class Bot:
 
     __max_depth = -1
     __randomize = True
 
-    def __init__(self, randomize=True, depth=8):
+    # Whether to search with iterative deepening and move ordering, or to search
+    # the moves in random order to the full depth at once
+    __ordering = True
+    __time_fraction = 0.8
+
+    # The depth of the current iteration of the search
+    __depth_limit = -1
+    __deadline = None
+
+    def __init__(self, randomize=True, depth=8, ordering=True, time_fraction=0.8):
+        """
+        :param randomize: Whether to select randomly from moves of equal value (or to select the first always)
+        :param depth: The depth to search to. When get_move is given a time budget, the search goes deeper
+            for as long as the budget allows.
+        :param ordering: Whether to deepen iteratively and order the moves
+        :param time_fraction: The part of the time budget to use for the search
+        """
         self.__randomize = randomize
         self.__max_depth = depth
+        self.__depth_limit = depth
+        self.__ordering = ordering
+        self.__time_fraction = time_fraction
+
+        # Kept for the whole game, positions often come back in the searches of later moves
+        self.__table = transposition.TranspositionTable()
+
+        # The principal variation of the previous iteration, and for every depth the
+        # last two moves that caused a cutoff there
+        self.__pv = []
+        self.__killers = {}
+
+        # For every player and move, how much cutoffs it caused, weighted by the depth searched below them
+        self.__history = {}
+
+        # The number of positions searched by the last call to get_move
+        self.nodes = 0
+
+    def get_move(self, state, time_budget=None):
+        self.__table.new_search()
+        self.nodes = 0
+
+        # The search plays moves on the state in place, so we work on a copy of it
+        state = state.clone()
+
+        if not self.__ordering:
+            self.__depth_limit = self.__max_depth
+            val, move = self.value(state)
+            return move
+
+        # No game lasts longer than the cards left to play, plus one trump exchange
+        plies_left = state.get_stock_size() + 11
 
-    def get_move(self, state):
-        val, move = self.value(state)
+        if time_budget is None:
+            max_depth, deadline = min(self.__max_depth, plies_left), None
+        else:
+            max_depth, deadline = plies_left, time.time() + time_budget * self.__time_fraction
+
+        self.__pv = []
+        self.__killers = {}
+        self.__history = {}
+
+        # Every iteration starts from the results of the one before it: the table
+        # and the principal variation put the best moves found so far first.
+        # Each iteration searches one trick deeper, so that the heuristic is
+        # always applied at the same point of a trick.
+        move = None
+        for depth in range(2 - max_depth % 2, max_depth + 1, 2):
+            self.__depth_limit = depth
+
+            # The first iteration always finishes, so that there is a move to play
+            self.__deadline = deadline if depth > 2 else None
+
+            try:
+                val, move = self.value(state, on_pv=True)
+            except _OutOfTime:
+                break
+
+            self.__pv = self.__principal_variation(state)
+
+        self.__deadline = None
+        self.__depth_limit = self.__max_depth
 
         return move
 
-    def value(self, state, alpha=float('-inf'), beta=float('inf'), depth = 0):
+    def value(self, state, alpha=float('-inf'), beta=float('inf'), depth = 0, on_pv=False):
         """
         Return the value of this state and the associated move
         :param State state:
         :param float alpha: The highest score that the maximizing player can guarantee given current knowledge
         :param float beta: The lowest score that the minimizing player can guarantee given current knowledge
         :param int depth: How deep we are in the tree
+        :param bool on_pv: Whether the moves to this state are the principal variation of the previous iteration
         :return val, move: the value of the state, and the best move.
         """
+        self.nodes += 1
+
+        if self.__deadline is not None and self.nodes % 1024 == 0 and time.time() > self.__deadline:
+            raise _OutOfTime()
 
         if state.finished():
             winner, points = state.winner()
             return (points, None) if winner == 1 else (-points, None)
 
-        if depth == self.__max_depth:
+        if depth == self.__depth_limit:
             return heuristic(state)
 
+        # The table holds results of searches to a given depth below the position
+        remaining = self.__depth_limit - depth
+        key = transposition.key(state)
+        entry = self.__table.lookup(key)
+        table_move = None
+
+        if entry is not None:
+            entry_value, bound, entry_depth, table_move = entry
+
+            if entry_depth >= remaining:
+                if bound == transposition.EXACT:
+                    return entry_value, table_move
+                if bound == transposition.LOWER:
+                    alpha = max(alpha, entry_value)
+                if bound == transposition.UPPER:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value, table_move
+
+        original_alpha, original_beta = alpha, beta
+
         best_value = float('-inf') if maximizing(state) else float('inf')
         best_move = None
 
@@ -46,10 +154,22 @@ class Bot:
         if self.__randomize:
             random.shuffle(moves)
 
+        pv_move = self.__pv[depth] if on_pv and depth < len(self.__pv) else None
+
+        if self.__ordering:
+            moves = self.__order(state, moves, depth, pv_move, table_move)
+
+        # The best move found before is the most likely to cause a cutoff
+        elif table_move in moves:
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+
         for move in moves:
 
-            next_state = state.next(move)
-            value, _ = self.value(next_state, alpha, beta, depth + 1)
+            # Play the move in place, and take it back once its subtree has been searched
+            state.apply(move)
+            value, _ = self.value(state, alpha, beta, depth + 1, on_pv and move == pv_move)
+            state.undo()
 
             if maximizing(state):
                 if value > best_value:
@@ -65,10 +185,107 @@ class Bot:
             # Prune the search tree
             # We know this state will never be chosen, so we stop evaluating its children
             if alpha >= beta:
+                if self.__ordering:
+                    self.__cutoff(state, move, depth, remaining)
                 break
 
+        self.__table.store(key, best_value, transposition.bound(best_value, original_alpha, original_beta), remaining, best_move)
+
         return best_value, best_move
 
+    # Sorts the moves: the principal variation first, then the best move in the table, the
+    # marriages, exchanges and tricks won, the killer moves, and the rest by their history
+    def __order(self, state, moves, depth, pv_move, table_move):
+        if len(moves) < 2:
+            return moves
+
+        killers = self.__killers.get(depth, ())
+        player = state.whose_turn()
+        history = self.__history
+
+        # What static_score looks at, once for all the moves
+        trump = tables.SUIT_INDEX[state.get_trump_suit()]
+        led = state.get_opponents_played_card()
+
+        def order(move):
+            if move == pv_move:
+                return 4, 0, 0
+            if move == table_move:
+                return 3, 0, 0
+
+            static = _static_score(trump, led, move)
+            if static >= _TACTICAL:
+                return 2, static, 0
+            if move in killers:
+                return 1, 0, 0
+            return 0, history.get((player, move), 0), static
+
+        # The sort is stable, so moves of equal order stay in random order
+        return sorted(moves, key=order, reverse=True)
+
+    # Remembers a move that caused a cutoff, as it is likely to cause one in similar positions
+    def __cutoff(self, state, move, depth, remaining):
+        history_key = (state.whose_turn(), move)
+        self.__history[history_key] = self.__history.get(history_key, 0) + remaining * remaining
+
+        if static_score(state, move) >= _TACTICAL:
+            return
+
+        killers = self.__killers.get(depth, [])
+        if move not in killers:
+            self.__killers[depth] = [move] + killers[:1]
+
+    # The line of best moves from the state, as far as the table holds it
+    def __principal_variation(self, state):
+        pv = []
+
+        while len(pv) < self.__depth_limit and not state.finished():
+            entry = self.__table.lookup(transposition.key(state))
+            if entry is None or entry[3] not in state.moves():
+                break
+
+            pv.append(entry[3])
+            state.apply(entry[3])
+
+        for move in pv:
+            state.undo()
+
+        return pv
+
+class _OutOfTime(Exception):
+    pass
+
+def static_score(state, move):
+    # type: (State, tuple[int, int]) -> int
+    """
+    Scores a move by looking at the move alone: marriages (royal ones the highest) and trump exchanges
+    first, then the tricks won, those that capture the most points first, and trumping over winning
+    in suit. The leader's other moves score the points of the card, the follower's the points not
+    thrown away.
+
+    :param state:
+    :param move:
+    :return: The score of the move, higher for moves that are more likely to be good
+    """
+    return _static_score(tables.SUIT_INDEX[state.get_trump_suit()], state.get_opponents_played_card(), move)
+
+def _static_score(trump, led, move):
+    card, partner = move
+
+    if card is None:
+        return _TACTICAL + 25
+    if partner is not None:
+        return _TACTICAL + 40 if tables.SUIT[partner] == trump else _TACTICAL + 30
+
+    if led is None:
+        return -tables.POINTS[card]
+
+    if not tables.LEAD_WINS[trump][led][card]:
+        trumped = tables.SUIT[card] == trump and tables.SUIT[led] != trump
+        return _TACTICAL + 2 * tables.POINTS[led] - tables.POINTS[card] + (2 if trumped else 0)
+
+    return _TACTICAL - 1 - tables.POINTS[card]
+
 def maximizing(state):
     # type: (State) -> bool
     """
@@ -87,4 +304,4 @@ def heuristic(state):
     :param state:
     :return: A heuristic evaluation for the given state (between -1.0 and 1.0)
     """
-    return util.ratio_points(state, 1) * 2.0 - 1.0, None
\ No newline at end of file
+    return util.ratio_points(state, 1) * 2.0 - 1.0, None
@@ -5,7 +5,7 @@ uniformly at random.
 
 # Import the API objects
 from api import State
-from api import Deck
+from api import tables
 
 
 class Bot:
@@ -31,11 +31,12 @@ class Bot:
 		chosen_move = moves[0]
 
 		moves_trump_suit = []
+		trump = tables.SUIT_INDEX[state.get_trump_suit()]
 
 		#Get all trump suit moves available
 		for index, move in enumerate(moves):
 
-			if move[0] is not None and Deck.get_suit(move[0]) == state.get_trump_suit():
+			if move[0] is not None and tables.SUIT[move[0]] == trump:
 				moves_trump_suit.append(move)
 
 		if len(moves_trump_suit) > 0:
@@ -49,7 +50,7 @@ class Bot:
 
 			# Get all moves of the same suit as the opponent's played card
 			for index, move in enumerate(moves):
-				if move[0] is not None and Deck.get_suit(move[0]) == Deck.get_suit(state.get_opponents_played_card()):
+				if move[0] is not None and tables.SUIT[move[0]] == tables.SUIT[state.get_opponents_played_card()]:
 					moves_same_suit.append(move)
 
 			if len(moves_same_suit) > 0:
@@ -1,18 +1,47 @@
+import time, random
+from collections import defaultdict
+
 class MonteCarloTreeSearch:
 
-	def __init__(self, node):
+	def __init__(self, node, pool=None, leaf_batches=None):
+		"""
+		:param Node node: the root of the tree
+		:param multiprocessing.Pool pool: if given, every selected node is evaluated with a set of simulations in this pool (leaf parallelism)
+		:param list leaf_batches: with a pool, how many simulations each task in the pool performs per selected node
+		"""
 		self.root = node
+		self.pool = pool
+		self.leaf_batches = leaf_batches
 
-	def best_move(self, simulations_number):
+	def best_move(self, simulations_number=None, time_limit=None, check_every=16):
 		"""
-		Returns the best move
-		:param int simulations_number: how many times we want simulations to be performed
+		Returns the best move. The search runs until it has performed simulations_number
+		simulations or until time_limit seconds have passed, whichever comes first, and
+		returns the best move found up to that point.
+		:param int simulations_number: how many times we want simulations to be performed, None for no limit
+		:param float time_limit: how many seconds the search may take, None for no limit
+		:param int check_every: how many simulations to perform between two looks at the clock
 		:return best_move: the best move after performing the simulations
 		"""
-		for _ in range(0, simulations_number):
+		if simulations_number is None and time_limit is None:
+			raise ValueError("The search needs a simulation or time budget")
+
+		deadline = time.time() + time_limit if time_limit is not None else None
+		simulations = 0
+
+		while simulations_number is None or simulations < simulations_number:
+			# Always perform at least one simulation, so the root has a child to return
+			if deadline is not None and simulations > 0 and simulations % check_every == 0 and time.time() >= deadline:
+				break
+
 			node_selected = self.node_selection() # SELECTION & EXPANSION
-			game_result, reward = node_selected.simulate() # SIMULATION
-			node_selected.backpropagate(game_result, reward) #BACKPROPAGATION
+			if self.pool is None:
+				game_result, reward = node_selected.simulate() # SIMULATION
+				node_selected.backpropagate(game_result, reward) #BACKPROPAGATION
+			else:
+				for game_result, reward in node_selected.simulate_parallel(self.pool, self.leaf_batches): # SIMULATION
+					node_selected.backpropagate(game_result, reward) #BACKPROPAGATION
+			simulations += 1
 		# to select the best child we go only for exploitation, so value 0 for exploration parameter
 		best_child = self.root.best_child(exploration = 0.)
 		best_move = best_child.move_played
@@ -38,3 +67,41 @@ class MonteCarloTreeSearch:
 			print(child)
 			if child == best_child:
 				print("------------------------------------------------")
+
+def root_parallel_best_move(pool, node_class, state, workers, simulations_number=None, time_limit=None):
+	"""
+	Returns the best move, found with root parallelism: every worker builds its own tree, on its own
+	determinization of the state in phase 1, and the statistics of the children of the roots are merged.
+	:param multiprocessing.Pool pool: the pool to search in
+	:param type node_class: the class of the nodes of the trees
+	:param State state: the state to search from, as given to the bot
+	:param int workers: the number of trees to build
+	:param int simulations_number: how many simulations each tree performs, None for no limit
+	:param float time_limit: how many seconds each tree may take, None for no limit
+	:return best_move: the move with the best average value over all trees
+	"""
+	tasks = [(node_class, state, simulations_number, time_limit, random.getrandbits(32)) for w in range(workers)]
+
+	values = defaultdict(float)
+	visits = defaultdict(float)
+	for statistics in pool.map(search_root, tasks):
+		for move, value, number_of_visits in statistics:
+			values[move] += value
+			visits[move] += number_of_visits
+
+	# As in best_move, we go only for exploitation
+	return max(visits, key=lambda move: values[move] / visits[move])
+
+def search_root(task):
+	"""
+	Pool worker of root_parallel_best_move: builds one tree
+	:param tuple task: the node class, the state, the simulation and time budget, and a seed for the PRNG
+	:return: a (move, value, visits) tuple for every child of the root
+	"""
+	node_class, state, simulations_number, time_limit, seed = task
+	random.seed(seed)
+
+	root = node_class(state.make_assumption() if state.get_phase() == 1 else state)
+	MonteCarloTreeSearch(root).best_move(simulations_number, time_limit)
+
+	return [(child.move_played, child.value, child.visits) for child in root.children]
@@ -52,19 +52,25 @@ class Node:
         self.children.append(child_node)
         return child_node
 
-    def simulation_policy(self, possible_moves): # Simulation        
-        return random.choice(possible_moves)
+    def simulation_policy(self, state, possible_moves, rng): # Simulation
+        return rng.choice(possible_moves)
 
     def simulate(self):
-        current_simulation_state = self.state
-        while not current_simulation_state.finished():
-            possible_moves = current_simulation_state.moves()
-            move = self.simulation_policy(possible_moves)
-            current_simulation_state = current_simulation_state.next(move)
-        winner, points = current_simulation_state.winner()
+        final_state = self.state.rollout(random, self.simulation_policy)
+        winner, points = final_state.winner()
         outcome = -1 if winner == 1 else 1
         return outcome, outcome * points
 
+    def simulate_parallel(self, pool, batches): # Simulation, spread over a pool of processes
+        """
+        Runs batches of simulations from this node in the worker processes of the given pool
+        :param multiprocessing.Pool pool: the pool to run the simulations in
+        :param list batches: how many simulations each batch holds, one batch is run per task
+        :return: a list with an (outcome, points) tuple for every simulation
+        """
+        tasks = [(type(self), self.state, simulations, random.getrandbits(32)) for simulations in batches]
+        return [result for results in pool.map(simulate_state, tasks) for result in results]
+
     def backpropagate(self, result, points): # Back-propagation
         self.number_of_visits += 1.
         self.outcome[result] += points
@@ -72,4 +78,15 @@ class Node:
             self.parent.backpropagate(result, points)
 
     def __repr__(self):
-        return "M:{:s}; W:{:.2f}; L:{:.2f}; V:{:.2f}".format(str(self.move_played), self.outcome[1], self.outcome[-1], self.visits)
\ No newline at end of file
+        return "M:{:s}; W:{:.2f}; L:{:.2f}; V:{:.2f}".format(str(self.move_played), self.outcome[1], self.outcome[-1], self.visits)
+
+def simulate_state(task):
+    """
+    Pool worker of Node.simulate_parallel: runs a batch of simulations from a state
+    :param tuple task: the node class, the state, the number of simulations and a seed for the PRNG
+    :return: a list with an (outcome, points) tuple for every simulation
+    """
+    node_class, state, simulations, seed = task
+    random.seed(seed)
+    node = node_class(state)
+    return [node.simulate() for s in range(simulations)]
\ No newline at end of file
@@ -1,38 +1,85 @@
 # Import the API objects
 from api import State, util
+from api.workers import WorkerPool
 from .Node import Node
-from .MonteCarloTreeSearch import MonteCarloTreeSearch
+from .MonteCarloTreeSearch import MonteCarloTreeSearch, root_parallel_best_move
 import random
-import time
 
 class Bot:
 	
 	__max_depth = 12
 	__randomize = True
 
-	def __init__(self):
-		pass
+	# Number of simulations per move, used when the engine gives no time budget
+	__simulations = 5000
+	# Fraction of the engine's time budget that the search may use, the
+	# rest is left as a margin for returning the move to the engine
+	__time_fraction = 0.8
+
+	# Number of worker processes of the parallel search, 1 searches in this process only
+	__workers = 1
+	# "root": every worker builds its own tree and the results are merged
+	# "leaf": one tree, every selected node is evaluated in all workers at once
+	__parallelism = "root"
+	# With leaf parallelism, the number of simulations per worker for every selected node
+	__leaf_batch = 4
+
+	# The worker processes of the parallel search, None without one
+	__pool = None
+
+	def __init__(self, simulations=5000, time_fraction=0.8, workers=1, parallelism="root", leaf_batch=4):
+		if parallelism not in ("root", "leaf"):
+			raise ValueError("Unknown parallelism: {}".format(parallelism))
+
+		self.__simulations = simulations
+		self.__time_fraction = time_fraction
+		self.__workers = workers
+		self.__parallelism = parallelism
+		self.__leaf_batch = leaf_batch
+		self.__pool = WorkerPool(workers) if workers > 1 else None
+
+	def get_move(self, state, time_budget=None):
+		# With a time budget, keep searching for as long as we can afford to
+		if time_budget is not None:
+			simulations, time_limit = None, time_budget * self.__time_fraction
+		else:
+			simulations, time_limit = self.__simulations, None
+
+		if self.__workers > 1 and self.__parallelism == "root":
+			return root_parallel_best_move(self.__pool.get(), Node, state, self.__workers, simulations, time_limit)
 
-	def get_move(self, state):
 		if state.get_phase() == 1:
 			initial_board_state = state.make_assumption()
 		else:
 			initial_board_state = state
 		root = Node(initial_board_state)
-		mcts = MonteCarloTreeSearch(root)
-		start_time = time.time()
-		#play_count = 1 if 10 - state.get_stock_size() == 0 else 10 - state.get_stock_size()
-		#number_of_simulations = int(5000 / play_count) if int(5000 / play_count) > 500 else 500
-		#print(number_of_simulations)
-		best_move = mcts.best_move(5000)
-		end_time = time.time()
-		print(end_time - start_time)
-		return best_move
+
+		if self.__workers > 1:
+			mcts = MonteCarloTreeSearch(root, self.__pool.get(), [self.__leaf_batch] * self.__workers)
+		else:
+			mcts = MonteCarloTreeSearch(root)
+
+		return mcts.best_move(simulations, time_limit)
 
 		#else: # MinMax /w Alpha-Beta
 		#	_, move = self.value(state)
 		#	return move
 
+	def start(self):
+		"""
+		Starts the worker processes of the parallel search, if the bot has one. The engine calls
+		this before the game, so that it does not count against the time of the first move.
+		"""
+		if self.__pool is not None:
+			self.__pool.start()
+
+	def close(self):
+		"""
+		Stops the worker processes of the parallel search, if the bot has one
+		"""
+		if self.__pool is not None:
+			self.__pool.close()
+
 	def value(self, state, alpha=float('-inf'), beta=float('inf'), depth = 0):
 		"""
 		Return the value of this state and the associated move
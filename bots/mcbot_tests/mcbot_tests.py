@@ -129,10 +129,8 @@ def ISMCTS(rootstate, itermax, verbose = False):
 		
 		#print("EXPAND")
 
-		state = sample_state.clone()
 		# Simulate
-		while not state.finished(): # while state is non-terminal
-			state = state.next(random.choice(state.moves()))
+		state = sample_state.rollout(random)
 
 		#print("SIMULATE")
 
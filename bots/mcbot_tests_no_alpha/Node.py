@@ -1,5 +1,5 @@
 from math import *
-from api import util
+from api import util, tables
 
 class Node:
 	""" A node in the game tree. Note wins is always from the viewpoint of playerJustMoved.
@@ -8,6 +8,7 @@ class Node:
 		self.move = move # the move that got us to this node - "None" for the root node
 		self.parentNode = parent # "None" for the root node
 		self.childNodes = []
+		self.childByCode = [None] * len(tables.MOVES) # the children again, indexed by the code of their move
 		self.wins = 0
 		self.visits = 0
 		self.avails = 1
@@ -17,11 +18,8 @@ class Node:
 		""" Return the elements of legalMoves for which this node does not have children.
 		"""
 		
-		# Find all moves for which this node *does* have children
-		triedMoves = [child.move for child in self.childNodes]
-		
 		# Return all moves that are legal but have not been tried yet
-		return [move for move in legalMoves if move not in triedMoves]
+		return [move for move in legalMoves if self.childByCode[tables.CODES[move]] is None]
 		
 	def UCBSelectChild(self, legalMoves, exploration = 0.7):
 		""" Use the UCB1 formula to select a child node, filtered by the given list of legal moves.
@@ -29,7 +27,8 @@ class Node:
 		"""
 		
 		# Filter the list of children by the list of legal moves
-		legalChildren = [child for child in self.childNodes if child.move in legalMoves]
+		legalChildren = [self.childByCode[tables.CODES[move]] for move in legalMoves]
+		legalChildren = [child for child in legalChildren if child is not None]
 		
 		# Get the child with the highest UCB score
 		s = max(legalChildren, key = lambda c: float(c.wins)/float(c.visits) + exploration * sqrt(log(c.avails)/float(c.visits)))
@@ -47,6 +46,7 @@ class Node:
 		"""
 		n = Node(move = m, parent = self, playerJustMoved = p)
 		self.childNodes.append(n)
+		self.childByCode[tables.CODES[m]] = n
 		return n
 	
 	def Update(self, terminalState):
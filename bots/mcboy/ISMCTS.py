@@ -0,0 +1,376 @@
+from api import util, tables, Sampler
+from .Node import simulate, selection_weights
+import numpy as np
+import time, random
+
+class ISNodePool:
+	"""
+	The nodes of an information set tree, kept in parallel NumPy arrays like those of NodePool: a node
+	is an index into the arrays. Nodes do not hold a state: every iteration of the search draws a world
+	of its own, and plays the moves of the tree on it. As the legal moves differ between worlds, the
+	children of a node are added one at a time. A node gets a row of the children table once it has a
+	child, which holds the child of every move code (see tables.MOVES) and -1 for the moves without
+	one, so all worlds share the same statistics. The value of a node is from the viewpoint of the
+	player who played the move that leads to it.
+
+	A node takes 38 bytes, plus 128 bytes for its row if it has children. A node object with a
+	list of children for all move codes took over 500 bytes.
+	"""
+
+	def __init__(self, capacity=1024):
+		"""
+		:param int capacity: the number of nodes to make room for, the arrays grow when they are full
+		"""
+		self.root = 0
+		self.size = 0
+		# The number of rows of the children table in use
+		self.rows = 0
+
+		self.visits = np.zeros(capacity)
+		# The points won minus the points lost in the simulations through the node, for the player who played its move
+		self.values = np.zeros(capacity)
+		# The sum of the squares of these points, for the variance of UCB1-tuned
+		self.squares = np.zeros(capacity, dtype=np.float32)
+		# How many times the node could have been selected, which is what
+		# the exploration term counts instead of the visits of the parent
+		self.availability = np.ones(capacity)
+		self.parent = np.full(capacity, -1, dtype=np.int32)
+		# The code of the move that leads to the node, and the player who played it
+		self.move = np.full(capacity, -1, dtype=np.int8)
+		self.player = np.zeros(capacity, dtype=np.int8)
+		# The row of the node in the children table, -1 as long as it has no children
+		self.row = np.full(capacity, -1, dtype=np.int32)
+		self.table = np.full((capacity // 4, len(tables.MOVES)), -1, dtype=np.int32)
+
+		self.__add(-1, -1, 0)
+
+	def untried_moves(self, node, legal_moves):
+		"""
+		:param int node: a node
+		:param list legal_moves: the codes of the moves that are legal in the world of the current iteration
+		:return: the codes of the legal moves that do not have a child yet
+		"""
+		row = self.row[node]
+		if row < 0:
+			return list(legal_moves)
+
+		children = self.table[row]
+		return [move for move in legal_moves if children[move] < 0]
+
+	def best_child(self, node, legal_moves, exploration=2.5, selection="ucb1"): # Selection
+		"""
+		Selects a child among the children of the given legal moves, and counts the availability of
+		all of these children. The children are scored all at once, over their statistics in the
+		arrays, with the formulas of NodePool.best_child. The availability of a child takes the
+		place of the visits of the parent, and with "puct" all legal moves have the same prior.
+		:param int node: a node with a child for every legal move
+		:param list legal_moves: the codes of the moves that are legal in the world of the current iteration
+		:param float exploration: the weight of the exploration term
+		:param str selection: one of SELECTIONS (see Node)
+		:return int: the selected child
+		"""
+		children = self.table[self.row[node], legal_moves]
+		self.availability[children] += 1.
+
+		availability = self.availability[children]
+		prior = np.full(len(children), 1. / len(children))
+		weights = selection_weights(selection, exploration, self.visits[children], self.values[children], self.squares[children],
+									prior, availability, np.log(availability))
+		return int(children[weights.argmax()])
+
+	def add_child(self, node, move, player): # Expansion
+		"""
+		:param int node: a node
+		:param int move: the code of a move that has no child yet
+		:param int player: the player who plays it
+		:return int: the new child
+		"""
+		if self.row[node] < 0:
+			if self.rows == len(self.table):
+				table = np.full((2 * len(self.table), len(tables.MOVES)), -1, dtype=np.int32)
+				table[:self.rows] = self.table
+				self.table = table
+			self.row[node] = self.rows
+			self.rows += 1
+
+		child = self.table[self.row[node], move] = self.__add(node, move, player)
+		return child
+
+	def child_for(self, node, move):
+		"""
+		:param int node: a node
+		:param tuple move: a move
+		:return: the child of the move, or None if the node has no child for it
+		"""
+		row = self.row[node]
+		if row < 0 or self.table[row, tables.CODES[move]] < 0:
+			return None
+		return int(self.table[row, tables.CODES[move]])
+
+	def backpropagate(self, path, winner, points): # Back-propagation
+		"""
+		:param list path: the nodes from the root down to the node that was simulated
+		:param int winner: the player who won the simulation
+		:param int points: the game points they won
+		"""
+		path = np.array(path)
+		self.visits[path] += 1.
+		self.values[path] += np.where(self.player[path] == winner, points, -points)
+		self.squares[path] += points * points
+
+	def descend(self, moves): # Tree reuse
+		"""
+		Follows the given moves down from the root
+		:param list moves: the moves to follow, as move tuples
+		:return: the node reached, or None if a move has no child
+		"""
+		node = self.root
+		for move in moves:
+			node = self.child_for(node, move)
+			if node is None:
+				return None
+
+		return node
+
+	def reroot(self, node):
+		"""
+		Makes a node the root of the tree. The nodes outside its subtree stay in the arrays, but are no longer used.
+		:param int node: the new root
+		"""
+		self.root = node
+		self.parent[node] = -1
+
+	@property
+	def nbytes(self):
+		"""
+		:return: the number of bytes the arrays take
+		"""
+		return sum(array.nbytes for array in (self.visits, self.values, self.squares, self.availability, self.parent, self.move, self.player, self.row, self.table))
+
+	def __add(self, parent, move, player):
+		# Adds a node, and returns its index
+		if self.size == len(self.visits):
+			self.__grow()
+
+		node = self.size
+		self.size += 1
+
+		self.parent[node] = parent
+		self.move[node] = move
+		self.player[node] = player
+
+		return node
+
+	def __grow(self):
+		capacity = 2 * len(self.visits)
+		for name, fill in (("visits", 0), ("values", 0), ("squares", 0), ("availability", 1), ("parent", -1), ("move", -1), ("player", 0), ("row", -1)):
+			old = getattr(self, name)
+			new = np.full(capacity, fill, dtype=old.dtype)
+			new[:len(old)] = old
+			setattr(self, name, new)
+
+class ISMCTS:
+	"""
+	Information set Monte Carlo tree search: every iteration draws a new world that is
+	consistent with what we know, and searches the shared tree within that world.
+	"""
+
+	def __init__(self, state, tree=None, exploration=2.5, selection="ucb1", sampler=None, policy=None, solve=False):
+		"""
+		:param State state: the state to search from, as given to the bot
+		:param ISNodePool tree: the tree to continue searching in from its root, a new tree if None
+		:param float exploration: the weight of the exploration term
+		:param str selection: the formula to select children with, one of SELECTIONS (see Node)
+		:param Sampler sampler: the sampler to draw phase 1 worlds from, a uniform one if None
+		:param callable policy: the rollout policy of the simulations (see api.policies), random moves if None
+		:param bool solve: whether simulations hand the game to the exact solver once the stock is empty (see api.endgame.playout)
+		"""
+		self.state = state
+		self.tree = tree if tree is not None else ISNodePool()
+		self.exploration = exploration
+		self.selection = selection
+		self.sampler = sampler
+		self.policy = policy
+		self.solve = solve
+		if sampler is None and state.get_phase() == 1:
+			self.sampler = Sampler(state)
+
+	def best_move(self, simulations_number=None, time_limit=None, check_every=16):
+		"""
+		Returns the best move. The search runs until it has performed simulations_number
+		iterations or until time_limit seconds have passed, whichever comes first.
+		:param int simulations_number: how many iterations to perform, None for no limit
+		:param float time_limit: how many seconds the search may take, None for no limit
+		:param int check_every: how many iterations to perform between two looks at the clock
+		:return best_move: the legal move whose child was visited most
+		"""
+		if simulations_number is None and time_limit is None:
+			raise ValueError("The search needs a simulation or time budget")
+
+		deadline = time.time() + time_limit if time_limit is not None else None
+		simulations = 0
+
+		while simulations_number is None or simulations < simulations_number:
+			# Always perform at least one iteration, so the root has a child to return
+			if deadline is not None and simulations > 0 and simulations % check_every == 0 and time.time() >= deadline:
+				break
+
+			self.iterate()
+			simulations += 1
+
+		return max(self.root_statistics(), key=lambda statistics: statistics[2])[0]
+
+	def root_statistics(self):
+		"""
+		:return: a (move, value, visits) tuple for every child of the root with a move that is legal
+			now. A reused tree may hold moves for cards that we turned out not to draw.
+		"""
+		tree = self.tree
+		row = tree.row[tree.root]
+		if row < 0:
+			return []
+
+		children = [tree.table[row, move] for move in self.state.move_codes()]
+		return [(tables.MOVES[tree.move[child]], tree.values[child], tree.visits[child]) for child in children if child >= 0]
+
+	def determinize(self):
+		"""
+		:return: a perfect information state that is consistent with what we know, which the iteration may change
+		"""
+		return self.sampler.sample() if self.sampler is not None else self.state.clone()
+
+	def iterate(self):
+		"""
+		Performs one iteration of the search, in a newly drawn world
+		"""
+		tree = self.tree
+		node = tree.root
+		path = [node]
+		state = self.determinize()
+
+		while not state.finished():
+			moves = state.move_codes()
+			untried_moves = tree.untried_moves(node, moves)
+
+			if len(untried_moves) > 0:
+				move = random.choice(untried_moves)
+				player = state.whose_turn()
+				state.apply(tables.MOVES[move])
+				node = tree.add_child(node, move, player) # EXPANSION
+				path.append(node)
+				break
+
+			node = tree.best_child(node, moves, self.exploration, self.selection) # SELECTION
+			path.append(node)
+			state.apply(tables.MOVES[tree.move[node]])
+
+		winner, points = simulate(state, self.policy, self.solve) # SIMULATION
+		tree.backpropagate(path, winner, points) # BACKPROPAGATION
+
+def moves_since(previous, move, state):
+	"""
+	Works out, from the information we have, which moves were played between our previous move and now.
+	:param State previous: the state we chose our previous move in
+	:param tuple move: the move we chose
+	:param State state: the state we have to move in now
+	:return: the moves played from previous to state, starting with our own move, or None if the state
+		can not follow from previous (for example because a new game started)
+	"""
+	me = previous.whose_turn()
+	opponent = util.other(me)
+
+	if state.whose_turn() != me or state.get_trump_suit() != previous.get_trump_suit():
+		return None
+
+	if state.get_points(me) < previous.get_points(me) or state.get_points(opponent) < previous.get_points(opponent):
+		return None
+
+	before = previous.get_perspective(me)
+	after = state.get_perspective(me)
+	won = ("P1W", "P2W")
+
+	for index in range(20):
+		# Won cards stay where they are, the cards we held stay in our hand unless we played them
+		if before[index] in won and after[index] != before[index]:
+			return None
+		if before[index] == "P{}H".format(me) and index not in move and after[index] != before[index]:
+			return None
+
+	moves = [move]
+
+	# A trump exchange does not end our turn
+	if move[0] is None:
+		return moves
+
+	if previous.leader() == me:
+		# The opponent followed our card, both of them went to the pile of the winner of the trick
+		followed = [index for index in range(20) if after[index] in won and before[index] not in won and index != move[0]]
+		if len(followed) != 1:
+			return None
+		moves.append((followed[0], None))
+
+	if state.leader() == opponent:
+		# The opponent won the trick and leads the next one. As the trump card is face up, we can see
+		# whether it was exchanged for the trump jack first
+		trump_card = state.get_deck().get_trump_card_index()
+		if trump_card is not None and trump_card != previous.get_deck().get_trump_card_index():
+			moves.append((None, trump_card))
+
+		# Pending points are paid out when a trick is won, so the opponent only has
+		# pending points now if they melded a marriage with the card they led
+		card = state.get_opponents_played_card()
+		partner = None
+		if state.get_pending_points(opponent) > 0:
+			partner = card + 1 if card % 5 == 2 else card - 1
+		moves.append((card, partner))
+
+	return moves
+
+def root_parallel_best_move(pool, state, workers, simulations_number=None, time_limit=None, exploration=2.5, selection="ucb1", weights=None, policy=None, solve=False):
+	"""
+	Returns the best move, found with root parallelism: every worker builds its own tree, and the
+	visits of the children of the roots are added up.
+	:param multiprocessing.Pool pool: the pool to search in
+	:param State state: the state to search from, as given to the bot
+	:param int workers: the number of trees to build
+	:param int simulations_number: how many iterations each tree performs, None for no limit
+	:param float time_limit: how many seconds each tree may take, None for no limit
+	:param float exploration: the weight of the exploration term
+	:param str selection: the formula to select children with, one of SELECTIONS (see Node)
+	:param dict weights: the likelihoods of unknown cards being in the opponent's hand, see Sampler
+	:param callable policy: the rollout policy of the simulations, random moves if None
+	:param bool solve: whether simulations hand the game to the exact solver once the stock is empty
+	:return best_move: the move that was visited most over all trees
+	"""
+	tasks = [(state, simulations_number, time_limit, exploration, selection, weights, policy, solve, random.getrandbits(32)) for w in range(workers)]
+	visits = merge_visits(pool.map(search_root, tasks))
+
+	return max(visits, key=visits.get)
+
+def merge_visits(results):
+	"""
+	Adds up the visits of the children of several roots
+	:param list results: the root statistics of every tree, as returned by search_root
+	:return: a dict with the total number of visits of every move
+	"""
+	visits = {}
+	for statistics in results:
+		for move, value, number_of_visits in statistics:
+			visits[move] = visits.get(move, 0.) + number_of_visits
+
+	return visits
+
+def search_root(task):
+	"""
+	Pool worker of root_parallel_best_move: builds one tree
+	:param tuple task: the state, the iteration and time budget, the exploration weight, the selection formula, the card weights, the rollout policy, whether to solve endgames and a seed for the PRNG
+	:return: a (move, value, visits) tuple for every child of the root
+	"""
+	state, simulations_number, time_limit, exploration, selection, weights, policy, solve, seed = task
+	random.seed(seed)
+
+	sampler = Sampler(state, weights) if state.get_phase() == 1 else None
+	search = ISMCTS(state, exploration=exploration, selection=selection, sampler=sampler, policy=policy, solve=solve)
+	search.best_move(simulations_number, time_limit)
+
+	return search.root_statistics()
@@ -1,40 +1,148 @@
+import time, random
+from collections import defaultdict
+from api import tables
+from .Node import NodePool, SELECTIONS, simulate, simulate_state
+
 class MonteCarloTreeSearch:
 
-	def __init__(self, node):
-		self.root = node
+	def __init__(self, tree, pool=None, leaf_batches=None, exploration=2.5, selection="ucb1", policy=None, solve=False):
+		"""
+		:param NodePool tree: the tree to search in, from its root
+		:param multiprocessing.Pool pool: if given, every selected node is evaluated with a set of simulations in this pool (leaf parallelism)
+		:param list leaf_batches: with a pool, how many simulations each task in the pool performs per selected node
+		:param float exploration: the weight of the exploration term
+		:param str selection: the formula to select children with, one of "ucb1", "ucb1-tuned" and "puct"
+		:param callable policy: the rollout policy of the simulations (see api.policies), random moves if None
+		:param bool solve: whether simulations hand the game to the exact solver once the stock is empty (see api.endgame.playout)
+		"""
+		if selection not in SELECTIONS:
+			raise ValueError("Unknown selection: {}".format(selection))
+
+		self.tree = tree
+		self.pool = pool
+		self.leaf_batches = leaf_batches
+		self.exploration = exploration
+		self.selection = selection
+		self.policy = policy
+		self.solve = solve
 
-	def best_move(self, simulations_number):
+	def best_move(self, simulations_number=None, time_limit=None, check_every=16):
 		"""
-		Returns the best move
-		:param int simulations_number: how many times we want simulations to be performed
+		Returns the best move. The search runs until it has performed simulations_number
+		simulations or until time_limit seconds have passed, whichever comes first, and
+		returns the best move found up to that point.
+		:param int simulations_number: how many times we want simulations to be performed, None for no limit
+		:param float time_limit: how many seconds the search may take, None for no limit
+		:param int check_every: how many simulations to perform between two looks at the clock
 		:return best_move: the best move after performing the simulations
 		"""
-		for _ in range(0, simulations_number):
-			node_selected = self.node_selection() # SELECTION & EXPANSION
-			game_result, reward = node_selected.simulate() # SIMULATION
-			node_selected.backpropagate(game_result, reward) #BACKPROPAGATION
-		# to select the best child we go only for exploitation, so value 0 for exploration parameter
-		best_child = self.root.best_child(exploration = 0.)
-		best_move = best_child.move_played
-		# self.print_brothers_of(best_child)
-		return best_move
+		if simulations_number is None and time_limit is None:
+			raise ValueError("The search needs a simulation or time budget")
+
+		deadline = time.time() + time_limit if time_limit is not None else None
+		simulations = 0
+
+		while simulations_number is None or simulations < simulations_number:
+			# Always perform at least one simulation, so the root has a child to return
+			if deadline is not None and simulations > 0 and simulations % check_every == 0 and time.time() >= deadline:
+				break
+
+			path, state = self.node_selection() # SELECTION & EXPANSION
+			outcome = self.tree.outcome(path[-1])
+			if outcome is not None:
+				# The game of the node is over, there is nothing to simulate
+				for s in range(1 if self.pool is None else sum(self.leaf_batches)):
+					self.tree.backpropagate(path, *outcome) #BACKPROPAGATION
+			elif self.pool is None:
+				winner, points = simulate(state, self.policy, self.solve) # SIMULATION
+				self.tree.backpropagate(path, winner, points) #BACKPROPAGATION
+			else:
+				tasks = [(state, batch, self.policy, self.solve, random.getrandbits(32)) for batch in self.leaf_batches]
+				for results in self.pool.map(simulate_state, tasks): # SIMULATION
+					for winner, points in results:
+						self.tree.backpropagate(path, winner, points) #BACKPROPAGATION
+			simulations += 1
+
+		return self.tree.best_move()
 
 	def node_selection(self):
 		"""
-		Selects to node to run the simulation on
+		Selects the node to run the simulation on. The tree is descended on its statistics alone, the
+		state of the selected node is then rebuilt by playing the moves on the path from the root state.
+		:return: the path of nodes from the root to the selected node, and the state of that node (None if its game is known to be over)
 		"""
-		current_node = self.root
-		while not current_node.is_terminal_node:
-			if not current_node.is_fully_expanded:
-				return current_node.expand() # EXPANSION
-			else:
-				current_node = current_node.best_child() # EXPLORATION
-		return current_node
-
-	def print_brothers_of(self, best_child):
-		for child in best_child.parent.children:
-			if child == best_child:
-				print("------------------------------------------------")
-			print(child)
-			if child == best_child:
-				print("------------------------------------------------")
+		tree = self.tree
+		node = tree.root
+		path = [node]
+
+		while tree.first_child[node] >= 0:
+			node = tree.best_child(node, self.exploration, self.selection) # EXPLORATION
+			path.append(node)
+
+		if tree.result[node] != 0:
+			return path, None
+
+		state = tree.state.clone()
+		for node in path[1:]:
+			state.apply(tables.MOVES[tree.move[node]])
+
+		# A node that has not been simulated from yet is a new leaf of the tree, others are expanded first
+		if tree.visits[node] > 0 or node == tree.root:
+			tree.expand(node, state) # EXPANSION
+			if tree.result[node] != 0:
+				return path, None
+
+			node = tree.best_child(node, self.exploration, self.selection)
+			path.append(node)
+			state.apply(tables.MOVES[tree.move[node]])
+
+		return path, state
+
+def root_parallel_best_move(pool, state, workers, simulations_number=None, time_limit=None, selection="ucb1", policy=None, solve=False):
+	"""
+	Returns the best move, found with root parallelism: every worker builds its own tree, on its own
+	determinization of the state in phase 1, and the statistics of the children of the roots are merged.
+	:param multiprocessing.Pool pool: the pool to search in
+	:param State state: the state to search from, as given to the bot
+	:param int workers: the number of trees to build
+	:param int simulations_number: how many simulations each tree performs, None for no limit
+	:param float time_limit: how many seconds each tree may take, None for no limit
+	:param str selection: the formula to select children with
+	:param callable policy: the rollout policy of the simulations, random moves if None
+	:param bool solve: whether simulations hand the game to the exact solver once the stock is empty
+	:return best_move: the move with the best average value over all trees
+	"""
+	tasks = [(state, simulations_number, time_limit, selection, policy, solve, random.getrandbits(32)) for w in range(workers)]
+	values, visits = merge_statistics(pool.map(search_root, tasks))
+
+	# As in best_move, we go only for exploitation
+	return max(visits, key=lambda move: values[move] / visits[move])
+
+def merge_statistics(results):
+	"""
+	Adds up the statistics of the children of several roots
+	:param list results: the root statistics of every tree, as returned by search_root
+	:return: the total value and the total number of visits of every move, as two dicts
+	"""
+	values = defaultdict(float)
+	visits = defaultdict(float)
+	for statistics in results:
+		for move, value, number_of_visits in statistics:
+			values[move] += value
+			visits[move] += number_of_visits
+
+	return values, visits
+
+def search_root(task):
+	"""
+	Pool worker of root_parallel_best_move: builds one tree
+	:param tuple task: the state, the simulation and time budget, the selection formula, the rollout policy, whether to solve endgames and a seed for the PRNG
+	:return: a (move, value, visits) tuple for every child of the root
+	"""
+	state, simulations_number, time_limit, selection, policy, solve, seed = task
+	random.seed(seed)
+
+	tree = NodePool(state.make_assumption() if state.get_phase() == 1 else state)
+	MonteCarloTreeSearch(tree, selection=selection, policy=policy, solve=solve).best_move(simulations_number, time_limit)
+
+	return tree.root_statistics()
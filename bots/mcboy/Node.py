@@ -1,75 +1,266 @@
 import numpy as np
-from math import sqrt, log
 import random
-from collections import defaultdict
-from api import util
-class Node:
+from api import tables, endgame
 
-    def __init__(self, state, move_played=None, parent=None):
+# The formulas best_child can score the children of a node with
+SELECTIONS = ("ucb1", "ucb1-tuned", "puct")
+
+# A simulation is worth between -3 and 3 points, so the variance of its value is at most 9
+MAX_VARIANCE = 9.
+
+class NodePool:
+    """
+    The nodes of a Monte Carlo search tree, kept in parallel NumPy arrays: a node is an index into
+    the arrays. Nodes do not hold a state, the state of a node is rebuilt by playing the moves on
+    the way down from the root state. When a node is expanded, all its children are added at once,
+    so the children of a node are the count_children[node] nodes from first_child[node] on.
+
+    A node takes 41 bytes, where a node object with its own state took well over a kilobyte.
+    """
+
+    def __init__(self, state, capacity=1024, priors=None):
+        """
+        :param State state: the (perfect information) state of the root
+        :param int capacity: the number of nodes to make room for, the arrays grow when they are full
+        :param callable priors: function priors(state, codes) that returns a probability for each of the
+            move codes of the state, used by PUCT. Defaults to the same probability for every move.
+        """
         self.state = state
-        self.move_played = move_played
-        self.parent = parent
-        self.children = []
-        self.number_of_visits = 0.
-        self.outcome = defaultdict(int)
-        self.untried_moves = None
+        self.root = 0
+        self.size = 0
+        self.priors = priors
 
-    @property
-    def get_untried_moves(self):
-        if self.untried_moves is None:
-            self.untried_moves = self.state.moves()
-        return self.untried_moves
+        self.visits = np.zeros(capacity)
+        # The log of the visits, kept up to date by backpropagate so that selection does not compute it
+        self.log_visits = np.zeros(capacity, dtype=np.float32)
+        # The points won minus the points lost in the simulations through the node, for the player who played its move
+        self.values = np.zeros(capacity)
+        # The sum of the squares of these points, for the variance of UCB1-tuned
+        self.squares = np.zeros(capacity, dtype=np.float32)
+        # The probability of the move of the node according to the priors, for PUCT
+        self.prior = np.zeros(capacity, dtype=np.float32)
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        # The code of the move that leads to the node (see tables.MOVES), and the player who played it
+        self.move = np.full(capacity, -1, dtype=np.int8)
+        self.player = np.zeros(capacity, dtype=np.int8)
+        # The first child of the node, -1 as long as the node is not expanded
+        self.first_child = np.full(capacity, -1, dtype=np.int32)
+        self.count_children = np.zeros(capacity, dtype=np.int8)
+        # The number of children that were never selected, they are selected last one first
+        self.untried = np.zeros(capacity, dtype=np.int8)
+        # For a node whose game is over: the points player 1 won, negative if player 2 won. 0 for all other nodes.
+        self.result = np.zeros(capacity, dtype=np.int8)
 
-    @property
-    def value(self):
-        wins = self.outcome[self.parent.state.whose_turn()]
-        loses = self.outcome[util.other(self.parent.state.whose_turn())]
-        return wins - loses
+        self.__add(-1, [-1], 0)
 
-    @property
-    def visits(self):
-        return self.number_of_visits
+    def expand(self, node, state): # Expansion
+        """
+        Adds a child for every legal move. A node whose game is over gets no children, its result is stored instead.
+        :param int node: the node to expand
+        :param State state: the state of the node
+        """
+        if state.finished():
+            winner, points = state.winner()
+            self.result[node] = points if winner == 1 else -points
+            return
+
+        codes = state.move_codes()
+        first = self.first_child[node] = self.__add(node, codes, state.whose_turn())
+        self.count_children[node] = self.untried[node] = len(codes)
+
+        if self.priors is None:
+            self.prior[first:self.size] = 1. / len(codes)
+        else:
+            self.prior[first:self.size] = self.priors(state, codes)
+
+    def children(self, node):
+        """
+        :param int node: a node
+        :return: the range of indices of its children, empty if it is not expanded
+        """
+        first = self.first_child[node]
+        return range(first, first + self.count_children[node]) if first >= 0 else range(0)
+
+    def outcome(self, node):
+        """
+        :param int node: a node
+        :return: the (winner, points) tuple of the game of the node if it is known to be over, else None
+        """
+        result = int(self.result[node])
+        if result == 0:
+            return None
+        return (1, result) if result > 0 else (2, -result)
+
+    def best_child(self, node, exploration=2.5, selection="ucb1"): # Selection
+        """
+        Selects the child of an expanded node to descend to. The children are scored all at once, over
+        their statistics in the arrays.
+        With "ucb1" and "ucb1-tuned", a child that was never selected goes first, after that the child
+        with the best UCB value does. UCB1-tuned scales the exploration term by the variance of the
+        values of the child. With "puct", the exploration term of a child follows its prior and the
+        children that were never selected count as a mean value of 0.
+        :param int node: an expanded node
+        :param float exploration: the weight of the exploration term
+        :param str selection: one of SELECTIONS
+        :return int: the selected child
+        """
+        first = self.first_child[node]
+        last = first + self.count_children[node]
+
+        if selection != "puct" and self.untried[node] > 0:
+            self.untried[node] -= 1
+            return first + self.untried[node]
+
+        weights = selection_weights(selection, exploration, self.visits[first:last], self.values[first:last], self.squares[first:last],
+                                    self.prior[first:last], self.visits[node], self.log_visits[node])
+        return first + int(weights.argmax())
+
+    def best_move(self):
+        """
+        :return: the move of the child of the root with the best mean value, we go only for exploitation
+        """
+        children = [child for child in self.children(self.root) if self.visits[child] > 0]
+        best = max(children, key=lambda child: self.values[child] / self.visits[child])
+        return tables.MOVES[self.move[best]]
+
+    def root_statistics(self):
+        """
+        :return: a (move, value, visits) tuple for every visited child of the root
+        """
+        return [(tables.MOVES[self.move[child]], self.values[child], self.visits[child]) for child in self.children(self.root) if self.visits[child] > 0]
+
+    def backpropagate(self, path, winner, points): # Back-propagation
+        """
+        :param list path: the nodes from the root down to the node that was simulated
+        :param int winner: the player who won the simulation
+        :param int points: the game points they won
+        """
+        path = np.array(path)
+        self.visits[path] += 1.
+        self.log_visits[path] = np.log(self.visits[path])
+        self.values[path] += np.where(self.player[path] == winner, points, -points)
+        self.squares[path] += points * points
+
+    def child_for(self, node, move):
+        """
+        :param int node: a node
+        :param tuple move: a move
+        :return: the child of the move, or None if the node has no child for it
+        """
+        code = tables.CODES[move]
+        for child in self.children(node):
+            if self.move[child] == code:
+                return child
+        return None
+
+    def find_descendant(self, node, node_state, state, max_depth): # Tree reuse
+        """
+        Searches the subtree of a node for a given state
+        :param int node: the node to search below
+        :param State node_state: the state of that node, which is played on and restored
+        :param State state: the state to search for
+        :param int max_depth: how many moves below the node to search
+        :return: the node at most max_depth moves below the given one whose state equals the given state, or None if there is none
+        """
+        if node_state == state:
+            return node
+        if max_depth == 0:
+            return None
+        for child in self.children(node):
+            node_state.apply(tables.MOVES[self.move[child]])
+            found = self.find_descendant(child, node_state, state, max_depth - 1)
+            node_state.undo()
+            if found is not None:
+                return found
+        return None
+
+    def reroot(self, node, state):
+        """
+        Makes a node the root of the tree. The nodes outside its subtree stay in the arrays, but are no longer used.
+        :param int node: the new root
+        :param State state: the state of the new root
+        """
+        self.root = node
+        self.state = state
+        self.parent[node] = -1
 
     @property
-    def is_terminal_node(self):
-        return self.state.finished()
-    
-    @property
-    def is_fully_expanded(self):
-        return len(self.get_untried_moves) == 0
-
-    def best_child(self, exploration=2.5): # Selection
-        children_weights = [
-            (child.value / child.visits) + exploration * sqrt((2 * log(self.visits)) / child.visits)
-            for child in self.children
-        ]
-        return self.children[np.argmax(children_weights)]
-
-    def expand(self): # Expansion
-        move = self.untried_moves.pop()
-        next_state = self.state.next(move)
-        child_node = Node(next_state, move, self)
-        self.children.append(child_node)
-        return child_node
-
-    def simulation_policy(self, possible_moves): # Simulation        
-        return random.choice(possible_moves)
-
-    def simulate(self):
-        current_simulation_state = self.state
-        while not current_simulation_state.finished():
-            possible_moves = current_simulation_state.moves()
-            move = self.simulation_policy(possible_moves)
-            current_simulation_state = current_simulation_state.next(move)
-        winner, points = current_simulation_state.winner()
-        outcome = 1 if winner == 1 else -1
-        return outcome, outcome * points
-
-    def backpropagate(self, result, points): # Back-propagation
-        self.number_of_visits += 1.
-        self.outcome[result] += points
-        if self.parent:
-            self.parent.backpropagate(result, points)
-
-    def __repr__(self):
-        return "M:{:s}; W:{:.2f}; L:{:.2f}; V:{:.2f}".format(str(self.move_played), self.outcome[1], self.outcome[-1], self.visits)
\ No newline at end of file
+    def nbytes(self):
+        """
+        :return: the number of bytes the arrays take
+        """
+        return sum(array.nbytes for array in (self.visits, self.log_visits, self.values, self.squares, self.prior, self.parent, self.move, self.player, self.first_child, self.count_children, self.untried, self.result))
+
+    def __add(self, parent, moves, player):
+        # Adds a node for each of the given move codes, and returns the index of the first
+        while self.size + len(moves) > len(self.visits):
+            self.__grow()
+
+        first = self.size
+        self.size += len(moves)
+
+        self.parent[first:self.size] = parent
+        self.move[first:self.size] = moves
+        self.player[first:self.size] = player
+
+        return first
+
+    def __grow(self):
+        capacity = 2 * len(self.visits)
+        for name, fill in (("visits", 0), ("log_visits", 0), ("values", 0), ("squares", 0), ("prior", 0), ("parent", -1), ("move", -1), ("player", 0), ("first_child", -1), ("count_children", 0), ("untried", 0), ("result", 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+def selection_weights(selection, exploration, visits, values, squares, prior, parent_visits, log_parent_visits):
+    """
+    Scores the children of a node for selection, all at once. Shared by NodePool and the
+    information set tree of ISMCTS, see NodePool.best_child for the formulas.
+    :param str selection: one of SELECTIONS
+    :param float exploration: the weight of the exploration term
+    :param np.ndarray visits: the visits of the children, which must all be visited unless the selection is "puct"
+    :param np.ndarray values: the values of the children
+    :param np.ndarray squares: the sums of the squares of the points of the children
+    :param np.ndarray prior: the priors of the children
+    :param parent_visits: how many times the children could have been selected: the visits of the parent,
+        or an array with the availability of every child in an information set tree
+    :param log_parent_visits: the log of parent_visits
+    :return np.ndarray: the weight of every child, the child with the highest weight is selected
+    """
+    if selection == "puct":
+        means = values / np.maximum(visits, 1.)
+        return means + exploration * prior * (np.sqrt(parent_visits) / (1. + visits))
+
+    means = values / visits
+
+    if selection == "ucb1":
+        return means + exploration * np.sqrt((2 * log_parent_visits) / visits)
+
+    if selection == "ucb1-tuned":
+        variances = squares / visits - means ** 2 + np.sqrt((2 * log_parent_visits) / visits)
+        return means + exploration * np.sqrt(log_parent_visits / visits * np.minimum(variances, MAX_VARIANCE))
+
+    raise ValueError("Unknown selection: {}".format(selection))
+
+def simulate(state, policy=None, solve=False): # Simulation
+    """
+    Plays a game out from a state
+    :param State state: a perfect information state
+    :param callable policy: the rollout policy, random moves if None
+    :param bool solve: whether to hand the game to the exact solver of this process once the stock is empty
+    :return: the (winner, points) tuple of the game
+    """
+    if solve:
+        return endgame.playout(state, endgame.shared_solver(), random, policy)
+    return state.rollout(random, policy).winner()
+
+def simulate_state(task):
+    """
+    Pool worker of the leaf parallel search: runs a batch of simulations from a state
+    :param tuple task: the state, the number of simulations, the rollout policy, whether to solve endgames and a seed for the PRNG
+    :return: a list with a (winner, points) tuple for every simulation
+    """
+    state, simulations, policy, solve, seed = task
+    random.seed(seed)
+    return [simulate(state, policy, solve) for s in range(simulations)]
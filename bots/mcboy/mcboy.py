@@ -1,39 +1,181 @@
 # Import the API objects
-from api import State, util
-from .Node import Node
-from .MonteCarloTreeSearch import MonteCarloTreeSearch
+from api import State, Belief, util, policies
+from api.workers import WorkerPool
+from .Node import NodePool, SELECTIONS
+from .MonteCarloTreeSearch import MonteCarloTreeSearch, root_parallel_best_move
+from .ISMCTS import ISMCTS, moves_since
+from .ISMCTS import root_parallel_best_move as ismcts_root_parallel_best_move
 import random
-import time
 
 class Bot:
 	
 	__max_depth = 12
 	__randomize = True
 
-	def __init__(self):
-		pass
+	# Number of simulations per move, used when the engine gives no time budget
+	__simulations = 5000
+	# Fraction of the engine's time budget that the search may use, the
+	# rest is left as a margin for returning the move to the engine
+	__time_fraction = 0.8
+
+	# Tree of our last search, and the node and state of the move we played, whose subtree is reused for the next move
+	__previous = None
+
+	# Number of worker processes of the parallel search, 1 searches in this process only
+	__workers = 1
+	# "root": every worker builds its own tree and the results are merged
+	# "leaf": one tree, every selected node is evaluated in all workers at once
+	__parallelism = "root"
+	# With leaf parallelism, the number of simulations per worker for every selected node
+	__leaf_batch = 4
+
+	# The formula the searches select children with: "ucb1", "ucb1-tuned" or "puct"
+	__selection = "ucb1"
+	# The rollout policy of the simulations, one of api.policies.POLICIES
+	__policy = None
+	# Whether simulations hand the game to the exact endgame solver once the stock is empty
+	__solve = False
+
+	# Whether phase 1 moves are searched with information set MCTS, rather
+	# than with perfect information MCTS on a single guess of the hidden cards
+	__ismcts = True
+	# The state, move and tree of our previous information set search
+	__information_set = None
+	# What the opponent's play has told us about their hand so far
+	__belief = None
+
+	# The worker processes of the parallel search, None without one
+	__pool = None
+
+	def __init__(self, simulations=5000, time_fraction=0.8, workers=1, parallelism="root", leaf_batch=4, ismcts=True, selection="ucb1", policy="random", solve=False):
+		if parallelism not in ("root", "leaf"):
+			raise ValueError("Unknown parallelism: {}".format(parallelism))
+		if selection not in SELECTIONS:
+			raise ValueError("Unknown selection: {}".format(selection))
+		if policy not in policies.POLICIES:
+			raise ValueError("Unknown rollout policy: {}".format(policy))
+		if ismcts and workers > 1 and parallelism == "leaf":
+			raise ValueError("Information set MCTS only supports root parallelism")
+
+		self.__simulations = simulations
+		self.__time_fraction = time_fraction
+		self.__workers = workers
+		self.__parallelism = parallelism
+		self.__leaf_batch = leaf_batch
+		self.__ismcts = ismcts
+		self.__selection = selection
+		self.__policy = policies.POLICIES[policy]
+		self.__solve = solve
+		self.__belief = Belief()
+		self.__pool = WorkerPool(workers) if workers > 1 else None
+
+	def get_move(self, state, time_budget=None):
+		# With a time budget, keep searching for as long as we can afford to
+		if time_budget is not None:
+			simulations, time_limit = None, time_budget * self.__time_fraction
+		else:
+			simulations, time_limit = self.__simulations, None
+
+		if self.__ismcts and state.get_phase() == 1:
+			self.__previous = None
+			return self.information_set_search(state, simulations, time_limit)
+
+		self.__information_set = None
+
+		if self.__workers > 1 and self.__parallelism == "root":
+			self.__previous = None
+			return root_parallel_best_move(self.__pool.get(), state, self.__workers, simulations, time_limit, self.__selection, self.__policy, self.__solve)
 
-	def get_move(self, state):
 		if state.get_phase() == 1:
-			initial_board_state = state.make_assumption()
+			tree = NodePool(state.make_assumption())
 		else:
-			initial_board_state = state
-		root = Node(initial_board_state)
-		mcts = MonteCarloTreeSearch(root)
-		start_time = time.time()
-		#play_count = 1 if 10 - state.get_stock_size() == 0 else 10 - state.get_stock_size()
-		#number_of_simulations = int(5000 / play_count) if int(5000 / play_count) > 500 else 500
-		#print(number_of_simulations)
-		best_move = mcts.best_move(5000)
-		end_time = time.time()
-		print(end_time - start_time)
-		
+			tree = self.reuse_tree(state)
+
+		if self.__workers > 1:
+			mcts = MonteCarloTreeSearch(tree, self.__pool.get(), [self.__leaf_batch] * self.__workers, selection=self.__selection, policy=self.__policy, solve=self.__solve)
+		else:
+			mcts = MonteCarloTreeSearch(tree, selection=self.__selection, policy=self.__policy, solve=self.__solve)
+
+		best_move = mcts.best_move(simulations, time_limit)
+
+		# The tree of a determinized phase 1 state only holds guesses, so
+		# we only keep perfect information trees for the next move
+		self.__previous = None
+		if state.get_phase() == 2:
+			self.__previous = (tree, tree.child_for(tree.root, best_move), tree.state.next(best_move))
+
+		return best_move
+
+	def reuse_tree(self, state):
+		"""
+		Continues the search from the tree built for our previous move, if the given state
+		follows from it. The node of the move we played is searched for the given state, a few
+		moves deep to cover the opponent's replies. All simulations below it are kept.
+		:param State state: The current (perfect information) state
+		:return: The tree to search in, with the node of the given state as its root
+		"""
+		if self.__previous is not None:
+			tree, node, node_state = self.__previous
+
+			# Between two of our moves, the opponent plays at most three: following our
+			# card, a trump jack exchange, and leading the next trick
+			found = tree.find_descendant(node, node_state, state, 3)
+			if found is not None:
+				tree.reroot(found, state.clone())
+				return tree
+
+		return NodePool(state)
+
+	def information_set_search(self, state, simulations, time_limit):
+		"""
+		Searches for a phase 1 move with information set MCTS, in worlds that agree with what the
+		opponent's play has told us. When we can tell which moves were played since our previous
+		move, the search continues in the matching part of its tree.
+		:param State state: The current (imperfect information) state
+		:param int simulations: The number of iterations, None for no limit
+		:param float time_limit: The number of seconds the search may take, None for no limit
+		:return: The move to play
+		"""
+		self.__belief.update(state)
+
+		if self.__workers > 1:
+			self.__information_set = None
+			return ismcts_root_parallel_best_move(self.__pool.get(), state, self.__workers, simulations, time_limit, selection=self.__selection, weights=self.__belief.weights(state), policy=self.__policy, solve=self.__solve)
+
+		tree = None
+		if self.__information_set is not None:
+			previous_state, previous_move, previous_tree = self.__information_set
+			moves = moves_since(previous_state, previous_move, state)
+			node = previous_tree.descend(moves) if moves is not None else None
+			if node is not None:
+				previous_tree.reroot(node)
+				tree = previous_tree
+
+		search = ISMCTS(state, tree, selection=self.__selection, sampler=self.__belief.sampler(state), policy=self.__policy, solve=self.__solve)
+		best_move = search.best_move(simulations, time_limit)
+
+		self.__information_set = (state, best_move, search.tree)
 		return best_move
 
 		#else: # MinMax /w Alpha-Beta
 		#	_, move = self.value(state)
 		#	return move
 
+	def start(self):
+		"""
+		Starts the worker processes of the parallel search, if the bot has one. The engine calls
+		this before the game, so that it does not count against the time of the first move.
+		"""
+		if self.__pool is not None:
+			self.__pool.start()
+
+	def close(self):
+		"""
+		Stops the worker processes of the parallel search, if the bot has one
+		"""
+		if self.__pool is not None:
+			self.__pool.close()
+
 	def value(self, state, alpha=float('-inf'), beta=float('inf'), depth = 0):
 		"""
 		Return the value of this state and the associated move
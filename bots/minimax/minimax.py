@@ -4,7 +4,7 @@
 
 """
 
-from api import State, util
+from api import State, util, transposition
 import random
 
 class Bot:
@@ -20,10 +20,20 @@ class Bot:
         self.__randomize = randomize
         self.__max_depth = depth
 
+        # Kept for the whole game, positions often come back in the searches of later moves
+        self.__table = transposition.TranspositionTable()
+
+        # The number of positions searched by the last call to get_move
+        self.nodes = 0
+
     def get_move(self, state):
         # type: (State) -> tuple[int, int]
 
-        val, move = self.value(state)
+        self.__table.new_search()
+        self.nodes = 0
+
+        # The search plays moves on the state in place, so we work on a copy of it
+        val, move = self.value(state.clone())
 
         return move
 
@@ -35,6 +45,7 @@ class Bot:
         :param depth:
         :return: A tuple containing the value of this state, and the best move for the player currently to move
         """
+        self.nodes += 1
 
         if state.finished():
             winner, points = state.winner()
@@ -43,6 +54,15 @@ class Bot:
         if depth == self.__max_depth:
             return heuristic(state)
 
+        # Without pruning, every value in the table is exact. It can be used if it
+        # was searched at least as deep as we would search the position now.
+        remaining = self.__max_depth - depth
+        key = transposition.key(state)
+        entry = self.__table.lookup(key)
+
+        if entry is not None and entry[2] >= remaining:
+            return entry[0], entry[3]
+
         moves = state.moves()
 
         if self.__randomize:
@@ -53,11 +73,10 @@ class Bot:
 
         for move in moves:
 
-            next_state = state.next(move)
-
-            # IMPLEMENT: Add a recursive function call so that 'value' will contain the
-            # minimax value of 'next_state'
-            value = self.value(next_state, depth+1)
+            # Play the move in place, and take it back once its subtree has been searched
+            state.apply(move)
+            value, _ = self.value(state, depth+1)
+            state.undo()
 
             if maximizing(state):
                 if value > best_value:
@@ -68,6 +87,8 @@ class Bot:
                     best_value = value
                     best_move = move
 
+        self.__table.store(key, best_value, transposition.EXACT, remaining, best_move)
+
         return best_value, best_move
 
 def maximizing(state):
@@ -6,8 +6,8 @@ A basic adaptive bot. This is part of the third worksheet.
 
 from api import State, util
 import random, os
-from itertools import chain
 
+import numpy as np
 import joblib
 
 # Path of the model we will use. If you make a model
@@ -41,50 +41,42 @@ class Bot:
         :return: val, move: the value of the state, and the best move.
         """
 
-        best_value = float('-inf') if maximizing(state) else float('inf')
-        best_move = None
-
         moves = state.moves()
 
         if self.__randomize:
             random.shuffle(moves)
 
-        for move in moves:
-
-            next_state = state.next(move)
+        # The states after every move, encoded in the rows of one array, are valued with a single prediction
+        next_states = np.zeros((len(moves), FEATURES))
+        for i, move in enumerate(moves):
+            encode(state.next(move), next_states[i])
 
-            # IMPLEMENT: Add a function call so that 'value' will
-            # contain the predicted value of 'next_state'
-            # NOTE: This is different from the line in the minimax/alphabeta bot
-            value = ???
+        values = self.predict(next_states)
 
-            if maximizing(state):
-                if value > best_value:
-                    best_value = value
-                    best_move = move
-            else:
-                if value < best_value:
-                    best_value = value
-                    best_move = move
+        # The first of the best moves, so that ties go to a random one when the moves are shuffled
+        best = int(np.argmax(values)) if maximizing(state) else int(np.argmin(values))
 
-        return best_value, best_move
-
-    def heuristic(self, state):
-
-        # Convert the state to a feature vector
-        feature_vector = [features(state)]
+        return values[best], moves[best]
 
+    def predict(self, feature_vectors):
+        """
+        :param feature_vectors: A 2-D array with a feature vector in every row
+        :return: An array with the value of every feature vector, between -1 (lost) and 1 (won)
+        """
         # These are the classes: ('won', 'lost')
         classes = list(self.__model.classes_)
 
         # Ask the model for a prediction
         # This returns a probability for each class
-        prob = self.__model.predict_proba(feature_vector)[0]
+        prob = self.__model.predict_proba(feature_vectors)
 
         # Weigh the win/loss outcomes (-1 and 1) by their probabilities
-        res = -1.0 * prob[classes.index('lost')] + 1.0 * prob[classes.index('won')]
+        return -1.0 * prob[:, classes.index('lost')] + 1.0 * prob[:, classes.index('won')]
+
+    def heuristic(self, state):
 
-        return res
+        # Convert the state to a feature vector
+        return self.predict(features(state)[None, :])[0]
 
 def maximizing(state):
     """
@@ -95,97 +87,71 @@ def maximizing(state):
     return state.whose_turn() == 1
 
 
+# The layout of the feature vector, see features(). The offsets are those of the vectors the
+# models were trained on, so models made with train-ml-bot.py keep working.
+_PERSPECTIVE = 0        # 20 cards, each one-hot over the card states of _CARD_STATES
+_POINTS = 120           # The points of both players, as a fraction of their sum
+_PENDING_POINTS = 122   # The pending points of both players, as a fraction of their sum
+_TRUMP_SUIT = 124       # One-hot over C, D, H, S
+_PHASE = 128            # One-hot over phase 1 and 2
+_STOCK_SIZE = 130       # The stock size divided by 10
+_LEADER = 131           # One-hot over player 1 and 2
+_WHOSE_TURN = 133       # One-hot over player 1 and 2
+_OPPONENTS_CARD = 135   # One-hot over the 20 cards, and none played
+
+# The length of a feature vector
+FEATURES = 156
+
+_CARD_STATES = {"U": 0, "S": 1, "P1H": 2, "P2H": 3, "P1W": 4, "P2W": 5}
+_SUITS = {"C": 0, "D": 1, "H": 2, "S": 3}
+
 def features(state):
-    # type: (State) -> tuple[float, ...]
+    # type: (State) -> numpy.ndarray
     """
-    Extract features from this state. Remember that every feature vector returned should have the same length.
+    Extract features from this state. Every feature vector has the same length, FEATURES.
 
     :param state: A state to be converted to a feature vector
-    :return: A tuple of floats: a feature vector representing this state.
+    :return: A 1-D float array: a feature vector representing this state.
     """
+    return encode(state, np.zeros(FEATURES))
 
-    feature_set = []
-
-    # Add player 1's points to feature set
-    p1_points = ???
-
-    # Add player 2's points to feature set
-    p2_points = ???
-
-    # Add player 1's pending points to feature set
-    p1_pending_points = ???
-
-    # Add plauer 2's pending points to feature set
-    p2_pending_points = ???
-
-    # Get trump suit
-    trump_suit = ???
-
-    # Add phase to feature set
-    phase = ???
-
-    # Add stock size to feature set
-    stock_size = ???
-
-    # Add leader to feature set
-    leader = ???
-
-    # Add whose turn it is to feature set
-    whose_turn = ???
-
-    # Add opponent's played card to feature set
-    opponents_played_card = ???
-
-
-    ################## You do not need to do anything below this line ########################
+def encode(state, row):
+    # type: (State, numpy.ndarray) -> numpy.ndarray
+    """
+    Writes the feature vector of a state into a row of a preallocated array, for instance
+    a row of the 2-D array of all states whose values are predicted at once.
 
-    perspective = state.get_perspective()
+    :param state: A state to be converted to a feature vector
+    :param row: A 1-D array of length FEATURES, filled with zeros
+    :return: The row
+    """
+    opponents_played_card = state.get_opponents_played_card()
 
-    # Perform one-hot encoding on the perspective.
+    # The columns of all one-hot encoded features are set at once. Card i of the perspective has its columns at 6i to 6i + 5.
     # Learn more about one-hot here: https://machinelearningmastery.com/how-to-one-hot-encode-sequence-data-in-python/
-    perspective = [card if card != 'U'   else [1, 0, 0, 0, 0, 0] for card in perspective]
-    perspective = [card if card != 'S'   else [0, 1, 0, 0, 0, 0] for card in perspective]
-    perspective = [card if card != 'P1H' else [0, 0, 1, 0, 0, 0] for card in perspective]
-    perspective = [card if card != 'P2H' else [0, 0, 0, 1, 0, 0] for card in perspective]
-    perspective = [card if card != 'P1W' else [0, 0, 0, 0, 1, 0] for card in perspective]
-    perspective = [card if card != 'P2W' else [0, 0, 0, 0, 0, 1] for card in perspective]
-
-    # Append one-hot encoded perspective to feature_set
-    feature_set += list(chain(*perspective))
-
-    # Append normalized points to feature_set
+    ones = [_PERSPECTIVE + 6 * card + _CARD_STATES[card_state] for card, card_state in enumerate(state.get_perspective())]
+    ones += [
+        _TRUMP_SUIT + _SUITS[state.get_trump_suit()],
+        _PHASE + state.get_phase() - 1,
+        _LEADER + state.leader() - 1,
+        _WHOSE_TURN + state.whose_turn() - 1,
+        _OPPONENTS_CARD + (opponents_played_card if opponents_played_card is not None else 20)
+    ]
+    row[ones] = 1.
+
+    # Normalized points and pending points
+    p1_points, p2_points = state.get_points(1), state.get_points(2)
     total_points = p1_points + p2_points
-    feature_set.append(p1_points/total_points if total_points > 0 else 0.)
-    feature_set.append(p2_points/total_points if total_points > 0 else 0.)
+    if total_points > 0:
+        row[_POINTS] = p1_points / total_points
+        row[_POINTS + 1] = p2_points / total_points
 
-    # Append normalized pending points to feature_set
+    p1_pending_points, p2_pending_points = state.get_pending_points(1), state.get_pending_points(2)
     total_pending_points = p1_pending_points + p2_pending_points
-    feature_set.append(p1_pending_points/total_pending_points if total_pending_points > 0 else 0.)
-    feature_set.append(p2_pending_points/total_pending_points if total_pending_points > 0 else 0.)
-
-    # Convert trump suit to id and add to feature set
-    # You don't need to add anything to this part
-    suits = ["C", "D", "H", "S"]
-    trump_suit_onehot = [0, 0, 0, 0]
-    trump_suit_onehot[suits.index(trump_suit)] = 1
-    feature_set += trump_suit_onehot
-
-    # Append one-hot encoded phase to feature set
-    feature_set += [1, 0] if phase == 1 else [0, 1]
-
-    # Append normalized stock size to feature set
-    feature_set.append(stock_size/10)
-
-    # Append one-hot encoded leader to feature set
-    feature_set += [1, 0] if leader == 1 else [0, 1]
-
-    # Append one-hot encoded whose_turn to feature set
-    feature_set += [1, 0] if whose_turn == 1 else [0, 1]
+    if total_pending_points > 0:
+        row[_PENDING_POINTS] = p1_pending_points / total_pending_points
+        row[_PENDING_POINTS + 1] = p2_pending_points / total_pending_points
 
-    # Append one-hot encoded opponent's card to feature set
-    opponents_played_card_onehot = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-    opponents_played_card_onehot[opponents_played_card if opponents_played_card is not None else 20] = 1
-    feature_set += opponents_played_card_onehot
+    row[_STOCK_SIZE] = state.get_stock_size() / 10
 
-    # Return feature set
-    return feature_set
+    return row
@@ -6,8 +6,9 @@ RdeepBot - This bot looks ahead by following a random path down the game tree. T
 """
 
 # Import the API objects
-from api import State, util
+from api import State, Sampler, util, endgame, batch
 import random
+import numpy as np
 
 
 class Bot:
@@ -16,13 +17,27 @@ class Bot:
 	__num_samples = -1
 	# How deep to sample
 	__depth = -1
+	# With an endgame solver, samples are played out until the solver can tell the outcome,
+	# and scored with the game points won, instead of stopping at a fixed depth
+	__solver = None
+	# Whether to choose moves with successive halving over shared worlds, see batched_move
+	__batched = False
 
-	def __init__(self, num_samples=4, depth=8):
+	def __init__(self, num_samples=4, depth=8, solve=False, batched=False):
 		self.__num_samples = num_samples
 		self.__depth = depth
+		if solve:
+			self.__solver = endgame.Solver()
+		self.__batched = batched
+
+		# The number of games played out so far
+		self.rollouts = 0
 
 	def get_move(self, state):
 
+		if self.__batched:
+			return self.batched_move(state)
+
 		# See if we're player 1 or 2
 		player = state.whose_turn()
 
@@ -36,14 +51,13 @@ class Bot:
 		best_score = float("-inf")
 		best_move = None
 
-		scores = [0.0] * len(moves)
+		# If we are in an imperfect information state, we make assumptions, all drawn from one sampler
+		sampler = Sampler(state) if state.get_phase() == 1 else None
 
 		for move in moves:
 			for s in range(self.__num_samples):
 
-				# If we are in an imperfect information state, make an assumption.
-
-				sample_state = state.make_assumption() if state.get_phase() == 1 else state
+				sample_state = sampler.sample() if sampler is not None else state
 
 				score = self.evaluate(sample_state.next(move), player)
 
@@ -53,6 +67,71 @@ class Bot:
 		#print(state.get_prev_trick())
 		return best_move # Return the best scoring move
 
+	def batched_move(self, state):
+		"""
+		Chooses a move with successive halving. All candidate moves are played out in the same
+		worlds (the same guesses of the opponent's cards), once per world and with the same random
+		numbers, so that the differences between their scores come from the moves themselves. The
+		first round plays every move out in num_samples worlds. After every round, the worse half
+		of the moves is dropped and the others are played out in as many new worlds as they have
+		been played in so far.
+		:param State state: The state to move in
+		:return: The move with the best total score in the last round
+		"""
+		player = state.whose_turn()
+		moves = state.moves()
+
+		# As in get_move, ties go to a random move: the sort below keeps the shuffled order of equal scores
+		random.shuffle(moves)
+
+		if len(moves) == 1:
+			return moves[0]
+
+		sampler = Sampler(state) if state.get_phase() == 1 else None
+		scores = dict.fromkeys(moves, 0.0)
+		new_worlds = self.__num_samples
+
+		while len(moves) > 1:
+			# sample() reuses one state for every draw, samples() returns copies
+			worlds = sampler.samples(new_worlds) if sampler is not None else [state] * new_worlds
+
+			# All moves are played out in one batch, in which the games of a world repeat every len(worlds) games
+			results = self.playouts([world.next(move) for move in moves for world in worlds], player, len(worlds))
+			for move, result in zip(moves, results):
+				scores[move] += result
+
+			moves = sorted(moves, key=scores.get, reverse=True)[:(len(moves) + 1) // 2]
+			new_worlds *= 2
+
+		return moves[0]
+
+	def playouts(self, states, player, period):
+		"""
+		Plays all given states out, in a batch, and scores them for the given player. The random
+		numbers of the playouts repeat after every period states (common random numbers).
+		:param list states: Perfect information states, a multiple of period
+		:param int player: The player to score the games for
+		:param int period: The number of states after which the random numbers repeat
+		:return: The total score of every period states
+		"""
+		self.rollouts += len(states)
+		seed = random.getrandbits(32)
+
+		if self.__solver is not None:
+			scores = np.zeros(len(states))
+			for i, state in enumerate(states):
+				winner, points = endgame.playout(state, self.__solver, random.Random(seed + i % period))
+				scores[i] = points if winner == player else -points
+		else:
+			games = batch.rollout(states, seed, self.__depth, period)
+
+			# util.ratio_points of every game
+			own = games.get_points(player)
+			total = own + games.get_points(util.other(player))
+			scores = np.where(total > 0, own / np.maximum(total, 1), 0.0)
+
+		return scores.reshape(-1, period).sum(axis=1)
+
 	def evaluate(self,
 				 state,     # type: State
 				 player     # type: int
@@ -70,14 +149,15 @@ class Bot:
 
 		for _ in range(self.__num_samples):
 
-			st = state.clone()
+			self.rollouts += 1
 
-			# Do some random moves
-			for i in range(self.__depth):
-				if st.finished():
-					break
+			if self.__solver is not None:
+				winner, points = endgame.playout(state, self.__solver, random)
+				score += points if winner == player else -points
+				continue
 
-				st = st.next(random.choice(st.moves()))
+			# Do some random moves
+			st = state.rollout(random, max_depth=self.__depth)
 
 			score += self.heuristic(st, player)
 
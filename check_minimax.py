@@ -1,5 +1,12 @@
 """
-Check that the minmax bot and alpha beta bot return the same judgement, and that alphabeta bot is faster
+Check that the minmax bot and alpha beta bot return the same judgement, and that alphabeta bot is faster.
+Alphabeta is checked both without move ordering (before) and with iterative deepening and move ordering (after),
+and for each the number of positions searched and the effective branching factor are reported.
+
+At this depth the trees are small. In phase 1 the ordering searches far fewer positions and that makes it
+faster. In phase 2 it only wins on the number of positions, if at all: the shallower iterations and the
+sorting of the moves cost more than the few cutoffs they add, so it is slower there. The ordering pays off
+on time in deeper searches, where a cutoff saves a whole subtree.
 
 """
 
@@ -11,39 +18,65 @@ from bots.minimax import minimax
 
 REPEATS = 3
 DEPTH = 4
+PHASES = [1, 2]
 
-ab = alphabeta.Bot(randomize=False, depth=DEPTH)
 mm = minimax.Bot(randomize=False, depth=DEPTH)
+bots = [
+    ('Alphabeta (before)', alphabeta.Bot(randomize=False, depth=DEPTH, ordering=False)),
+    ('Alphabeta (after)', alphabeta.Bot(randomize=False, depth=DEPTH))
+]
+
+# Judges the moves: with a move played, minimax to one less depth gives its value
+judge = minimax.Bot(randomize=False, depth=DEPTH - 1)
+
+def move_value(state, move):
+    return judge.value(state.next(move))[0]
+
+# The effective branching factor b is the one for which a full tree to the same depth has as many nodes
+def branching_factor(nodes):
+    return (nodes / float(REPEATS * REPEATS)) ** (1.0 / DEPTH)
+
+def check(phase):
+    mm_time = 0
+    mm_nodes = 0
+    times = [0] * len(bots)
+    nodes = [0] * len(bots)
 
-mm_time = 0
-ab_time = 0
+    # Repeat
+    for r in range(REPEATS):
 
-# Repeat
-for r in range(REPEATS):
-    
-    # Repeat some more 
-    for r2 in range(REPEATS):
+        # Repeat some more
+        for r2 in range(REPEATS):
 
-        # Generate a starting state
-        state = State.generate(phase=2)
+            # Generate a starting state
+            state = State.generate(phase=phase)
 
-        # Ask both bots their move
-        # (and time their responses)
+            # Ask the bots their move
+            # (and time their responses)
 
-        start = time.time()
-        mm_move = mm.get_move(state)
-        mm_time += (time.time() - start)
+            start = time.time()
+            mm_move = mm.get_move(state)
+            mm_time += (time.time() - start)
+            mm_nodes += mm.nodes
 
-        start = time.time()
-        ab_move = ab.get_move(state)
-        ab_time += (time.time() - start)
+            for i, (name, ab) in enumerate(bots):
+                start = time.time()
+                ab_move = ab.get_move(state)
+                times[i] += (time.time() - start)
+                nodes[i] += ab.nodes
 
+                # Moves of equal value are equally good, the ordering decides which one is found first
+                if mm_move != ab_move and move_value(state, mm_move) != move_value(state, ab_move):
+                    print('Difference of opinion! Minimax said: {}, {} said: {}. State: {}'.format(mm_move, name, ab_move, state))
+                else:
+                    print('{} agreed.'.format(name))
 
-        if mm_move != ab_move:
-            print('Difference of opinion! Minimax said: {}, alphabeta said: {}. State: {}'.format(mm_move, ab_move, state))
-        else:
-            print('Agreed.')
+    print('Done. time Minimax: {}, nodes: {}, effective branching factor: {:.2f}.'.format(mm_time/REPEATS, mm_nodes, branching_factor(mm_nodes)))
 
-print('Done. time Minimax: {}, time Alphabeta: {}.'.format(mm_time/REPEATS, ab_time/REPEATS))
-print('Alphabeta speedup: {} '.format(mm_time/ab_time))
+    for i, (name, ab) in enumerate(bots):
+        print('{}: time: {}, nodes: {}, effective branching factor: {:.2f}, speedup: {}'.format(
+            name, times[i]/REPEATS, nodes[i], branching_factor(nodes[i]), mm_time/times[i]))
 
+for phase in PHASES:
+    print('Phase {}:'.format(phase))
+    check(phase)
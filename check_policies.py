@@ -0,0 +1,76 @@
+"""
+Compare the rollout policies of api.policies. For every policy this reports what a playout costs,
+relative to a random one, and the quality of the moves that perfect information MCTS chooses with
+it in a fixed amount of CPU time. The decisions are made in phase 2, where the exact solver tells
+the value of every move: a move is optimal if it keeps the value of the position, and its loss is
+the number of game points it gives away.
+
+"""
+
+from api import State, policies
+from api.endgame import Solver
+from bots.mcboy.Node import NodePool
+from bots.mcboy.MonteCarloTreeSearch import MonteCarloTreeSearch
+import random, time
+
+STATES = 40
+PLAYOUTS = 1000
+BUDGETS = [0.01, 0.05]
+
+solver = Solver()
+
+def playout_time(policy):
+    rng = random.Random(0)
+    states = [State.generate(id=s) for s in range(20)]
+
+    # The fastest of a few runs, the others were disturbed by something else
+    times = []
+    for r in range(3):
+        start = time.process_time()
+        for p in range(PLAYOUTS):
+            states[p % len(states)].rollout(rng, policy)
+        times.append((time.process_time() - start) / PLAYOUTS)
+    return min(times)
+
+def move_values(state):
+    # The value of every move for the player to move
+    sign = 1 if state.whose_turn() == 1 else -1
+    return {move: sign * solver.value(state.next(move)) for move in state.moves()}
+
+# Phase 2 positions from games played at random up to a few moves in, in which the choice matters
+def positions():
+    rng = random.Random(1)
+    result = []
+    while len(result) < STATES:
+        state = State.generate(id=rng.randrange(100000), phase=2)
+        for m in range(rng.randrange(4)):
+            state = state.next(rng.choice(state.moves()))
+        if not state.finished() and len(set(move_values(state).values())) > 1:
+            result.append(state)
+    return result
+
+def decisions(policy, budget, states, values):
+    random.seed(2)
+    optimal = 0
+    loss = 0
+
+    for state, value in zip(states, values):
+        move = MonteCarloTreeSearch(NodePool(state), policy=policy).best_move(time_limit=budget)
+        best = max(value.values())
+        optimal += value[move] == best
+        loss += best - value[move]
+
+    return optimal / float(len(states)), loss / float(len(states))
+
+states = positions()
+values = [move_values(state) for state in states]
+random_time = playout_time(policies.uniform)
+
+print("{:<16}{:>14}".format("Policy", "Playout cost") + "".join("{:>22}".format("{:.2f}s: optimal, loss".format(budget)) for budget in BUDGETS))
+
+for name, policy in policies.POLICIES.items():
+    line = "{:<16}{:>13.2f}x".format(name, playout_time(policy) / random_time)
+    for budget in BUDGETS:
+        optimal, loss = decisions(policy, budget, states, values)
+        line += "{:>15.0%}, {:.2f}".format(optimal, loss)
+    print(line)
@@ -29,7 +29,11 @@ def call_engine(options):
         print('   Start state: ' + str(state))
 
     # Play the game
-    engine.play(player1, player2, state=state, max_time=options.max_time*1000, verbose=(not options.quiet))
+    try:
+        engine.play(player1, player2, state=state, max_time=options.max_time*1000, verbose=(not options.quiet), persistent=options.persistent)
+    finally:
+        engine.close_player(player1)
+        engine.close_player(player2)
 
 if __name__ == "__main__":
 
@@ -67,6 +71,11 @@ if __name__ == "__main__":
                         default=None)
 
 
+    parser.add_argument("--persistent",
+                        dest="persistent",
+                        action="store_true",
+                        help="Keep each bot in one worker process for the whole game, instead of starting a new process for every move. The time limit is enforced in the same way.")
+
     options = parser.parse_args()
 
     call_engine(options)
\ No newline at end of file
@@ -0,0 +1,64 @@
+from unittest import TestCase
+from api import State
+from api.endgame import Solver
+from bots.alphabeta import alphabeta
+from bots.minimax import minimax
+import time
+
+
+class TestAlphabeta(TestCase):
+
+	def test_ordering_finds_best_moves(self):
+		ordered = alphabeta.Bot(randomize=False, depth=4)
+		unordered = alphabeta.Bot(randomize=False, depth=4, ordering=False)
+		judge = minimax.Bot(randomize=False, depth=3)
+
+		for seed in range(20):
+			state = State.generate(seed, phase=1 + seed % 2)
+
+			# Moves of equal value may differ, but not the value of the move found
+			values = [judge.value(state.next(bot.get_move(state)))[0] for bot in (ordered, unordered)]
+			self.assertEqual(values[0], values[1])
+
+	def test_ordering_searches_fewer_nodes(self):
+		ordered = alphabeta.Bot(randomize=False, depth=6)
+		unordered = alphabeta.Bot(randomize=False, depth=6, ordering=False)
+		nodes = [0, 0]
+
+		for seed in range(10):
+			state = State.generate(seed, phase=1)
+			for i, bot in enumerate((ordered, unordered)):
+				bot.get_move(state)
+				nodes[i] += bot.nodes
+
+		self.assertLess(nodes[0], nodes[1])
+
+	def test_time_budget(self):
+		bot = alphabeta.Bot()
+		state = State.generate(3, phase=1)
+
+		start = time.time()
+		move = bot.get_move(state, time_budget=0.2)
+
+		self.assertIn(move, state.moves())
+		self.assertLess(time.time() - start, 0.5)
+
+	def test_time_budget_solves_endgames(self):
+		# With time to spare, the search deepens to the end of the game
+		bot = alphabeta.Bot(randomize=False)
+		solver = Solver()
+
+		for seed in range(5):
+			state = State.generate(seed, phase=2)
+			move = bot.get_move(state, time_budget=10.0)
+			self.assertEqual(solver.value(state.next(move)), solver.value(state))
+
+	def test_static_score(self):
+		state = State.generate(0)
+		moves = state.moves()
+		marriages = [move for move in moves if move[1] is not None]
+
+		for marriage in marriages:
+			for move in moves:
+				if move[0] is not None and move[1] is None:
+					self.assertGreater(alphabeta.static_score(state, marriage), alphabeta.static_score(state, move))
@@ -0,0 +1,72 @@
+from unittest import TestCase
+from api import State
+import random
+
+
+class TestApplyUndo(TestCase):
+
+	def test_apply_matches_next(self):
+		rng = random.Random(0)
+
+		for seed in range(50):
+			state = State.generate(seed)
+			walker = state.clone()
+
+			while not state.finished():
+				move = rng.choice(state.moves())
+				state = state.next(move)
+				walker.apply(move)
+
+				self.assertEqual(walker, state)
+				self.assertEqual(walker.get_perspective(1), state.get_perspective(1))
+				self.assertEqual(walker.get_perspective(2), state.get_perspective(2))
+
+	def test_undo_restores_every_position(self):
+		rng = random.Random(1)
+
+		for seed in range(50):
+			state = State.generate(seed)
+			history = [state.clone()]
+
+			while not state.finished():
+				state.apply(rng.choice(state.moves()))
+				history.append(state.clone())
+
+			# Walk back up to the starting position, checking every position on the way
+			for position in reversed(history[:-1]):
+				state.undo()
+				self.assertEqual(state, position)
+				self.assertEqual(state.moves(), position.moves())
+				self.assertEqual(state.get_prev_trick(), position.get_prev_trick())
+				self.assertEqual(state.get_perspective(1), position.get_perspective(1))
+				self.assertEqual(state.get_perspective(2), position.get_perspective(2))
+				self.assertEqual(state.get_deck().get_stock(), position.get_deck().get_stock())
+
+	def test_undo_revoked_move(self):
+		state = State.generate(4)
+		before = state.clone()
+
+		# A card in the opponent's hand is never a legal move
+		opponent_card = [i for i, card in enumerate(state.get_perspective()) if card == "P{}H".format(3 - state.whose_turn())][0]
+
+		state.apply((opponent_card, None))
+		self.assertEqual(state.revoked(), before.whose_turn())
+
+		state.undo()
+		self.assertEqual(state, before)
+
+		# The same when following, and for a trump jack exchange that cannot be made
+		state.apply(state.moves()[0])
+		before = state.clone()
+		leader_card = state.get_deck().get_player_hand(3 - state.whose_turn())[0]
+		for move in [(leader_card, None), (None, 4)]:
+			state.apply(move)
+			self.assertIsNotNone(state.revoked())
+			state.undo()
+			self.assertEqual(state, before)
+			self.assertEqual(state.get_perspective(1), before.get_perspective(1))
+			self.assertEqual(state.get_perspective(2), before.get_perspective(2))
+
+	def test_undo_without_apply(self):
+		state = State.generate(4)
+		self.assertRaises(RuntimeError, state.undo)
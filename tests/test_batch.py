@@ -0,0 +1,78 @@
+from unittest import TestCase
+from api import State, batch
+import random
+
+import numpy as np
+
+
+class TestBatch(TestCase):
+
+	def test_move_codes(self):
+		for code in range(32):
+			self.assertEqual(batch.to_code(batch.to_move(code)), code)
+
+	def test_batch_matches_state(self):
+		# Play the same random games in a batch and with State, and compare them after every move
+		rng = random.Random(0)
+		states = [State.generate(seed, phase=1 if seed % 3 else 2) for seed in range(40)]
+		games = batch.Batch(states)
+
+		while not all(state.finished() for state in states):
+			legal = games.moves()
+
+			indices = []
+			codes = []
+
+			for i, state in enumerate(states):
+				if state.finished():
+					continue
+
+				moves = state.moves()
+				self.assertEqual(sorted(batch.to_code(move) for move in moves), list(np.flatnonzero(legal[i])))
+
+				move = rng.choice(moves)
+				states[i] = state.next(move)
+
+				indices.append(i)
+				codes.append(batch.to_code(move))
+
+			games.apply(indices, codes)
+
+			self.assertEqual(list(games.finished()), [state.finished() for state in states])
+			self.assertEqual(list(games.get_points(1)), [state.get_points(1) for state in states])
+			self.assertEqual(list(games.get_points(2)), [state.get_points(2) for state in states])
+			self.assertEqual(list(games.whose_turn()), [state.whose_turn() for state in states])
+
+		winner, points = games.winner()
+		self.assertEqual(list(zip(winner, points)), [state.winner() for state in states])
+
+	def test_rollout(self):
+		state = State.generate(2)
+		samples = [state.clone(signature=state.whose_turn()).make_assumption() for i in range(100)]
+
+		games = batch.rollout(samples, rng=0)
+		winner, points = games.winner()
+
+		self.assertTrue(games.finished().all())
+		self.assertTrue(((winner == 1) | (winner == 2)).all())
+		self.assertTrue(((points >= 1) & (points <= 3)).all())
+
+		# The same seed gives the same outcomes
+		self.assertEqual(list(batch.rollout(samples, rng=0).winner()[0]), list(winner))
+
+	def test_rollout_max_depth(self):
+		games = batch.rollout([State.generate(seed) for seed in range(10)], rng=0, max_depth=2)
+
+		self.assertFalse(games.finished().any())
+		self.assertEqual(list(games.winner()[0]), [0] * 10)
+
+	def test_common_random_numbers(self):
+		states = [State.generate(seed) for seed in range(10)]
+
+		# Three copies of the same games, played with the same random numbers, end the same
+		games = batch.rollout(states * 3, rng=0, period=len(states))
+		winner, points = games.winner()
+
+		self.assertEqual(list(winner[:10]), list(winner[10:20]))
+		self.assertEqual(list(winner[:10]), list(winner[20:]))
+		self.assertEqual(list(games.get_points(1)[:10]), list(games.get_points(1)[20:]))
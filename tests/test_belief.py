@@ -0,0 +1,122 @@
+from unittest import TestCase
+from api import State, Belief, Sampler
+import random
+
+
+class TestBelief(TestCase):
+
+	def play(self, state, rng):
+		# Random play, except that a leader always melds the marriages they can
+		moves = state.moves()
+		marriages = [move for move in moves if move[1] is not None]
+		played = rng.choice(moves)
+		for marriage in marriages:
+			if marriage[0] == played[0]:
+				return marriage
+		return played
+
+	def test_constraints_hold(self):
+		rng = random.Random(0)
+		constrained = 0
+
+		for seed in range(300):
+			state = State.generate(seed)
+			belief = Belief()
+
+			while not state.finished() and state.get_phase() == 1:
+				if state.whose_turn() == 1:
+					signed = state.clone(signature=1)
+					belief.update(signed)
+
+					hand = state.get_deck().get_player_hand(2)
+					for card, weight in belief.weights(signed).items():
+						self.assertTrue(0 <= weight <= 1)
+						if weight == 0:
+							constrained += 1
+							self.assertNotIn(card, hand)
+
+				state = state.next(self.play(state, rng))
+
+		# The games must have put the constraints to the test
+		self.assertGreater(constrained, 10)
+
+	def test_sampler_respects_constraints(self):
+		rng = random.Random(1)
+
+		for seed in range(300):
+			state = State.generate(seed)
+			belief = Belief()
+
+			while not state.finished() and state.get_phase() == 1:
+				if state.whose_turn() == 1:
+					signed = state.clone(signature=1)
+					belief.update(signed)
+
+					excluded = [card for card, weight in belief.weights(signed).items() if weight == 0]
+					if excluded:
+						sampler = belief.sampler(signed)
+						for i in range(20):
+							hand = sampler.sample(rng).get_deck().get_player_hand(2)
+							for card in excluded:
+								self.assertNotIn(card, hand)
+						return
+
+				state = state.next(self.play(state, rng))
+
+		self.fail("No game gave a constraint to sample with")
+
+	def test_weights_favour_likely_cards(self):
+		state = State.generate(5)
+		signed = state.clone(signature=state.whose_turn())
+		perspective = signed.get_perspective()
+		unknown = [card for card in range(20) if perspective[card] == "U"]
+
+		# A card with a low weight ends up in the opponent's hand less often than the others
+		sampler = Sampler(signed, {unknown[0]: 0.1})
+		rng = random.Random(2)
+		opponent = 3 - state.whose_turn()
+		counts = [0] * 20
+		for i in range(2000):
+			for card in sampler.sample(rng).get_deck().get_player_hand(opponent):
+				counts[card] += 1
+
+		self.assertLess(counts[unknown[0]] * 3, min(counts[card] for card in unknown[1:]))
+
+	def test_new_game(self):
+		belief = Belief()
+		rng = random.Random(3)
+
+		state = State.generate(1)
+		while state.get_stock_size() > 2:
+			if state.whose_turn() == 1:
+				belief.update(state.clone(signature=1))
+			state = state.next(self.play(state, rng))
+
+		other = State.generate(2).clone(signature=1)
+		belief.update(other)
+
+		self.assertEqual(belief.weights(other), {})
+
+	def test_alternating_seats(self):
+		# A bot that plays both seats keeps one belief, and learns the same about each opponent
+		# as the beliefs of two bots that play one seat each
+		rng = random.Random(4)
+		weighted = 0
+
+		for seed in range(300):
+			state = State.generate(seed)
+			both = Belief()
+			seats = {1: Belief(), 2: Belief()}
+
+			while not state.finished() and state.get_phase() == 1:
+				signed = state.clone(signature=state.whose_turn())
+				both.update(signed)
+				seats[state.whose_turn()].update(signed)
+
+				weights = both.weights(signed)
+				self.assertEqual(weights, seats[state.whose_turn()].weights(signed))
+				weighted += len(weights)
+
+				state = state.next(self.play(state, rng))
+
+		self.assertGreater(weighted, 10)
@@ -0,0 +1,59 @@
+from unittest import TestCase
+from api import Deck, State
+import random
+
+
+class TestDeckMasks(TestCase):
+
+	def test_card_states_round_trip(self):
+		d = Deck.generate(0)
+		card_states = d.get_card_states()
+
+		self.assertEqual(Deck(card_states, d.get_stock(), d.get_perspective(1), d.get_perspective(2)).get_card_states(), card_states)
+		self.assertEqual(card_states.count("S"), 10)
+		self.assertEqual(card_states.count("P1H"), 5)
+		self.assertEqual(card_states.count("P2H"), 5)
+
+	def test_hand_matches_card_states(self):
+		d = Deck.generate(3)
+		card_states = d.get_card_states()
+
+		for player in (1, 2):
+			term = "P1H" if player == 1 else "P2H"
+			hand = [i for i, card in enumerate(card_states) if card == term]
+
+			self.assertEqual(d.get_player_hand(player), hand)
+			self.assertEqual(Deck.get_cards(d.get_player_hand_mask(player)), hand)
+
+	def test_perspectives_during_game(self):
+		rng = random.Random(0)
+		state = State.generate(12)
+
+		while not state.finished():
+			for player in (1, 2):
+				perspective = state.get_perspective(player)
+				actual = state.get_perspective()
+
+				# Every card known to a player must be in the known state, except for the
+				# old trump card, which the leader still sees in the stock after the last draw
+				for known, card in zip(perspective, actual):
+					if known not in ("U", "S"):
+						self.assertEqual(known, card)
+
+			state = state.next(rng.choice(state.moves()))
+
+	def test_make_assumption_is_consistent(self):
+		state = State.generate(5)
+		signed = state.clone(signature=state.whose_turn())
+		perspective = signed.get_perspective()
+
+		for i in range(20):
+			guess = signed.make_assumption().get_perspective()
+
+			self.assertEqual(guess.count("U"), 0)
+			self.assertEqual(guess.count("P1H"), 5)
+			self.assertEqual(guess.count("P2H"), 5)
+
+			for known, card in zip(perspective, guess):
+				if known != "U":
+					self.assertEqual(known, card)
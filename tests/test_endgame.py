@@ -0,0 +1,80 @@
+from unittest import TestCase
+from api import State, endgame
+import random
+
+
+def minimax(state):
+	# Plain search of the whole game tree
+	if state.finished():
+		winner, points = state.winner()
+		return points if winner == 1 else -points
+
+	values = [minimax(state.next(move)) for move in state.moves()]
+	return max(values) if state.whose_turn() == 1 else min(values)
+
+
+class TestEndgame(TestCase):
+
+	def endgames(self, n, seed=0):
+		# Phase 2 positions as they come up in games, with the stock just emptied or later
+		rng = random.Random(seed)
+		states = []
+
+		for id in range(n):
+			state = State.generate(id)
+			while not state.finished() and (state.get_phase() == 1 or rng.random() < 0.3):
+				state = state.next(rng.choice(state.moves()))
+			if not state.finished():
+				states.append(state)
+
+		return states
+
+	def test_values_are_exact(self):
+		solver = endgame.Solver()
+
+		for state in self.endgames(40):
+			self.assertEqual(solver.value(state), minimax(state))
+
+	def test_best_move_keeps_value(self):
+		solver = endgame.Solver()
+
+		for state in self.endgames(40, seed=1):
+			value, move = solver.solve(state)
+
+			self.assertIn(move, state.moves())
+			self.assertEqual(solver.value(state.next(move)) if not state.next(move).finished() else minimax(state.next(move)), value)
+
+	def test_values_are_game_points(self):
+		solver = endgame.Solver()
+
+		for state in self.endgames(40, seed=2):
+			self.assertIn(solver.value(state), (-3, -2, -1, 1, 2, 3))
+
+	def test_only_phase_2(self):
+		solver = endgame.Solver()
+		state = State.generate(1)
+
+		self.assertRaises(RuntimeError, solver.solve, state)
+		self.assertRaises(RuntimeError, solver.solve, State.generate(1, phase=2).clone(signature=1))
+
+	def test_solve_leaves_state_unchanged(self):
+		state = self.endgames(5)[0]
+		before = state.clone()
+
+		endgame.Solver().solve(state)
+
+		self.assertEqual(state, before)
+
+	def test_playout(self):
+		solver = endgame.Solver()
+		rng = random.Random(3)
+
+		# Once the stock is empty, the outcome is that of perfect play
+		for state in self.endgames(20, seed=3):
+			value = solver.value(state)
+			self.assertEqual(endgame.playout(state, solver, rng), (1, value) if value > 0 else (2, -value))
+
+		for id in range(20):
+			winner, points = endgame.playout(State.generate(id), solver, rng, cards=4)
+			self.assertIn(winner, (1, 2))
+			self.assertIn(points, (1, 2, 3))
@@ -0,0 +1,124 @@
+from unittest import TestCase
+from api import State, tables
+from bots.mcboy.ISMCTS import ISMCTS, ISNodePool, moves_since
+from bots.mcboy.Node import SELECTIONS
+import random
+
+
+class TestISMCTS(TestCase):
+
+	def test_moves_since(self):
+		rng = random.Random(0)
+
+		for seed in range(200):
+			state = State.generate(seed, phase=1 if seed % 4 else 2)
+			me = 1 + seed % 2
+			previous = None
+			played = []
+
+			while not state.finished():
+				given = state.clone(signature=state.whose_turn()) if state.get_phase() == 1 else state.clone()
+				moves = state.moves()
+
+				# Prefer marriages and trump exchanges, which are the hardest to see
+				special = [move for move in moves if move[0] is None or move[1] is not None]
+				move = rng.choice(special) if special and rng.random() < 0.7 else rng.choice(moves)
+
+				if state.whose_turn() == me:
+					if previous is not None:
+						self.assertEqual(moves_since(previous[0], previous[1], given), played)
+					previous = (given, move)
+					played = []
+
+				played.append(move)
+				state = state.next(move)
+
+	def test_moves_since_other_game(self):
+		state = State.generate(2).clone(signature=1)
+		other = State.generate(1).clone(signature=1)
+
+		self.assertIsNone(moves_since(state, state.moves()[0], other))
+
+	def test_best_move_is_legal(self):
+		random.seed(0)
+
+		for seed in range(10):
+			state = State.generate(seed)
+			signed = state.clone(signature=state.whose_turn())
+
+			self.assertIn(ISMCTS(signed).best_move(100), state.moves())
+
+	def test_reused_tree(self):
+		random.seed(0)
+		state = State.generate(6)
+		signed = state.clone(signature=state.whose_turn())
+
+		search = ISMCTS(signed)
+		move = search.best_move(200)
+		tree = search.tree
+		node = tree.child_for(tree.root, move)
+
+		# Continue after a reply of the opponent that gives the turn back to us
+		for child in tree.table[tree.row[node]]:
+			if child < 0:
+				continue
+			reply = tables.to_move(tree.move[child])
+			if reply[0] is None:
+				continue
+			after = state.next(move).next(reply)
+			if after.whose_turn() != state.whose_turn():
+				continue
+
+			given = after.clone(signature=after.whose_turn())
+			root = tree.descend(moves_since(signed, move, given))
+			self.assertEqual(root, child)
+
+			visits = tree.visits[root]
+			tree.reroot(root)
+			self.assertEqual(tree.parent[root], -1)
+			self.assertIn(ISMCTS(given, tree).best_move(50), after.moves())
+			self.assertEqual(tree.visits[root], visits + 50)
+			return
+
+		self.fail("The tree holds no reply to continue after")
+
+	def test_tree(self):
+		random.seed(1)
+		state = State.generate(3)
+		signed = state.clone(signature=state.whose_turn())
+
+		tree = ISNodePool(capacity=16)
+		ISMCTS(signed, tree).best_move(300)
+
+		# Every iteration passes through the root and one of its children
+		children = [child for child in tree.table[tree.row[tree.root]] if child >= 0]
+		self.assertEqual(tree.visits[tree.root], 300)
+		self.assertEqual(sum(tree.visits[children]), 300)
+
+		for node in range(1, tree.size):
+			parent = tree.parent[node]
+			self.assertEqual(tree.table[tree.row[parent], tree.move[node]], node)
+			# A child is available at least as often as it is visited
+			self.assertGreaterEqual(tree.availability[node], tree.visits[node])
+
+		# Only the nodes with children take a row of the table
+		self.assertEqual(tree.rows, len(set(tree.parent[1:tree.size])))
+		self.assertLess(tree.nbytes, 200 * len(tree.visits))
+
+	def test_selections(self):
+		state = State.generate(4)
+		signed = state.clone(signature=state.whose_turn())
+		visits = {}
+
+		for selection in SELECTIONS:
+			random.seed(2)
+			search = ISMCTS(signed, selection=selection)
+			self.assertIn(search.best_move(300), state.moves())
+			visits[selection] = sorted(statistics[2] for statistics in search.root_statistics())
+
+		# The formulas spread the iterations differently over the moves
+		self.assertEqual(len(set(tuple(spread) for spread in visits.values())), len(SELECTIONS))
+
+		random.seed(2)
+		with self.assertRaises(ValueError):
+			ISMCTS(signed, selection="ucb2").best_move(300)
@@ -0,0 +1,127 @@
+from unittest import TestCase
+from api import State, engine, tables
+import random
+
+
+class TestLegalMoves(TestCase):
+
+	def test_moves_are_copies(self):
+		state = State.generate(0)
+		moves = state.moves()
+		expected = list(moves)
+
+		moves.pop()
+		random.Random(0).shuffle(moves)
+		self.assertEqual(state.moves(), expected)
+
+	def test_moves_follow_the_position(self):
+		rng = random.Random(1)
+
+		for seed in range(50):
+			state = State.generate(seed)
+
+			while not state.finished():
+				move = rng.choice(state.moves())
+
+				# Moves taken back must not leave the moves of another position behind
+				state.apply(move)
+				state.moves()
+				state.undo()
+
+				# A signed copy generates its moves again
+				self.assertEqual(state.moves(), state.clone(signature=state.whose_turn()).moves())
+				state = state.next(move)
+
+	def test_validation(self):
+		rng = random.Random(2)
+
+		for seed in range(50):
+			state = State.generate(seed, phase=2)
+
+			while not state.finished():
+				legal = state.moves()
+
+				# Every pair of cards that is not a legal move revokes the game
+				for move in [(rng.randrange(20), rng.choice([None, rng.randrange(20)])), (None, rng.randrange(20))]:
+					after = state.next(move)
+					self.assertEqual(after.revoked() is not None, move not in legal)
+
+				state = state.next(rng.choice(legal))
+
+	def test_cards_outside_the_deck(self):
+		class OutsideBot:
+			def get_move(self, state):
+				return -1, None
+
+		for seed in range(10):
+			state = State.generate(seed, phase=1 if seed % 2 else 2)
+
+			# A card that does not exist revokes the game, whoever is to move
+			for move in [(-1, None), (20, None), (100, None), (-1, 3), (None, -1), (None, 20)]:
+				self.assertEqual(state.next(move).revoked(), state.whose_turn())
+
+		# The engine revokes the bot, which loses
+		state = State.generate(6)
+		winner, points = engine.play(OutsideBot(), OutsideBot(), state, verbose=False, fast=True)
+		self.assertEqual(winner, 3 - state.whose_turn())
+
+	def test_assumptions_generate_their_moves(self):
+		rng = random.Random(7)
+		checked = 0
+
+		for seed in range(100):
+			state = State.generate(seed)
+
+			while not state.finished() and state.get_phase() == 1:
+				for signature in (1, 2):
+					# The moves of a signed state only hold the cards its player can see
+					signed = state.clone(signature=signature)
+					try:
+						signed.moves()
+					except RuntimeError:
+						pass
+
+					# A copy put back in its own position generates its moves from the assumed cards
+					assumed = signed.make_assumption()
+					fresh = assumed.clone()
+					fresh.restore(fresh.snapshot())
+					self.assertEqual(assumed.moves(), fresh.moves())
+					checked += signature != state.whose_turn()
+
+				state = state.next(rng.choice(state.moves()))
+
+		self.assertGreater(checked, 100)
+
+	def test_signed_copies_do_not_see_moves(self):
+		state = State.generate(3)
+		opponent = 3 - state.whose_turn()
+		state.moves()
+
+		self.assertRaises(RuntimeError, state.clone(signature=opponent).moves)
+
+	def test_move_codes(self):
+		rng = random.Random(4)
+
+		for code in range(len(tables.MOVES)):
+			self.assertEqual(tables.to_code(tables.to_move(code)), code)
+		self.assertIsNone(tables.to_code((2, 8)))
+
+		for seed in range(50):
+			state = State.generate(seed)
+
+			while not state.finished():
+				self.assertEqual([tables.to_move(code) for code in state.move_codes()], state.moves())
+				state = state.next(rng.choice(state.moves()))
+
+	def test_engine_takes_codes(self):
+		class CodeBot:
+			def get_move(self, state):
+				return random.choice(state.move_codes())
+
+		self.assertTrue(engine.is_valid(31, None))
+		self.assertFalse(engine.is_valid(32, None))
+
+		random.seed(5)
+		state = State.generate(5)
+		winner, points = engine.play(CodeBot(), CodeBot(), state, verbose=False, fast=True)
+		self.assertIn(winner, (1, 2))
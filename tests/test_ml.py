@@ -0,0 +1,104 @@
+from unittest import TestCase
+from api import State
+from bots.ml import ml
+from itertools import chain
+import numpy as np
+import joblib
+import os, random, tempfile
+
+
+def list_features(state):
+	# The feature vector as the list based encoding of the worksheet built it, column by column
+	feature_set = []
+
+	perspective = state.get_perspective()
+	perspective = [card if card != 'U'   else [1, 0, 0, 0, 0, 0] for card in perspective]
+	perspective = [card if card != 'S'   else [0, 1, 0, 0, 0, 0] for card in perspective]
+	perspective = [card if card != 'P1H' else [0, 0, 1, 0, 0, 0] for card in perspective]
+	perspective = [card if card != 'P2H' else [0, 0, 0, 1, 0, 0] for card in perspective]
+	perspective = [card if card != 'P1W' else [0, 0, 0, 0, 1, 0] for card in perspective]
+	perspective = [card if card != 'P2W' else [0, 0, 0, 0, 0, 1] for card in perspective]
+	feature_set += list(chain(*perspective))
+
+	p1_points, p2_points = state.get_points(1), state.get_points(2)
+	total_points = p1_points + p2_points
+	feature_set.append(p1_points / total_points if total_points > 0 else 0.)
+	feature_set.append(p2_points / total_points if total_points > 0 else 0.)
+
+	p1_pending_points, p2_pending_points = state.get_pending_points(1), state.get_pending_points(2)
+	total_pending_points = p1_pending_points + p2_pending_points
+	feature_set.append(p1_pending_points / total_pending_points if total_pending_points > 0 else 0.)
+	feature_set.append(p2_pending_points / total_pending_points if total_pending_points > 0 else 0.)
+
+	trump_suit_onehot = [0, 0, 0, 0]
+	trump_suit_onehot[["C", "D", "H", "S"].index(state.get_trump_suit())] = 1
+	feature_set += trump_suit_onehot
+
+	feature_set += [1, 0] if state.get_phase() == 1 else [0, 1]
+	feature_set.append(state.get_stock_size() / 10)
+	feature_set += [1, 0] if state.leader() == 1 else [0, 1]
+	feature_set += [1, 0] if state.whose_turn() == 1 else [0, 1]
+
+	opponents_played_card = state.get_opponents_played_card()
+	opponents_played_card_onehot = [0] * 21
+	opponents_played_card_onehot[opponents_played_card if opponents_played_card is not None else 20] = 1
+	feature_set += opponents_played_card_onehot
+
+	return feature_set
+
+
+class LinearModel:
+	# A stand-in for a trained classifier: the chance of a win grows linearly with the features
+
+	classes_ = np.array(['lost', 'won'])
+
+	def __init__(self, seed):
+		self.weights = np.random.RandomState(seed).normal(size=ml.FEATURES)
+
+	def predict_proba(self, feature_vectors):
+		won = 1.0 / (1.0 + np.exp(-np.dot(feature_vectors, self.weights)))
+		return np.column_stack([1.0 - won, won])
+
+
+class TestML(TestCase):
+
+	def states(self):
+		# States of both phases, with and without a card played in the trick
+		rng = random.Random(0)
+		for seed in range(40):
+			state = State.generate(seed, phase=1 if seed % 2 else 2)
+			for m in range(rng.randrange(8)):
+				if state.finished():
+					break
+				yield state
+				state = state.next(rng.choice(state.moves()))
+
+	def test_features(self):
+		phases = set()
+
+		for state in self.states():
+			for signed in [state, state.clone(signature=state.whose_turn())] if state.get_phase() == 1 else [state]:
+				expected = list_features(signed)
+				self.assertEqual(len(expected), ml.FEATURES)
+				self.assertEqual(ml.features(signed).tolist(), expected)
+				phases.add(signed.get_phase())
+
+		self.assertEqual(phases, {1, 2})
+
+	def test_batched_predict(self):
+		with tempfile.TemporaryDirectory() as directory:
+			model_file = os.path.join(directory, 'model.pkl')
+			joblib.dump(LinearModel(1), model_file)
+			bot = ml.Bot(randomize=False, model_file=model_file)
+
+		for state in self.states():
+			moves = state.moves()
+
+			# Every state after a move valued with a prediction of its own
+			values = [bot.heuristic(state.next(move)) for move in moves]
+			best = max(values) if ml.maximizing(state) else min(values)
+
+			value, move = bot.value(state)
+			self.assertAlmostEqual(value, best)
+			self.assertEqual(move, moves[values.index(best)])
+			self.assertEqual(bot.get_move(state), move)
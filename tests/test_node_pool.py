@@ -0,0 +1,106 @@
+from unittest import TestCase
+from api import State
+from bots.mcboy.Node import NodePool, SELECTIONS
+from bots.mcboy.MonteCarloTreeSearch import MonteCarloTreeSearch
+from bots.mcboy.mcboy import Bot
+import numpy as np
+import random
+
+
+class TestNodePool(TestCase):
+
+	def test_search(self):
+		random.seed(0)
+
+		for seed in range(4):
+			state = State.generate(seed, phase=1 if seed % 2 else 2)
+			tree = NodePool(state, capacity=16)
+			move = MonteCarloTreeSearch(tree).best_move(300)
+
+			self.assertIn(move, state.moves())
+
+			# Every simulation passes through the root and one of its children
+			self.assertEqual(tree.visits[tree.root], 300)
+			self.assertEqual(sum(tree.visits[child] for child in tree.children(tree.root)), 300)
+
+			# The children of a node were played from its state
+			for child in tree.children(tree.root):
+				self.assertEqual(tree.parent[child], tree.root)
+				self.assertEqual(tree.player[child], state.whose_turn())
+
+	def test_reroot(self):
+		random.seed(1)
+		state = State.generate(1, phase=2)
+		tree = NodePool(state)
+		move = MonteCarloTreeSearch(tree).best_move(500)
+
+		node = tree.child_for(tree.root, move)
+		after = state.next(move)
+		reply = after.moves()[0]
+
+		found = tree.find_descendant(node, after.clone(), after.next(reply), 3)
+		self.assertEqual(found, tree.child_for(node, reply))
+
+		visits = tree.visits[found]
+		tree.reroot(found, after.next(reply))
+		MonteCarloTreeSearch(tree).best_move(100)
+		self.assertEqual(tree.visits[tree.root], visits + 100)
+
+	def test_selections(self):
+		random.seed(2)
+		state = State.generate(2, phase=2)
+
+		for selection in SELECTIONS:
+			tree = NodePool(state)
+			move = MonteCarloTreeSearch(tree, selection=selection).best_move(200)
+
+			self.assertIn(move, state.moves())
+			visited = [node for node in range(tree.size) if tree.visits[node] > 0]
+			self.assertTrue(np.allclose(tree.log_visits[visited], np.log(tree.visits[visited])))
+
+		self.assertRaises(ValueError, MonteCarloTreeSearch, NodePool(state), selection="ucb2")
+
+	def test_puct_follows_priors(self):
+		state = State.generate(3, phase=2)
+		codes = state.move_codes()
+		favourite = codes[1]
+
+		tree = NodePool(state, priors=lambda state, codes: [0.9 if code == favourite else 0.1 / (len(codes) - 1) for code in codes])
+		tree.expand(tree.root, state)
+		tree.backpropagate([tree.root], 1, 1)
+
+		self.assertEqual(tree.move[tree.best_child(tree.root, selection="puct")], favourite)
+
+	def test_reuse_tree(self):
+		random.seed(3)
+		bot = Bot(simulations=500, ismcts=False)
+
+		for seed in range(5):
+			state = State.generate(seed, phase=2)
+			me = state.whose_turn()
+			move = bot.get_move(state)
+
+			tree, node, node_state = bot._Bot__previous
+			before = node_state.clone()
+
+			# The opponent replies until it is our turn again
+			state = state.next(move)
+			expected = node
+			while not state.finished() and state.whose_turn() != me:
+				reply = state.moves()[0]
+				state = state.next(reply)
+				expected = tree.child_for(expected, reply)
+			if state.finished() or expected is None:
+				continue
+
+			visits = tree.visits[expected]
+			reused = bot.reuse_tree(state)
+
+			self.assertIs(reused, tree)
+			self.assertEqual(reused.root, expected)
+			self.assertEqual(reused.visits[reused.root], visits)
+			self.assertEqual(reused.state, state)
+
+			# The search walked the tree with apply and undo, which left the state of our move as it was
+			self.assertEqual(node_state, before)
+			self.assertEqual(len(node_state.moves()), len(before.moves()))
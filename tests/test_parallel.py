@@ -0,0 +1,15 @@
+from unittest import TestCase
+from api import parallel
+
+
+class TestParallel(TestCase):
+
+	def test_parallel_matches_serial(self):
+		botnames = ["rand", "bully", "rdeep"]
+		games = [((g % 3, (g + 1) % 3), g, 100 + g, 1 if g % 4 else 2) for g in range(8)]
+
+		serial = list(parallel.play_games(botnames, games, workers=1, fast=True))
+		in_parallel = list(parallel.play_games(botnames, games, workers=2, fast=True))
+
+		self.assertEqual(len(serial), len(games))
+		self.assertEqual(in_parallel, serial)
@@ -0,0 +1,70 @@
+from unittest import TestCase
+from api import State
+from bots.mcboy import MonteCarloTreeSearch as mcts, ISMCTS as ismcts
+from bots.mcboy.Node import NodePool
+from multiprocessing import Pool
+import random
+
+WORKERS = 2
+SIMULATIONS = 100
+
+# A state as a bot sees it: in phase 1, the cards of the opponent are hidden
+def generate(id, phase):
+	state = State.generate(id, phase=phase)
+	return state.clone(signature=state.whose_turn()) if phase == 1 else state
+
+
+class TestParallelSearch(TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		cls.pool = Pool(WORKERS)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.pool.close()
+		cls.pool.join()
+
+	def test_root_parallel(self):
+		random.seed(0)
+
+		for phase in [1, 2]:
+			state = generate(4, phase)
+			move = mcts.root_parallel_best_move(self.pool, state, WORKERS, SIMULATIONS)
+			self.assertIn(move, state.moves())
+
+			# Every simulation of every tree passes through one child of its root
+			tasks = [(state, SIMULATIONS, None, "ucb1", None, False, seed) for seed in range(WORKERS)]
+			values, visits = mcts.merge_statistics(self.pool.map(mcts.search_root, tasks))
+			self.assertEqual(sum(visits.values()), WORKERS * SIMULATIONS)
+			self.assertEqual(set(values), set(visits))
+			for move in visits:
+				self.assertIn(move, state.moves())
+
+	def test_ismcts_root_parallel(self):
+		random.seed(1)
+
+		for phase in [1, 2]:
+			state = generate(5, phase)
+			move = ismcts.root_parallel_best_move(self.pool, state, WORKERS, SIMULATIONS)
+			self.assertIn(move, state.moves())
+
+			tasks = [(state, SIMULATIONS, None, 2.5, "ucb1", None, None, False, seed) for seed in range(WORKERS)]
+			visits = ismcts.merge_visits(self.pool.map(ismcts.search_root, tasks))
+			self.assertEqual(sum(visits.values()), WORKERS * SIMULATIONS)
+			for move in visits:
+				self.assertIn(move, state.moves())
+
+	def test_leaf_parallel(self):
+		random.seed(2)
+		leaf_batches = [3] * WORKERS
+
+		for phase in [1, 2]:
+			state = generate(6, phase)
+			tree = NodePool(state.make_assumption() if phase == 1 else state)
+			move = mcts.MonteCarloTreeSearch(tree, self.pool, leaf_batches).best_move(SIMULATIONS)
+			self.assertIn(move, state.moves())
+
+			# Every playout of every batch is backpropagated
+			self.assertEqual(tree.visits[tree.root], SIMULATIONS * sum(leaf_batches))
+			self.assertEqual(sum(tree.visits[child] for child in tree.children(tree.root)), SIMULATIONS * sum(leaf_batches))
@@ -0,0 +1,60 @@
+from unittest import TestCase
+from api import State, engine
+from bots.rand import rand
+import os, random, time
+
+
+class PhaseBot:
+	"""
+	Plays random moves in phase 1. In phase 2 it misbehaves: it sleeps, raises, or kills its process.
+	"""
+
+	def __init__(self, fault):
+		self.fault = fault
+
+	def get_move(self, state):
+		if state.get_phase() == 2:
+			if self.fault == "sleep":
+				time.sleep(2)
+			elif self.fault == "raise":
+				raise ValueError("Crashing on purpose")
+			elif self.fault == "exit":
+				os._exit(1)
+
+		return random.choice(state.moves())
+
+
+class TestPlayerProcess(TestCase):
+
+	def setUp(self):
+		self.phase1 = State.generate(0).clone(signature=State.generate(0).whose_turn())
+		self.phase2 = State.generate(0, phase=2)
+
+	def test_late_move(self):
+		worker = engine.PlayerProcess(PhaseBot("sleep"))
+		try:
+			start = time.time()
+			self.assertEqual(worker.get_move(self.phase2, 200, False), "Late")
+			self.assertLess(time.time() - start, 1.5)
+
+			# The worker was replaced by one that answers
+			self.assertIn(worker.get_move(self.phase1, 2000, False), self.phase1.moves())
+		finally:
+			worker.close()
+
+	def test_crashing_bot(self):
+		for fault in ("raise", "exit"):
+			worker = engine.PlayerProcess(PhaseBot(fault))
+			try:
+				self.assertIsNone(worker.get_move(self.phase2, 2000, False))
+				self.assertIn(worker.get_move(self.phase1, 2000, False), self.phase1.moves())
+			finally:
+				worker.close()
+
+	def test_revoked_games(self):
+		random.seed(1)
+
+		# A late or crashing bot loses the game with 3 points, whichever seat it plays
+		for fault in ("sleep", "raise", "exit"):
+			self.assertEqual(engine.play(PhaseBot(fault), rand.Bot(), State.generate(1, phase=2), 300, verbose=False, persistent=True), (2, 3))
+			self.assertEqual(engine.play(rand.Bot(), PhaseBot(fault), State.generate(2, phase=2), 300, verbose=False, persistent=True), (1, 3))
@@ -0,0 +1,55 @@
+from unittest import TestCase
+from api import State, policies, tables
+import pickle
+import random
+
+
+class TestPolicies(TestCase):
+
+	def test_legal(self):
+		rng = random.Random(0)
+
+		for name, policy in policies.POLICIES.items():
+			for seed in range(30):
+				state = State.generate(seed, phase=1 if seed % 2 else 2)
+
+				while not state.finished():
+					moves = state.moves()
+					move = policy(state, list(moves), rng)
+					self.assertIn(move, moves, name)
+					state = state.next(move)
+
+	def test_cheap_win(self):
+		rng = random.Random(1)
+
+		for seed in range(30):
+			state = State.generate(seed, phase=2)
+			state = state.next(rng.choice(state.moves()))
+			if state.finished():
+				continue
+
+			led = state.get_opponents_played_card()
+			trump = tables.SUIT_INDEX[state.get_trump_suit()]
+			cards = [move[0] for move in state.moves()]
+			winners = [card for card in cards if not tables.LEAD_WINS[trump][led][card]]
+
+			card = policies.cheap_win(state, state.moves(), rng)[0]
+			if len(winners) > 0:
+				self.assertIn(card, winners)
+			else:
+				# A losing trump is kept for later
+				cheapest = [card for card in cards if tables.SUIT[card] != trump] or cards
+				self.assertEqual(tables.POINTS[card], min(tables.POINTS[card] for card in cheapest))
+
+	def test_meld(self):
+		rng = random.Random(2)
+
+		for seed in range(100):
+			state = State.generate(seed)
+			marriages = [move for move in state.moves() if move[0] is not None and move[1] is not None]
+			if len(marriages) > 0:
+				self.assertIn(policies.meld(state, state.moves(), rng), marriages)
+
+	def test_pickle(self):
+		for policy in policies.POLICIES.values():
+			self.assertIsNotNone(pickle.loads(pickle.dumps(policy)))
@@ -0,0 +1,45 @@
+from unittest import TestCase
+from api import State
+from bots.rdeep import rdeep
+import random
+
+
+class TestRdeep(TestCase):
+
+	def test_batched_move(self):
+		random.seed(0)
+
+		for seed in range(10):
+			state = State.generate(seed, phase=1 if seed % 2 else 2)
+			given = state.clone(signature=state.whose_turn()) if state.get_phase() == 1 else state
+
+			bot = rdeep.Bot(batched=True)
+			self.assertIn(bot.get_move(given), state.moves())
+
+			# Every move is played out in the worlds of the first round, and the rounds after that
+			# play out half of the moves in as many worlds as before
+			moves = len(state.moves())
+			if moves == 1:
+				continue
+			self.assertGreaterEqual(bot.rollouts, 4 * moves)
+			self.assertLess(bot.rollouts, 4 * moves * moves)
+
+	def test_worlds_differ(self):
+		class RecordingBot(rdeep.Bot):
+			def playouts(self, states, player, period):
+				rounds.append((states, period))
+				return rdeep.Bot.playouts(self, states, player, period)
+
+		random.seed(1)
+		state = State.generate(1)
+		given = state.clone(signature=state.whose_turn())
+		opponent = 3 - state.whose_turn()
+
+		rounds = []
+		RecordingBot(batched=True).get_move(given)
+		self.assertGreater(len(rounds), 0)
+
+		for states, period in rounds:
+			# The first move is played out in the worlds of the round, each a guess of its own
+			hands = [tuple(sorted(world.get_deck().get_player_hand(opponent))) for world in states[:period]]
+			self.assertGreater(len(set(hands)), 1)
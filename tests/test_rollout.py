@@ -0,0 +1,69 @@
+from unittest import TestCase
+from api import State
+import random
+
+
+class TestRollout(TestCase):
+
+	def test_rollout_matches_next(self):
+		for seed in range(50):
+			state = State.generate(seed)
+
+			# Play the same game with next(), drawing moves from an identically seeded rng
+			rng = random.Random(seed)
+			expected = state
+			while not expected.finished():
+				expected = expected.next(rng.choice(expected.moves()))
+
+			final = state.rollout(random.Random(seed))
+
+			self.assertEqual(final, expected)
+			self.assertEqual(final.winner(), expected.winner())
+
+	def test_rollout_leaves_state_unchanged(self):
+		state = State.generate(3)
+		before = state.clone()
+
+		state.rollout(random.Random(0))
+
+		self.assertEqual(state, before)
+
+	def test_rollout_max_depth(self):
+		state = State.generate(3)
+		final = state.rollout(random.Random(0), max_depth=3)
+
+		expected = state
+		rng = random.Random(0)
+		for i in range(3):
+			expected = expected.next(rng.choice(expected.moves()))
+
+		self.assertEqual(final, expected)
+
+	def test_rollout_policy(self):
+		state = State.generate(8)
+
+		# Always play the first legal move
+		final = state.rollout(random.Random(0), policy=lambda st, moves, rng: moves[0])
+
+		expected = state
+		while not expected.finished():
+			expected = expected.next(expected.moves()[0])
+
+		self.assertEqual(final, expected)
+
+	def test_rollout_imperfect_information(self):
+		state = State.generate(3)
+		signed = state.clone(signature=state.whose_turn())
+
+		self.assertRaises(RuntimeError, signed.rollout, random.Random(0))
+
+	def test_rollout_stop(self):
+		state = State.generate(9)
+		final = state.rollout(random.Random(0), stop=lambda st: st.get_phase() == 2)
+
+		expected = state
+		rng = random.Random(0)
+		while not expected.finished() and expected.get_phase() == 1:
+			expected = expected.next(rng.choice(expected.moves()))
+
+		self.assertEqual(final, expected)
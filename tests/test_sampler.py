@@ -0,0 +1,67 @@
+from unittest import TestCase
+from api import State, Sampler
+import random
+
+
+class TestSampler(TestCase):
+
+	def test_samples_are_consistent(self):
+		rng = random.Random(0)
+
+		for seed in range(30):
+			state = State.generate(seed)
+
+			# Walk a few moves into the game, so some cards are known
+			for i in range(rng.randint(0, 6)):
+				if state.get_phase() == 2:
+					break
+				state = state.next(rng.choice(state.moves()))
+
+			signed = state.clone(signature=state.whose_turn())
+			perspective = signed.get_perspective()
+			expected = signed.make_assumption()
+			sampler = Sampler(signed)
+
+			for i in range(20):
+				world = sampler.sample(rng)
+				guess = world.get_perspective()
+
+				self.assertEqual(guess.count("U"), 0)
+				self.assertEqual(guess.count("P1H"), 5)
+				self.assertEqual(guess.count("P2H"), 5)
+				self.assertEqual(len(world.get_deck().get_stock()), state.get_stock_size())
+				self.assertEqual(world.get_deck().get_trump_card_index(), state.get_deck().get_trump_card_index())
+				self.assertEqual(sorted(world.hand()), sorted(state.hand()))
+				self.assertEqual(world.moves(), expected.moves())
+				self.assertEqual(world.get_points(1), state.get_points(1))
+				self.assertEqual(world.get_points(2), state.get_points(2))
+
+				for known, card in zip(perspective, guess):
+					if known != "U":
+						self.assertEqual(known, card)
+
+	def test_sample_reuses_world(self):
+		state = State.generate(3)
+		sampler = Sampler(state.clone(signature=state.whose_turn()))
+
+		# Changes to a world are gone after the next draw
+		world = sampler.sample(random.Random(1))
+		world.apply(world.moves()[0])
+
+		self.assertIs(sampler.sample(random.Random(1)), world)
+		self.assertEqual(world.whose_turn(), state.whose_turn())
+		self.assertEqual(world.get_deck().get_trick(), state.get_deck().get_trick())
+		self.assertEqual(sorted(world.hand()), sorted(state.hand()))
+		self.assertRaises(RuntimeError, world.undo)
+
+	def test_samples(self):
+		state = State.generate(3)
+		sampler = Sampler(state.clone(signature=state.whose_turn()))
+
+		worlds = sampler.samples(50, random.Random(2))
+
+		self.assertEqual(len(set(id(world) for world in worlds)), 50)
+		self.assertTrue(any(world != worlds[0] for world in worlds))
+
+	def test_perfect_information(self):
+		self.assertRaises(RuntimeError, Sampler, State.generate(3))
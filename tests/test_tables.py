@@ -0,0 +1,60 @@
+from unittest import TestCase
+from api import State, Deck, tables
+import random
+
+
+class TestTables(TestCase):
+
+	def test_suits_and_points(self):
+		for card in range(20):
+			self.assertEqual(tables.SUITS[tables.SUIT[card]], Deck.get_suit(card))
+			self.assertEqual(tables.POINTS[card], {"A": 11, "10": 10, "K": 4, "Q": 3, "J": 2}[Deck.get_rank(card)])
+			self.assertEqual(tables.SUIT_MASK[tables.SUIT[card]] >> card & 1, 1)
+
+	def test_lead_wins(self):
+		for trump in range(4):
+			for lead in range(20):
+				for follow in range(20):
+					if lead == follow:
+						continue
+
+					if tables.SUIT[lead] == tables.SUIT[follow]:
+						ranks = ["A", "10", "K", "Q", "J"]
+						expected = ranks.index(Deck.get_rank(lead)) < ranks.index(Deck.get_rank(follow))
+					else:
+						expected = tables.SUIT[follow] != trump
+
+					self.assertEqual(tables.LEAD_WINS[trump][lead][follow], expected)
+					self.assertEqual(tables.TRICK_POINTS[lead][follow], tables.POINTS[lead] + tables.POINTS[follow])
+
+	def test_legal_follow(self):
+		rng = random.Random(0)
+
+		for i in range(5000):
+			cards = rng.sample(range(20), rng.randint(2, 6))
+			lead, hand = cards[0], sum(1 << card for card in cards[1:])
+			trump = rng.randrange(4)
+
+			# The rules of phase 2: follow suit with a higher card if possible, else with any
+			# card of the suit, else with a trump, else with any card
+			same_suit = [card for card in cards[1:] if tables.SUIT[card] == tables.SUIT[lead]]
+			higher = [card for card in same_suit if card < lead]
+			trumps = [card for card in cards[1:] if tables.SUIT[card] == trump]
+			expected = higher or same_suit or trumps or cards[1:]
+
+			self.assertEqual(tables.legal_follow(hand, lead, trump), sum(1 << card for card in expected))
+
+	def test_states_follow_the_tables(self):
+		rng = random.Random(1)
+
+		for seed in range(100):
+			state = State.generate(seed, phase=2)
+
+			while not state.finished():
+				if state.leader() != state.whose_turn():
+					hand = state.get_deck().get_player_hand_mask(state.whose_turn())
+					trump = tables.SUIT_INDEX[state.get_trump_suit()]
+					legal = tables.legal_follow(hand, state.get_opponents_played_card(), trump)
+					self.assertEqual(sorted(move[0] for move in state.moves()), Deck.get_cards(legal))
+
+				state = state.next(rng.choice(state.moves()))
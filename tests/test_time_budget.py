@@ -0,0 +1,61 @@
+from unittest import TestCase
+from api import State, engine
+from bots.mcboy.mcboy import Bot
+from bots.mcboy.Node import NodePool
+from bots.mcboy.MonteCarloTreeSearch import MonteCarloTreeSearch
+from bots.mcboy.ISMCTS import ISMCTS
+import random, time
+
+# Time allowed on top of the budget, for the iterations between two looks at the clock
+MARGIN = 0.25
+
+
+class BudgetBot:
+
+	def get_move(self, state, time_budget=None):
+		self.time_budget = time_budget
+		return state.moves()[0]
+
+
+class TestTimeBudget(TestCase):
+
+	def test_ask_player(self):
+		bot = BudgetBot()
+
+		engine.ask_player(bot, State.generate(0), time.time() + 2)
+		self.assertTrue(1 < bot.time_budget <= 2)
+
+		engine.ask_player(bot, State.generate(0))
+		self.assertIsNone(bot.time_budget)
+
+	def test_searches(self):
+		random.seed(0)
+		phase1 = State.generate(1)
+		phase2 = State.generate(1, phase=2)
+
+		searches = [
+			(phase2, lambda: MonteCarloTreeSearch(NodePool(phase2))),
+			(phase1, lambda: ISMCTS(phase1.clone(signature=phase1.whose_turn())))
+		]
+
+		for state, search in searches:
+			for time_limit in (0.0, 0.1):
+				start = time.time()
+				move = search().best_move(time_limit=time_limit)
+
+				# At least one iteration is performed, even without time
+				self.assertIn(move, state.moves())
+				self.assertLess(time.time() - start, time_limit + MARGIN)
+
+	def test_bot(self):
+		random.seed(1)
+
+		for ismcts in (True, False):
+			bot = Bot(ismcts=ismcts)
+			for state in (State.generate(2), State.generate(2, phase=2)):
+				given = state.clone(signature=state.whose_turn()) if state.get_phase() == 1 else state
+
+				start = time.time()
+				move = bot.get_move(given, time_budget=0.2)
+				self.assertIn(move, state.moves())
+				self.assertLess(time.time() - start, 0.2 + MARGIN)
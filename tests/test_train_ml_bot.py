@@ -0,0 +1,63 @@
+from unittest import TestCase
+import numpy as np
+import importlib.util
+import os, shutil, sys, tempfile
+
+# The script has no module name of its own, so it is loaded from its file. It is registered under a name,
+# so the worker processes can find play_shard.
+_spec = importlib.util.spec_from_file_location("train_ml_bot", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "train-ml-bot.py"))
+train = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = train
+_spec.loader.exec_module(train)
+
+
+class TestTrainMLBot(TestCase):
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def shards(self):
+		return sorted(name for name in os.listdir(self.path) if name.endswith(".npy"))
+
+	def test_shard_path(self):
+		self.assertEqual(train.shard_path("dataset", 0, 500), os.path.join("dataset", "games-0000000-0000499.npy"))
+		self.assertEqual(train.shard_path("dataset", 1500, 2000), os.path.join("dataset", "games-0001500-0001999.npy"))
+
+	def test_resume(self):
+		train.create_dataset(self.path, games=4, workers=1, shard_games=2)
+		self.assertEqual(self.shards(), ["games-0000000-0000001.npy", "games-0000002-0000003.npy"])
+		first_data, first_target = train.load_dataset(self.path)
+
+		# An interrupted run plays the missing shard again, with the same games
+		os.remove(train.shard_path(self.path, 2, 4))
+		train.create_dataset(self.path, games=4, workers=1, shard_games=2)
+		data, target = train.load_dataset(self.path)
+		self.assertTrue(np.array_equal(data, first_data))
+		self.assertTrue(np.array_equal(target, first_target))
+
+		# More games add shards, at the same boundaries, and the games that were there load as before
+		train.create_dataset(self.path, games=5, workers=1, shard_games=2)
+		self.assertEqual(len(self.shards()), 3)
+		data, target = train.load_dataset(self.path, 4)
+		self.assertTrue(np.array_equal(data, first_data))
+		self.assertEqual(len(train.load_dataset(self.path)[0]), len(data) + len(np.load(train.shard_path(self.path, 4, 6))))
+
+		# Rows hold a feature vector and a label
+		self.assertEqual(data.shape[1], 156)
+		self.assertTrue(set(target) <= {"won", "lost"})
+
+	def test_other_settings(self):
+		train.create_dataset(self.path, games=2, workers=1, shard_games=2)
+
+		# Games of another player, phase or shard size do not mix with the ones there
+		self.assertRaises(ValueError, train.create_dataset, self.path, player="bully", games=2, workers=1, shard_games=2)
+		self.assertRaises(ValueError, train.create_dataset, self.path, games=2, phase=2, workers=1, shard_games=2)
+		self.assertRaises(ValueError, train.create_dataset, self.path, games=3, workers=1, shard_games=3)
+		self.assertEqual(self.shards(), ["games-0000000-0000001.npy"])
+
+		train.create_dataset(self.path, games=3, workers=1, shard_games=3, overwrite=True)
+		self.assertEqual(self.shards(), ["games-0000000-0000002.npy"])
+		self.assertEqual(train.read_manifest(self.path), {"player": "rand", "phase": 1, "shard_games": 3})
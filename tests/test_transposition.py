@@ -0,0 +1,74 @@
+from unittest import TestCase
+from api import State, transposition
+from bots.alphabeta import alphabeta
+from bots.minimax import minimax
+import random
+
+
+class TestTransposition(TestCase):
+
+	def position(self, state):
+		# Everything that decides how the game goes on, which is what the key describes
+		return (state.get_perspective(), state.get_deck().get_stock(), state.get_deck().get_trick(), state.get_points(1), state.get_points(2),
+				state.get_pending_points(1), state.get_pending_points(2), state.whose_turn(), state.leader())
+
+	def test_keys_identify_positions(self):
+		rng = random.Random(1)
+		positions = {}
+
+		for seed in range(50):
+			state = State.generate(seed)
+
+			while not state.finished():
+				self.assertEqual(transposition.key(state), transposition.key(state.clone()))
+
+				positions.setdefault(transposition.key(state), set()).add(repr(self.position(state)))
+				state = state.next(rng.choice(state.moves()))
+
+		self.assertGreater(len(positions), 500)
+		self.assertTrue(all(len(found) == 1 for found in positions.values()))
+
+	def test_transpositions(self):
+		# Play out every sequence of two tricks, different orders of play reach the same positions
+		sequences = 0
+		positions = {}
+
+		for seed in range(5):
+			states = [State.generate(seed, phase=2)]
+			for ply in range(4):
+				states = [state.next(move) for state in states if not state.finished() for move in state.moves()]
+
+			for state in states:
+				sequences += 1
+				positions.setdefault(transposition.key(state), set()).add(repr(self.position(state)))
+
+		self.assertTrue(all(len(found) == 1 for found in positions.values()))
+		self.assertLess(len(positions), sequences)
+
+	def test_replacement(self):
+		table = transposition.TranspositionTable(size=4)
+
+		table.store(1, 0.5, transposition.EXACT, 3, (1, None))
+		self.assertEqual(table.lookup(1), (0.5, transposition.EXACT, 3, (1, None)))
+		self.assertIsNone(table.lookup(5))
+
+		# A shallower result does not push out a deeper one of the same search
+		table.store(5, 0.1, transposition.LOWER, 2, None)
+		self.assertIsNone(table.lookup(5))
+		self.assertIsNotNone(table.lookup(1))
+
+		# But it does push out one of an earlier search
+		table.new_search()
+		table.store(5, 0.1, transposition.LOWER, 2, None)
+		self.assertEqual(table.lookup(5), (0.1, transposition.LOWER, 2, None))
+		self.assertIsNone(table.lookup(1))
+
+	def test_search_values(self):
+		# With their tables, the bots still agree on the values of positions, also when the tables are shared between searches
+		ab = alphabeta.Bot(randomize=False, depth=4)
+		mm = minimax.Bot(randomize=False, depth=4)
+
+		for seed in range(10):
+			state = State.generate(seed)
+			for i in range(2):
+				self.assertEqual(ab.value(state.clone())[0], mm.value(state.clone())[0])
@@ -0,0 +1,93 @@
+from unittest import TestCase
+from api import State, engine
+from api.workers import WorkerPool
+from bots.mcboy import mcboy
+from bots.rand import rand
+from multiprocessing import Process, Queue
+import os, pickle, random, shutil, tempfile, time
+
+
+def square(x):
+	return x * x
+
+def pool_in_child(pool, queue):
+	# A copy in another process starts a pool of its own
+	queue.put(pool.get().map(square, [1, 2, 3]))
+	pool.close()
+
+
+class SlowStartBot:
+	"""
+	Takes a while to start, and writes the time budgets of its moves and its closing to a file
+	"""
+
+	def __init__(self, log):
+		self.log = log
+
+	def start(self):
+		time.sleep(0.5)
+
+	def close(self):
+		with open(self.log, "a") as output:
+			output.write("closed\n")
+
+	def get_move(self, state, time_budget=None):
+		with open(self.log, "a") as output:
+			output.write("{}\n".format(time_budget))
+		return random.choice(state.moves())
+
+
+class TestWorkers(TestCase):
+
+	def test_worker_pool(self):
+		pool = WorkerPool(2)
+		multiprocessing_pool = pool.get()
+		self.assertIs(pool.get(), multiprocessing_pool)
+		self.assertEqual(multiprocessing_pool.map(square, range(4)), [0, 1, 4, 9])
+
+		processes = list(multiprocessing_pool._pool)
+		pool.close()
+		self.assertFalse(any(process.is_alive() for process in processes))
+
+		# A pickled copy leaves the pool behind, and starts its own
+		pool.start()
+		copy = pickle.loads(pickle.dumps(pool))
+		self.assertIsNot(copy.get(), pool.get())
+		copy.close()
+
+		queue = Queue()
+		child = Process(target=pool_in_child, args=(pool, queue))
+		child.start()
+		self.assertEqual(queue.get(timeout=10), [1, 4, 9])
+		child.join()
+		pool.close()
+
+	def test_bot_start_and_close(self):
+		bot = mcboy.Bot(simulations=50, workers=2)
+		pool = bot._Bot__pool
+
+		# The engine starts the pool before the first move, and leaves it for us to close
+		random.seed(0)
+		engine.play(bot, rand.Bot(), State.generate(0, phase=2), verbose=False, fast=True)
+		multiprocessing_pool = pool._WorkerPool__pool
+		self.assertIsNotNone(multiprocessing_pool)
+
+		processes = list(multiprocessing_pool._pool)
+		engine.close_player(bot)
+		self.assertFalse(any(process.is_alive() for process in processes))
+
+	def test_persistent_start_and_close(self):
+		directory = tempfile.mkdtemp()
+		try:
+			log = os.path.join(directory, "log")
+			random.seed(1)
+			engine.play(SlowStartBot(log), rand.Bot(), State.generate(1, phase=2), 1000, verbose=False, persistent=True)
+
+			with open(log) as lines:
+				lines = lines.read().split()
+
+			# Starting took half of the time of a move, outside of the budget of the first move
+			self.assertGreater(float(lines[0]), 0.8)
+			self.assertEqual(lines[-1], "closed")
+		finally:
+			shutil.rmtree(directory)
@@ -7,25 +7,25 @@ python play.py -h
 """
 
 from argparse import ArgumentParser
-from api import State, util, engine
-import random, time
+from api import parallel
+import random
 
 def run_tournament(options):
+    # Set the seed for the PRNG globally
+    random.seed(options.seed)
 
     botnames = options.players.split(",")
 
-    bots = []
-    for botname in botnames:
-        bots.append(util.load_player(botname))
-
-    n = len(bots)
-    wins = [0] * len(bots)
+    n = len(botnames)
+    wins = [0] * n
     matches = [(p1, p2) for p1 in range(n) for p2 in range(n) if p1 < p2]
 
     totalgames = (n*n - n)/2 * options.repeats
     playedgames = 0
 
-    print('Playing {} games:'.format(int(totalgames)))
+    # Decide the player order and seed of every game in advance, so the
+    # outcome does not depend on how the games are spread over the workers
+    games = []
     for a, b in matches:
         for r in range(options.repeats):
 
@@ -34,21 +34,22 @@ def run_tournament(options):
             else:
                 p = [b, a]
 
-            # Generate a state with a random seed
-            state = State.generate(phase=int(options.phase))
+            # The seed is used both to generate the state and for the bots' PRNG during the game
+            seed = random.randint(0, 2**31)
+            games.append((p, seed, seed, int(options.phase)))
 
-            winner, score = engine.play(bots[p[0]], bots[p[1]], state, options.max_time*1000, verbose=options.verbose, fast=options.fast)
+    print('Playing {} games:'.format(int(totalgames)))
+    for winner, score in parallel.play_games(botnames, games, options.workers, options.max_time*1000, verbose=options.verbose, fast=options.fast, persistent=options.persistent):
 
-            if winner is not None:
-                winner = p[winner - 1]
-                wins[winner] += score
+        if winner is not None:
+            wins[winner] += score
 
-            playedgames += 1
-            print('Played {} out of {:.0f} games ({:.0f}%): {} \r'.format(playedgames, totalgames, playedgames/float(totalgames) * 100, wins))
+        playedgames += 1
+        print('Played {} out of {:.0f} games ({:.0f}%): {} \r'.format(playedgames, totalgames, playedgames/float(totalgames) * 100, wins))
 
     print('Results:')
-    for i in range(len(bots)):
-        print('    bot {}: {} points'.format(bots[i], wins[i]))
+    for i in range(n):
+        print('    bot {}: {} points'.format(botnames[i], wins[i]))
 
 
 if __name__ == "__main__":
@@ -86,6 +87,21 @@ if __name__ == "__main__":
                         action="store_true",
                         help="Print verbose information")
 
+    parser.add_argument("-w", "--workers",
+                        dest="workers",
+                        help="Number of worker processes to spread the games over (default: 1)",
+                        type=int, default=1)
+
+    parser.add_argument("--seed",
+                        dest="seed",
+                        help="Set the initial value for the pseudo-random number generator. Using the same seed will result in the same tournament outcome, regardless of the number of workers.",
+                        default=None)
+
+    parser.add_argument("--persistent",
+                        dest="persistent",
+                        action="store_true",
+                        help="Keep each bot in one worker process for the whole game, instead of starting a new process for every move. The time limit is enforced in the same way.")
+
     options = parser.parse_args()
 
     run_tournament(options)
@@ -7,7 +7,7 @@ python play.py -h
 """
 
 from argparse import ArgumentParser
-from api import State, util, engine
+from api import parallel
 import random, csv
 
 def run_tournament(options):
@@ -18,23 +18,20 @@ def run_tournament(options):
 	player1 = botnames[0]
 	player2 = botnames[1]
 
-	bots = []
-	for botname in botnames:
-		bots.append(util.load_player(botname))
-
-	n = len(bots)
-	wins = [0] * len(bots)
+	n = len(botnames)
+	wins = [0] * n
 	matches = [(p1, p2) for p1 in range(n) for p2 in range(n) if p1 < p2]
 
 	totalgames = (n*n - n)/2 * options.repeats
 	playedgames = 0
 
-	states = []
+	games = []
 
 	output = []
 
-	# First pre-generate all the future game states in advance.
-	# The pre-generation allows the PRNG to produce the same decks every run.
+	# First pre-generate all the future games in advance.
+	# The pre-generation allows the PRNG to produce the same games every run,
+	# regardless of how the games are spread over the workers.
 	for a, b in matches:
 		for r in range(options.repeats):
 			if random.choice([True, False]):
@@ -42,29 +39,24 @@ def run_tournament(options):
 			else:
 				p = [b, a]
 
-			# Generate a state with a random seed
-			state = State.generate(id=options.seed, phase=int(options.phase))
-			states.append((p, state))
+			# Every game starts from the state generated with the given seed,
+			# the bots' PRNG is seeded differently for every game
+			games.append((p, options.seed, random.randint(0, 2**31), int(options.phase)))
 
 	print('Playing {} games:'.format(int(totalgames)))
-	for p, state in states:
-		winner, score = engine.play(bots[p[0]], bots[p[1]], state, options.max_time*1000, verbose=options.verbose, fast=options.fast)
+	for winner, score in parallel.play_games(botnames, games, options.workers, options.max_time*1000, verbose=options.verbose, fast=options.fast, persistent=options.persistent):
 
 		if winner is not None:
-			winner = p[winner - 1]
 			wins[winner] += score
 
-		winner = bots[winner]
-
-		if winner == bots[0]:
+		if winner == 0:
 			winner = player1
 		else:
 			winner = player2
-			
-			
-		print(str([r + 1, winner, score, wins[0], wins[1]]))
 
-		output.append([r + 1, winner, score, wins[0], wins[1]])
+		print(str([playedgames + 1, winner, score, wins[0], wins[1]]))
+
+		output.append([playedgames + 1, winner, score, wins[0], wins[1]])
 
 		playedgames += 1
 		print('Played {} out of {:.0f} games ({:.0f}%): {} \r'.format(playedgames, totalgames, playedgames/float(totalgames) * 100, wins))
@@ -80,8 +72,8 @@ def run_tournament(options):
 			file_writer.writerow(row)
 
 	print('Results:')
-	for i in range(len(bots)):
-		print('    bot {}: {} points'.format(bots[i], wins[i]))
+	for i in range(n):
+		print('    bot {}: {} points'.format(botnames[i], wins[i]))
 
 
 if __name__ == "__main__":
@@ -119,11 +111,21 @@ if __name__ == "__main__":
 						action="store_true",
 						help="Print verbose information")
 
+
+	parser.add_argument("-w", "--workers",
+						dest="workers",
+						help="Number of worker processes to spread the games over (default: 1)",
+						type=int, default=1)
 	parser.add_argument("--seed",
 						dest="seed",
 						help="Set the initial value for the pseudo-random number generator. Using the same seed will result in the same tournament outcome if no changes are made.",
 						default=None)
 
+	parser.add_argument("--persistent",
+						dest="persistent",
+						action="store_true",
+						help="Keep each bot in one worker process for the whole game, instead of starting a new process for every move. The time limit is enforced in the same way.")
+
 	options = parser.parse_args()
 
 	run_tournament(options)
\ No newline at end of file
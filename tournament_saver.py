@@ -7,64 +7,60 @@ python play.py -h
 """
 
 from argparse import ArgumentParser
-from api import State, util, engine
+from api import parallel
 import random, time
 import csv
 
 def run_tournament(options):
+	# Set the seed for the PRNG globally
+	random.seed(options.seed)
 
 	botnames = options.players.split(",")
 	player1 = botnames[0]
 	player2 = botnames[1]
-	bots = []
-	for botname in botnames:
-		bots.append(util.load_player(botname))
 
-	n = len(bots)
-	wins = [0] * len(bots)
+	n = len(botnames)
+	wins = [0] * n
 	matches = [(p1, p2) for p1 in range(n) for p2 in range(n) if p1 < p2]
 
 	totalgames = (n*n - n)/2 * options.repeats
 	playedgames = 0
 
-	print('Playing {} games:'.format(int(totalgames)))
+	games = []
 
 	output = []
 
+	# First pre-generate all the future games in advance.
+	# The pre-generation allows the PRNG to produce the same games every run,
+	# regardless of how the games are spread over the workers.
 	for a, b in matches:
 		for r in range(options.repeats):
-
 			if random.choice([True, False]):
 				p = [a, b]
 			else:
 				p = [b, a]
 
-			# Generate a state with a random seed
-			state = State.generate(phase=int(options.phase))
+			# The seed is used both to generate the state and for the bots' PRNG during the game
+			seed = random.randint(0, 2**31)
+			games.append((p, seed, seed, int(options.phase)))
 
-			bot_1 = bots[p[0]]
-			bot_2 = bots[p[1]]
+	print('Playing {} games:'.format(int(totalgames)))
+	for winner, score in parallel.play_games(botnames, games, options.workers, options.max_time*1000, verbose=options.verbose, fast=options.fast, persistent=options.persistent):
 
-			winner, score = engine.play(bot_1, bot_2, state, options.max_time*1000, verbose=options.verbose, fast=options.fast)
+		if winner is not None:
+			wins[winner] += score
 
-			if winner is not None:
-				winner = p[winner - 1]
-				wins[winner] += score
-			
-			winner = bots[winner]
+		if winner == 0:
+			winner = player1
+		else:
+			winner = player2
 
-			if winner == bots[0]:
-				winner = player1
-			else:
-				winner = player2
-				
-				
-			print(str([r + 1, winner, score, wins[0], wins[1]]))
+		print(str([playedgames + 1, winner, score, wins[0], wins[1]]))
 
-			output.append([r + 1, winner, score, wins[0], wins[1]])
+		output.append([playedgames + 1, winner, score, wins[0], wins[1]])
 
-			playedgames += 1
-			print('Played {} out of {:.0f} games ({:.0f}%): {} \r'.format(playedgames, totalgames, playedgames/float(totalgames) * 100, wins))
+		playedgames += 1
+		print('Played {} out of {:.0f} games ({:.0f}%): {} \r'.format(playedgames, totalgames, playedgames/float(totalgames) * 100, wins))
 
 	file_name = str(player1) + " vs " + str(player2) + " for " + str(options.repeats) + " games.csv"
 			
@@ -77,8 +73,8 @@ def run_tournament(options):
 			file_writer.writerow(row)
 
 	print('Results:')
-	for i in range(len(bots)):
-		print('    bot {}: {} points'.format(bots[i], wins[i]))
+	for i in range(n):
+		print('    bot {}: {} points'.format(botnames[i], wins[i]))
 
 
 if __name__ == "__main__":
@@ -116,6 +112,22 @@ if __name__ == "__main__":
 						action="store_true",
 						help="Print verbose information")
 
+
+	parser.add_argument("-w", "--workers",
+						dest="workers",
+						help="Number of worker processes to spread the games over (default: 1)",
+						type=int, default=1)
+
+	parser.add_argument("--seed",
+						dest="seed",
+						help="Set the initial value for the pseudo-random number generator. Using the same seed will result in the same tournament outcome, regardless of the number of workers.",
+						default=None)
+
+	parser.add_argument("--persistent",
+						dest="persistent",
+						action="store_true",
+						help="Keep each bot in one worker process for the whole game, instead of starting a new process for every move. The time limit is enforced in the same way.")
+
 	options = parser.parse_args()
 
 	run_tournament(options)
@@ -3,46 +3,68 @@ Train a machine learning model for the classifier bot. We create a player, and w
 Every observed state is converted to a feature vector and labeled with the eventual outcome
 (-1.0: player 2 won, 1.0: player 1 won)
 
+The games are played in a pool of worker processes. Every worker writes the labeled feature vectors of a range of
+games to a shard, a NumPy .npy file in the dataset directory, as soon as it has played them, so the dataset never
+has to fit in memory at once. Shards that already exist are kept, so an interrupted run continues where it stopped.
+Shard k always holds games k * shard_games up to (k + 1) * shard_games, whatever the number of games asked for, so
+a run with more games adds shards to the ones there are. The player, the phase and the shard size are recorded in
+a manifest in the dataset directory, and a run with other settings refuses to mix its games with the ones there.
+
 This is part of the second worksheet.
 """
 from api import State, util
-import pickle
+import os
 import os.path
+import json
+import random
 from argparse import ArgumentParser
+from multiprocessing import Pool
 import time
 import sys
 
+import numpy as np
+
 # This package contains various machine learning algorithms
 import sklearn
 import sklearn.linear_model
 from sklearn.neural_network import MLPClassifier
 import joblib
 
-from bots.rand import rand
-# from bots.rdeep import rdeep
-
 from bots.ml.ml import features
 
-def create_dataset(path, player=rand.Bot(), games=2000, phase=1):
+# The file in the dataset directory that records how its shards were played
+MANIFEST = "manifest.json"
 
-    data = []
-    target = []
+def shard_path(path, first, last):
+    """
+    :param path: The dataset directory
+    :param first: The first game of the shard
+    :param last: The game after the last game of the shard
+    :return: The path of the shard with these games
+    """
+    return os.path.join(path, "games-{:07d}-{:07d}.npy".format(first, last - 1))
 
-    # For progress bar
-    bar_length = 30
-    start = time.time()
+def play_shard(task):
+    """
+    Pool worker of create_dataset: plays a range of games and writes their labeled feature vectors to a shard. Every row
+    of the shard holds the feature vector of a state, followed by the outcome of its game (1.0: player 1 won, -1.0:
+    player 2 won). Game g deals State.generate(id=g) and seeds the PRNG of the player with g, so a shard can be made again.
 
-    for g in range(games-1):
+    :param task: The dataset directory, the name of the player (a directory in bots/), the phase to start in, and the
+        range of games to play
+    :return: The number of rows in the shard
+    """
+    path, player_name, phase, first, last = task
+    player = util.load_player(player_name)
 
-        # For progress bar
-        if g % 10 == 0:
-            percent = 100.0*g/games
-            sys.stdout.write('\r')
-            sys.stdout.write("Generating dataset: [{:{}}] {:>3}%".format('='*int(percent/(100.0/bar_length)),bar_length, int(percent)))
-            sys.stdout.flush()
+    games = []
 
-        # Randomly generate a state object starting in specified phase.
-        state = State.generate(phase=phase)
+    for g in range(first, last):
+
+        random.seed(g)
+
+        # Generate the state object of this game, starting in the specified phase.
+        state = State.generate(id=g, phase=phase)
 
         state_vectors = []
 
@@ -60,24 +82,103 @@ def create_dataset(path, player=rand.Bot(), games=2000, phase=1):
 
         winner, score = state.winner()
 
-        for state_vector in state_vectors:
-            data.append(state_vector)
+        rows = np.empty((len(state_vectors), len(state_vectors[0]) + 1), dtype=np.float32)
+        rows[:, :-1] = state_vectors
+        rows[:, -1] = 1.0 if winner == 1 else -1.0
+        games.append(rows)
+
+    # The shard is written under another name first, so that a shard with its own name is always complete
+    temporary = shard_path(path, first, last) + ".tmp"
+    with open(temporary, 'wb') as output:
+        np.save(output, np.concatenate(games))
+    os.replace(temporary, shard_path(path, first, last))
+
+    return sum(len(rows) for rows in games)
+
+def create_dataset(path, player="rand", games=2000, phase=1, workers=None, shard_games=500, overwrite=False):
+    """
+    Plays games and writes the dataset in shards, skipping the shards that already exist. The number of games is
+    rounded up to a whole number of shards.
+
+    :param path: The dataset directory, made if it does not exist
+    :param player: The name of the bot that plays against itself, a directory in bots/
+    :param games: The number of games in the dataset
+    :param phase: The phase the games start in
+    :param workers: The number of worker processes, one per CPU if None
+    :param shard_games: The number of games per shard
+    :param overwrite: Whether to remove the dataset in the directory first. If False, the dataset there must have
+        been made with the same player, phase and shard size.
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    manifest = {"player": player.lower(), "phase": phase, "shard_games": shard_games}
+
+    if overwrite:
+        for name in os.listdir(path):
+            if name.endswith(".npy") or name.endswith(".npy.tmp") or name == MANIFEST:
+                os.remove(os.path.join(path, name))
+
+    existing = read_manifest(path)
+    if existing is None:
+        if any(name.endswith(".npy") for name in os.listdir(path)):
+            raise ValueError("The dataset in {} has no {}, use --overwrite to make a new one".format(path, MANIFEST))
+        with open(os.path.join(path, MANIFEST), 'w') as output:
+            json.dump(manifest, output)
+    elif existing != manifest:
+        raise ValueError("The dataset in {} was made with {}, not with {}, use --overwrite to make a new one".format(path, existing, manifest))
+
+    tasks = [(path, player, phase, first, first + shard_games) for first in range(0, games, shard_games)]
+    tasks = [task for task in tasks if not os.path.isfile(shard_path(path, task[3], task[4]))]
 
-            if winner == 1:
-                result = 'won'
+    # For progress bar
+    bar_length = 30
+    start = time.time()
+    done = 0
+    rows = 0
 
-            elif winner == 2:
-                result = 'lost'
+    print("{} of {} shards to play".format(len(tasks), len(range(0, games, shard_games))))
 
-            target.append(result)
+    with Pool(workers) as pool:
+        for shard_rows in pool.imap_unordered(play_shard, tasks):
+            done += 1
+            rows += shard_rows
 
-    with open(path, 'wb') as output:
-        pickle.dump((data, target), output, pickle.HIGHEST_PROTOCOL)
+            percent = 100.0*done/len(tasks)
+            sys.stdout.write('\r')
+            sys.stdout.write("Generating dataset: [{:{}}] {:>3}%".format('='*int(percent/(100.0/bar_length)),bar_length, int(percent)))
+            sys.stdout.flush()
 
     # For printing newline after progress bar
-    print("\nDone. Time to generate dataset: {:.2f} seconds".format(time.time() - start))
+    print("\nDone. {} rows written. Time to generate dataset: {:.2f} seconds".format(rows, time.time() - start))
+
+def read_manifest(path):
+    """
+    :param path: The dataset directory
+    :return: The player, phase and shard size the dataset was made with, as a dict, or None if it has no manifest
+    """
+    if not os.path.isfile(os.path.join(path, MANIFEST)):
+        return None
+    with open(os.path.join(path, MANIFEST)) as manifest:
+        return json.load(manifest)
 
-    return data, target
+def load_dataset(path, games=None):
+    """
+    :param path: The dataset directory
+    :param games: The number of games to load, rounded up to a whole number of shards. All shards if None.
+    :return: The feature vectors of the shards in one array, and the list of their labels ('won' or 'lost')
+    """
+    shard_games = read_manifest(path)["shard_games"]
+
+    if games is None:
+        firsts = sorted(int(name.split("-")[1]) for name in os.listdir(path) if name.startswith("games-") and name.endswith(".npy"))
+    else:
+        firsts = range(0, games, shard_games)
+
+    shards = [np.load(shard_path(path, first, first + shard_games)) for first in firsts]
+    rows = np.concatenate(shards)
+
+    return rows[:, :-1], np.where(rows[:, -1] > 0, 'won', 'lost')
 
 
 ## Parse the command line options
@@ -85,8 +186,8 @@ parser = ArgumentParser()
 
 parser.add_argument("-d", "--dset-path",
                     dest="dset_path",
-                    help="Optional dataset path",
-                    default="dataset.pkl")
+                    help="Optional dataset path, a directory of shards",
+                    default="dataset")
 
 parser.add_argument("-m", "--model-path",
                     dest="model_path",
@@ -98,62 +199,90 @@ parser.add_argument("-o", "--overwrite",
                     action="store_true",
                     help="Whether to create a new dataset regardless of whether one already exists at the specified path.")
 
+parser.add_argument("-g", "--games",
+                    dest="games",
+                    type=int,
+                    help="Number of games to generate the dataset from",
+                    default=10000)
+
+parser.add_argument("-p", "--player",
+                    dest="player",
+                    help="The bot that plays against itself to generate the dataset, the name of a directory in bots/",
+                    default="rand")
+
+parser.add_argument("-w", "--workers",
+                    dest="workers",
+                    type=int,
+                    help="Number of worker processes, one per CPU by default",
+                    default=None)
+
+parser.add_argument("--shard-games",
+                    dest="shard_games",
+                    type=int,
+                    help="Number of games per shard of the dataset",
+                    default=500)
+
 parser.add_argument("--no-train",
                     dest="train",
                     action="store_false",
                     help="Don't train a model after generating dataset.")
 
 
-options = parser.parse_args()
+if __name__ == "__main__":
 
-if options.overwrite or not os.path.isfile(options.dset_path):
-    create_dataset(options.dset_path, player=rand.Bot(), games=10000)
+    options = parser.parse_args()
 
-if options.train:
+    # Plays the shards that are missing, if any
+    try:
+        create_dataset(options.dset_path, player=options.player, games=options.games, workers=options.workers,
+                       shard_games=options.shard_games, overwrite=options.overwrite)
+    except ValueError as error:
+        sys.exit(error)
 
-    # Play around with the model parameters below
+    if options.train:
 
-    # HINT: Use tournament fast mode (-f flag) to quickly test your different models.
+        # Play around with the model parameters below
 
-    # The following tuple specifies the number of hidden layers in the neural
-    # network, as well as the number of layers, implicitly through its length.
-    # You can set any number of hidden layers, even just one. Experiment and see what works.
-    hidden_layer_sizes = (64, 32)
+        # HINT: Use tournament fast mode (-f flag) to quickly test your different models.
 
-    # The learning rate determines how fast we move towards the optimal solution.
-    # A low learning rate will converge slowly, but a large one might overshoot.
-    learning_rate = 0.0001
+        # The following tuple specifies the number of hidden layers in the neural
+        # network, as well as the number of layers, implicitly through its length.
+        # You can set any number of hidden layers, even just one. Experiment and see what works.
+        hidden_layer_sizes = (64, 32)
 
-    # The regularization term aims to prevent overfitting, and we can tweak its strength here.
-    regularization_strength = 0.0001
+        # The learning rate determines how fast we move towards the optimal solution.
+        # A low learning rate will converge slowly, but a large one might overshoot.
+        learning_rate = 0.0001
 
-    #############################################
+        # The regularization term aims to prevent overfitting, and we can tweak its strength here.
+        regularization_strength = 0.0001
 
-    start = time.time()
+        #############################################
+
+        start = time.time()
 
-    print("Starting training phase...")
+        print("Starting training phase...")
 
-    with open(options.dset_path, 'rb') as output:
-        data, target = pickle.load(output)
+        data, target = load_dataset(options.dset_path, options.games)
 
-    # Train a neural network
-    learner = MLPClassifier(hidden_layer_sizes=hidden_layer_sizes, learning_rate_init=learning_rate, alpha=regularization_strength, verbose=True, early_stopping=True, n_iter_no_change=6)
-    # learner = sklearn.linear_model.LogisticRegression()
+        # Train a neural network
+        learner = MLPClassifier(hidden_layer_sizes=hidden_layer_sizes, learning_rate_init=learning_rate, alpha=regularization_strength, verbose=True, early_stopping=True, n_iter_no_change=6)
+        # learner = sklearn.linear_model.LogisticRegression()
 
-    model = learner.fit(data, target)
+        model = learner.fit(data, target)
 
-    # Check for class imbalance
-    count = {}
-    for t in target:
-        if t not in count:
-            count[t] = 0
-        count[t] += 1
+        # Check for class imbalance
+        count = {}
+        for t in target:
+            if t not in count:
+                count[t] = 0
+            count[t] += 1
 
-    print('instances per class: {}'.format(count))
+        print('instances per class: {}'.format(count))
 
-    # Store the model in the ml directory
-    joblib.dump(model, "./bots/ml/" + options.model_path)
+        # Store the model in the ml directory
+        joblib.dump(model, "./bots/ml/" + options.model_path)
 
-    end = time.time()
+        end = time.time()
 
-    print('Done. Time to train:', (end-start)/60, 'minutes.')
+        print('Done. Time to train:', (end-start)/60, 'minutes.')
@@ -3,7 +3,7 @@
 import sys
 from os import path
 sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
-from api import State, util
+from api import State, util, tables
 from argparse import ArgumentParser
 import random
 import json
@@ -44,7 +44,8 @@ def new():
 def send():
 	global state
 	data = request.get_json(force=True)
-	move = (data[0], data[1])
+	# Either a move code (see api.tables) or the pair of the move
+	move = tables.to_move(data) if type(data) is int else (data[0], data[1])
 	state = state.next(move)
 	return state.convert_to_json()
 